@@ -0,0 +1,69 @@
+"""Agent `sql_db_query` tool output of unbounded against bounded result handling.
+
+Before, an agent query without LIMIT fetched the whole result and pasted every row into the prompt.
+Now LIMIT is injected, rows are streamed up to row and byte caps and the tool returns a preview
+with column statistics. Queries run against local warehouse at given scale.
+
+Usage: python -m benchmarks.bench_agent_results [--scale nuts2] [--repeats 3]
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.local_warehouse import SQLiteWarehouse
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.services.cached_sql_database import CachingSQLDatabase
+from src.services.conversation_memory import estimate_tokens
+from src.services.langchain_agent import AGENT_MAX_BYTES, AGENT_MAX_ROWS, AGENT_PREVIEW_ROWS
+
+QUERIES = {
+    'select *': "SELECT * FROM own_health_assesement",
+    'wide select': "SELECT Year, Country_Code, Financing_type, Euro_per_inhabitant FROM healthcare_expenditure",
+    'aggregate': "SELECT Country_Code, SUM(Number_of_People) AS people FROM own_health_assesement GROUP BY Country_Code",
+}
+
+
+def timed_run(db, query, repeats):
+    # caching is off (no data version), so every repeat queries the warehouse
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = db.run_no_throw(query)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    db.run_no_throw(query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, statistics.median(timings) * 1000, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='nuts2', choices=list(SCALES))
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    warehouse = SQLiteWarehouse(scaled_tables(args.scale))
+    engine = create_engine('sqlite://', creator=lambda: warehouse.db, poolclass=StaticPool)
+    databases = {
+        'unbounded': CachingSQLDatabase(engine, schema='eurostat', lazy_table_reflection=True),
+        'bounded': CachingSQLDatabase(engine, schema='eurostat', lazy_table_reflection=True,
+                                      max_result_rows=AGENT_MAX_ROWS, max_result_bytes=AGENT_MAX_BYTES,
+                                      preview_rows=AGENT_PREVIEW_ROWS),
+    }
+
+    print(f"scale={args.scale} max rows={AGENT_MAX_ROWS} preview rows={AGENT_PREVIEW_ROWS}")
+    print(f"{'query':>11} | {'mode':>9} | {'time (ms)':>9} | {'peak MB':>7} | {'output tokens':>13}")
+    for name, query in QUERIES.items():
+        for mode, db in databases.items():
+            output, ms, peak_mb = timed_run(db, query, args.repeats)
+            assert not output.startswith('Error:'), output
+            print(f"{name:>11} | {mode:>9} | {ms:9.1f} | {peak_mb:7.1f} | {estimate_tokens(output):13d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Page load latency of sequential vs concurrent query execution against a delayed local warehouse.
+
+Usage: python -m benchmarks.bench_concurrent_queries [--latency 1.0] [--counts 2 4 8]
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_app
+from benchmarks.synthetic_data import EU_COUNTRIES, warehouse_tables
+from src.services import databricks_connection
+from src.services.queries.query_builder import (
+    build_assesement_cube_query, build_bar_query, build_expenditure_cube_query, build_histogram_query
+)
+
+
+def page_queries(count):
+    # cube queries followed by chart queries for different years, as further charts would add them
+    queries = {'expenditure': build_expenditure_cube_query(), 'assesement': build_assesement_cube_query()}
+    for i in range(count - 2):
+        filters = {'year': ['2016', '2019', '2022'][i % 3], 'countries': EU_COUNTRIES[: 5 + i],
+                   'types': ['Voluntary schemes'], 'sexes': ['M', 'F'], 'age_groups': ['Y65+']}
+        queries[f'chart_{i}'] = build_bar_query(filters, 'Total Spending') if i % 2 else build_histogram_query(filters)
+    return dict(list(queries.items())[:count])
+
+
+def cold_run(warehouse, queries, concurrent):
+    # fresh caches, so every query goes to the warehouse
+    with tempfile.TemporaryDirectory() as directory:
+        connect_app(warehouse, directory)
+        start = time.perf_counter()
+        if concurrent:
+            results = databricks_connection.execute_sql_queries(queries)
+        else:
+            results = {name: databricks_connection.execute_sql_query(*query) for name, query in queries.items()}
+        elapsed = time.perf_counter() - start
+    assert all(df is not None and len(df) for df in results.values())
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=1.0, help='simulated warehouse round trip in seconds')
+    parser.add_argument('--counts', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    warehouse = SQLiteWarehouse(warehouse_tables(20_000, 20_000), latency=args.latency)
+    print(f"{'queries':>7} | {'sequential (s)':>14} | {'concurrent (s)':>14}")
+    for count in args.counts:
+        queries = page_queries(count)
+        sequential = cold_run(warehouse, queries, concurrent=False)
+        concurrent = cold_run(warehouse, queries, concurrent=True)
+        print(f"{count:>7} | {sequential:14.2f} | {concurrent:14.2f}")
+
+
+if __name__ == '__main__':
+    main()
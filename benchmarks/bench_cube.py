@@ -0,0 +1,100 @@
+"""Compare dashboard filter response of the cube engine with the former pandas mask-and-groupby path.
+
+Cube filter is the whole filter change of the dashboard - 3 slices and 5 aggregates; slice and aggregate
+columns are single calls. Aggregate time is mostly construction of its pandas DataFrame.
+
+Usage: python -m benchmarks.bench_cube [--sizes 10000 100000 1000000] [--repeats 20]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import assesement_table, expenditure_table
+from src.services.olap_cube import Cube
+from src.services.queries.query_builder import BAD_HEALTH_LEVELS, METRIC_COLUMNS
+
+FILTERS = {
+    'year': '2022',
+    'countries': ['AT', 'BE', 'DE', 'FR', 'PL', 'SE'],
+    'types': ['Government and compulsory schemes', 'Out-of-pocket payments'],
+    'sexes': ['M', 'F'],
+    'age_groups': ['Y25-34', 'Y35-44', 'Y65+'],
+}
+METRIC = 'Total Spending'
+
+
+def pandas_path(df1_raw, df2_raw, f):
+    # former dashboard logic: boolean masks on raw rows and one groupby per chart
+    df1 = df1_raw[(df1_raw['Year'] == f['year']) & df1_raw['Country_Code'].isin(f['countries'])
+                  & df1_raw['Financing_type'].isin(f['types'])]
+    df2 = df2_raw[(df2_raw['Year'] == f['year']) & df2_raw['Country_Code'].isin(f['countries'])
+                  & df2_raw['Sex'].isin(f['sexes']) & df2_raw['Age_Group'].isin(f['age_groups'])].copy()
+
+    bar = df1.groupby('Country_Code', observed=True).agg({METRIC: 'sum'}).reset_index()
+    donut = df1.groupby('Financing_type', observed=True).agg({METRIC: 'sum'}).reset_index()
+    hist = df2.groupby(['Age_Group', 'Health_Assesement'], observed=True)['Number_of_People'].sum().reset_index()
+    df2['bad'] = np.where(df2['Health_Assesement'].isin(BAD_HEALTH_LEVELS), df2['Number_of_People'], 0)
+    scatter = df2.groupby('Country_Code', observed=True).agg(bad=('bad', 'sum'), total=('Number_of_People', 'sum'))
+    return bar, donut, hist, scatter
+
+
+def cube_path(expenditure_cube, assesement_cube, f):
+    expenditure = expenditure_cube.slice(Year=f['year'], Country_Code=f['countries'], Financing_type=f['types'])
+    assesement = assesement_cube.slice(Year=f['year'], Country_Code=f['countries'], Sex=f['sexes'],
+                                       Age_Group=f['age_groups'])
+
+    bar = expenditure.aggregate(['Country_Code'], [METRIC])
+    donut = expenditure.aggregate(['Financing_type'], [METRIC])
+    hist = assesement.aggregate(['Age_Group', 'Health_Assesement'], ['Number_of_People'])
+    total = assesement.aggregate(['Country_Code'], ['Number_of_People'])
+    bad = assesement.slice(Health_Assesement=BAD_HEALTH_LEVELS).aggregate(['Country_Code'], ['Number_of_People'])
+    return bar, donut, hist, (total, bad)
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} | {'cube build (ms)':>15} | {'pandas filter (ms)':>18} | {'cube filter (ms)':>16} | "
+          f"{'slice (ms)':>10} | {'aggregate (ms)':>14}")
+    for n_rows in args.sizes:
+        df1_raw = expenditure_table(n_rows).to_pandas()
+        df2_raw = assesement_table(n_rows).to_pandas()
+
+        start = time.perf_counter()
+        expenditure_cube = Cube.from_frame(df1_raw, ['Year', 'Country_Code', 'Financing_type'], list(METRIC_COLUMNS))
+        assesement_cube = Cube.from_frame(df2_raw, ['Year', 'Country_Code', 'Sex', 'Age_Group', 'Health_Assesement'],
+                                          ['Number_of_People'])
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # both paths have to produce the same chart inputs
+        bar, _, hist, _ = pandas_path(df1_raw, df2_raw, FILTERS)
+        cube_bar, _, cube_hist, _ = cube_path(expenditure_cube, assesement_cube, FILTERS)
+        assert np.allclose(bar[METRIC], cube_bar[METRIC])
+        assert np.allclose(hist['Number_of_People'], cube_hist['Number_of_People'])
+
+        _, pandas_ms = best_of(args.repeats, lambda: pandas_path(df1_raw, df2_raw, FILTERS))
+        _, cube_ms = best_of(args.repeats, lambda: cube_path(expenditure_cube, assesement_cube, FILTERS))
+        slice_fn = lambda: expenditure_cube.slice(Year=FILTERS['year'], Country_Code=FILTERS['countries'],
+                                                  Financing_type=FILTERS['types'])
+        _, slice_ms = best_of(args.repeats, slice_fn)
+        _, aggregate_ms = best_of(args.repeats, lambda: slice_fn().aggregate(['Country_Code'], [METRIC]))
+        print(f"{n_rows:>9} | {build_ms:15.1f} | {pandas_ms:18.2f} | {cube_ms:16.2f} | {slice_ms:10.3f} | "
+              f"{aggregate_ms - slice_ms:14.3f}")
+
+
+if __name__ == '__main__':
+    main()
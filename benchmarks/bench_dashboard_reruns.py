@@ -0,0 +1,124 @@
+"""Per interaction latency of dashboard page - whole script reruns against fragment section reruns.
+
+Before, every widget change reran whole page: sidebar, all cube slices and all four charts.
+Now dashboard sections are `st.fragment` units, a change of spending measure radios reruns only
+expenditure section (bar and donut), sidebar filters still rerun every section.
+
+Page column is real page rerun through `AppTest` against local warehouse (AppTest always reruns
+whole script), section columns time the work of sections rerun on each interaction.
+
+Usage: python -m benchmarks.bench_dashboard_reruns [--scale eu27] [--reruns 20]
+"""
+import argparse
+import itertools
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.bench_figures import source_frames
+from benchmarks.harness import build_cubes
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_app
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.components import data_visuals
+from src.components.dashboard_sections import (
+    SPENDING_METRICS, draw_expenditure_charts, health_section, spending_vs_health_section
+)
+
+PAGE = str(Path(__file__).parent.parent / 'src' / 'pages' / '1_Dashboard.py')
+
+# control changed on every rerun, widget label in page and values cycled through
+INTERACTIONS = {
+    'spending measure': ('Spending scope:', ['Per capita', 'Total']),
+    'sex': ('Sex', ['M', 'F', 'Select All']),
+}
+
+
+def run_sections(cubes, f, sections):
+    # section bodies without their widgets - metric comes from filter state instead of radios
+    expenditure_cube, assesement_cube = cubes
+    if 'expenditure' in sections:
+        draw_expenditure_charts(expenditure_cube, f['year'], f['countries'], f['types'], f['metric'])
+    if 'health' in sections:
+        health_section.__wrapped__(assesement_cube, f['year'], f['countries'], f['sexes'], f['age_groups'])
+    if 'spending_vs_health' in sections:
+        spending_vs_health_section.__wrapped__(expenditure_cube, assesement_cube, f['year'], f['countries'],
+                                               f['types'], f['sexes'], f['age_groups'])
+
+
+def filter_states(cubes, interaction, reruns):
+    expenditure_cube, assesement_cube = cubes
+    baseline = {
+        'year': expenditure_cube.labels['Year'][-1],
+        'countries': list(expenditure_cube.labels['Country_Code']),
+        'types': list(expenditure_cube.labels['Financing_type']),
+        'sexes': ['M', 'F'],
+        'age_groups': list(assesement_cube.labels['Age_Group']),
+        'metric': 'Total Spending',
+    }
+    _, values = INTERACTIONS[interaction]
+    states = []
+    for value in itertools.islice(itertools.cycle(values), reruns):
+        if interaction == 'spending measure':
+            states.append({**baseline, 'metric': SPENDING_METRICS[('Nominal', value)]})
+        else:
+            states.append({**baseline, 'sexes': ['M', 'F'] if value == 'Select All' else [value]})
+    return states
+
+
+def timed_sections(cubes, states, sections):
+    timings = []
+    for f in states:
+        start = time.perf_counter()
+        run_sections(cubes, f, sections)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def timed_page(app, interaction, reruns):
+    label, values = INTERACTIONS[interaction]
+    timings = []
+    for value in itertools.islice(itertools.cycle(values), reruns):
+        widget = next(w for w in list(app.radio) + list(app.selectbox) if w.label == label)
+        start = time.perf_counter()
+        widget.set_value(value).run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='eu27', choices=list(SCALES))
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot_dir = tempfile.mkdtemp(prefix='bench_snapshots_')
+    try:
+        connect_app(SQLiteWarehouse(scaled_tables(args.scale)), snapshot_dir)
+        app = AppTest.from_file(PAGE, default_timeout=120)
+        app.run()
+
+        cubes = build_cubes(*source_frames(args.scale))
+        all_sections = ['expenditure', 'health', 'spending_vs_health']
+        # sections rerun by each interaction now - radios live in expenditure fragment, sex is sidebar filter
+        rerun_sections = {'spending measure': ['expenditure'], 'sex': all_sections}
+
+        print(f"{'interaction':>16} | {'page rerun (ms)':>15} | {'sections before (ms)':>20} | "
+              f"{'sections after (ms)':>19}")
+        for interaction in INTERACTIONS:
+            page = timed_page(app, interaction, args.reruns)
+            states = filter_states(cubes, interaction, args.reruns)
+            data_visuals.get_figure_cache().entries.clear()
+            before = timed_sections(cubes, states, all_sections)
+            data_visuals.get_figure_cache().entries.clear()
+            after = timed_sections(cubes, states, rerun_sections[interaction])
+            print(f"{interaction:>16} | {page:15.1f} | {before:20.1f} | {after:19.1f}")
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Compare dict and arrow fetch paths of execute_sql_query against a local cursor.
+
+Usage: python -m benchmarks.bench_fetch [--sizes 10000 1000000 10000000] [--max-dict-rows 1000000]
+"""
+import argparse
+import time
+
+from benchmarks.local_warehouse import LocalConnection, static_result
+from benchmarks.synthetic_data import expenditure_table
+from src.services.databricks_connection import fetch_as_arrow, fetch_as_dicts
+
+
+def timed_fetch(table, fetch):
+    connection = LocalConnection(static_result(table))
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM eurostat.healthcare_expenditure")
+        df = fetch(cursor)
+    return time.perf_counter() - start, df
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-dict-rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} | {'dict (s)':>9} | {'arrow (s)':>9} | {'arrow batched (s)':>17} | {'dict MB':>8} | {'arrow MB':>8}")
+    for n_rows in args.sizes:
+        table = expenditure_table(n_rows)
+
+        arrow_time, arrow_df = timed_fetch(table, fetch_as_arrow)
+        batched_time, _ = timed_fetch(table, lambda c: fetch_as_arrow(c, batch_size=args.batch_size))
+        arrow_mb = arrow_df.memory_usage(deep=True).sum() / 2**20
+
+        if n_rows <= args.max_dict_rows:
+            dict_time, dict_df = timed_fetch(table, fetch_as_dicts)
+            dict_mb = dict_df.memory_usage(deep=True).sum() / 2**20
+            dict_cells = f"{dict_time:9.3f} | "
+            dict_size = f"{dict_mb:8.1f}"
+        else:
+            dict_cells = f"{'skipped':>9} | "
+            dict_size = f"{'-':>8}"
+
+        print(f"{n_rows:>10} | {dict_cells}{arrow_time:9.3f} | {batched_time:17.3f} | {dict_size} | {arrow_mb:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
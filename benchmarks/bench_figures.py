@@ -0,0 +1,87 @@
+"""Rerun latency of the four dashboard charts with and without the figure cache.
+
+Unchanged reruns repeat the same chart inputs (e.g. unrelated widget toggled), changed reruns
+use new filter state every time, so figure cache only adds hashing overhead there.
+
+Usage: python -m benchmarks.bench_figures [--scale eu27] [--reruns 20]
+"""
+import argparse
+import random
+import statistics
+import time
+
+import streamlit as st
+
+from benchmarks.harness import build_cubes, dashboard_frames, random_filters
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.components import data_visuals
+from src.services.figure_cache import frame_hash
+from src.services.queries.query_builder import METRIC_COLUMNS
+
+
+def source_frames(scale):
+    # cube query results computed locally from synthetic tables
+    tables = scaled_tables(scale)
+    expenditure = tables['eurostat.healthcare_expenditure'].to_pandas() \
+        .rename(columns={column: metric for metric, column in METRIC_COLUMNS.items()})
+    assesement = tables['eurostat.own_health_assesement'].to_pandas()
+    expenditure['Row_count'] = 1
+    assesement['Row_count'] = 1
+    return expenditure, assesement
+
+
+def draw_uncached(frames):
+    # former draw functions - figure built on every rerun
+    st.plotly_chart(data_visuals.build_bar_chart(frames['bar'], frames['metric']))
+    st.plotly_chart(data_visuals.build_pie_chart(frames['donut'], frames['metric']))
+    st.plotly_chart(data_visuals.build_histogram(frames['histogram']))
+    st.plotly_chart(data_visuals.build_scatter_plot(frames['scatter']))
+
+
+def draw_cached(frames):
+    data_visuals.draw_bar_chart(frames['bar'], frames['metric'])
+    data_visuals.draw_pie_chart(frames['donut'], frames['metric'])
+    data_visuals.draw_histogram(frames['histogram'])
+    data_visuals.draw_scatter_plot(frames['scatter'])
+
+
+def timed(draw, frame_sequence):
+    timings = []
+    for frames in frame_sequence:
+        start = time.perf_counter()
+        draw(frames)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='eu27', choices=list(SCALES))
+    parser.add_argument('--reruns', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    cubes = build_cubes(*source_frames(args.scale))
+    changing = [dashboard_frames(*cubes, random_filters(rng, *cubes)) for _ in range(args.reruns)]
+    unchanged = [changing[0]] * args.reruns
+
+    # every draw function gets the same rows on both paths
+    data_visuals.get_figure_cache().entries.clear()
+    print(f"{'reruns':>9} | {'uncached (ms)':>13} | {'cached (ms)':>11}")
+    for name, sequence in [('unchanged', unchanged), ('changed', changing)]:
+        uncached = timed(draw_uncached, sequence)
+        cached = timed(draw_cached, sequence)
+        print(f"{name:>9} | {uncached:13.1f} | {cached:11.1f}")
+
+    start = time.perf_counter()
+    for frames in changing:
+        for key in ['bar', 'donut', 'histogram', 'scatter']:
+            frame_hash(frames[key])
+    hash_ms = (time.perf_counter() - start) * 1000 / args.reruns
+    stats = data_visuals.get_figure_cache().stats()
+    print(f"input hashing: {hash_ms:.2f} ms per rerun, cache: {stats['entries']} figures, "
+          f"{stats['bytes'] / 2**10:.0f} KiB, hit rate {stats['hit_rate']:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Dashboard cube load from row level fact tables against pre-aggregated gold tables.
+
+Former cube queries grouped row level tables to the grain of dashboard filters on every load,
+gold tables hold that grain already. Rows returned are the same, rows read in the warehouse drop
+from fact table size to gold table size.
+
+Usage: python -m benchmarks.bench_gold_tables [--rows 100000 1000000] [--repeats 5]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.local_warehouse import SQLiteWarehouse
+from benchmarks.synthetic_data import warehouse_tables
+from src.services.queries.query_builder import (
+    METRIC_COLUMNS, build_assesement_cube_query, build_expenditure_cube_query
+)
+
+# former cube queries over row level tables
+FORMER_QUERIES = [
+    f"""
+        SELECT Year, Country_Code, Financing_type,
+            {', '.join(f'SUM({column}) AS `{metric}`' for metric, column in METRIC_COLUMNS.items())},
+            COUNT(*) AS Row_count
+        FROM workspace.eurostat.healthcare_expenditure
+        GROUP BY Year, Country_Code, Financing_type
+    """,
+    """
+        SELECT Year, Country_Code, Sex, Age_Group, Health_Assesement,
+            SUM(Number_of_People) AS Number_of_People, COUNT(*) AS Row_count
+        FROM workspace.eurostat.own_health_assesement
+        GROUP BY Year, Country_Code, Sex, Age_Group, Health_Assesement
+    """,
+]
+GOLD_QUERIES = [build_expenditure_cube_query()[0], build_assesement_cube_query()[0]]
+
+
+def timed(warehouse, queries, repeats):
+    timings, rows = [], 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = sum(warehouse.execute(query).num_rows for query in queries)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fact rows':>9} | {'gold rows read':>14} | {'rows returned':>13} | {'former (ms)':>11} | {'gold (ms)':>9}")
+    for n_rows in args.rows:
+        tables = warehouse_tables(n_rows, n_rows)
+        warehouse = SQLiteWarehouse(tables)
+        gold_rows = tables['eurostat.gold_expenditure'].num_rows + tables['eurostat.gold_health_assesement'].num_rows
+        former_ms, former_returned = timed(warehouse, FORMER_QUERIES, args.repeats)
+        gold_ms, gold_returned = timed(warehouse, GOLD_QUERIES, args.repeats)
+        assert former_returned == gold_returned
+        print(f"{2 * n_rows:9d} | {gold_rows:14d} | {gold_returned:13d} | {former_ms:11.1f} | {gold_ms:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Ingest time of Eurostat datasets on local spark - former sequential fetch with schema inference
+against concurrent fetch with Arrow tables of explicit schema.
+
+Payloads are replayed from recorded fixtures (`--fixtures`, see databricks_etl.eurostat_source) or
+from synthetic fixtures of real API size written to a temporary directory, every API call waits
+`--latency` seconds like a network round trip. Needs pyspark.
+
+Usage: python -m benchmarks.bench_ingestion [--fixtures DIR] [--latency 0.5] [--repeats 3]
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+from pyspark.sql import SparkSession
+
+from benchmarks.synthetic_data import eurostat_data, eurostat_dic
+from databricks_etl.eurostat_source import DATASETS, RecordedEurostat, record_fixtures
+from databricks_etl.ingestion import fetch_payloads, ingest_frames
+
+
+class SyntheticEurostat:
+
+    def get_data(self, code):
+        return eurostat_data(code)
+
+    def get_dic(self, code, param):
+        return eurostat_dic(code, param)
+
+
+class SimulatedApi:
+    # fixture source answering after network like latency
+
+    def __init__(self, source, latency):
+        self.source = source
+        self.latency = latency
+
+    def get_data(self, code):
+        time.sleep(self.latency)
+        return self.source.get_data(code)
+
+    def get_dic(self, code, param):
+        time.sleep(self.latency)
+        return self.source.get_dic(code, param)
+
+
+def former_ingest(spark, source):
+    # former notebook functions - one request after another, spark infers types from python rows
+    timings = {}
+    for code, params in DATASETS.items():
+        start = time.perf_counter()
+        data = source.get_data(code)
+        dictionaries = {param: source.get_dic(code, param) for param in params}
+        fetched = time.perf_counter()
+
+        header = [h.split('\\')[0] for h in data[0]]
+        frames = [spark.createDataFrame(data[1:], header)]
+        frames += [spark.createDataFrame(rows, ['value', 'description']) for rows in dictionaries.values()]
+        for frame in frames:
+            frame.count()
+        timings[code] = {'rows': len(data) - 1, 'fetch_s': fetched - start, 'frame_s': time.perf_counter() - fetched}
+    return timings
+
+
+def arrow_ingest(spark, source):
+    payloads, timings = fetch_payloads(source)
+    for code, payload in payloads.items():
+        start = time.perf_counter()
+        frames = ingest_frames(spark, payload, timings[code])
+        for frame in frames.values():
+            frame.count()
+        timings[code]['frame_s'] = time.perf_counter() - start
+    return timings
+
+
+def timed(ingest, spark, source, repeats):
+    # median per dataset timings and wall time of whole ingest over repeats
+    runs, walls = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        runs.append(ingest(spark, source))
+        walls.append(time.perf_counter() - start)
+    medians = {
+        code: {key: statistics.median(run[code][key] for run in runs) for key in ('rows', 'fetch_s', 'frame_s')}
+        for code in DATASETS
+    }
+    return medians, statistics.median(walls)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', help='recorded fixture directory, synthetic fixtures of real size if omitted')
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated API round trip in seconds')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_dir = args.fixtures or tempfile.mkdtemp(prefix='eurostat_fixtures_')
+    try:
+        if not args.fixtures:
+            record_fixtures(SyntheticEurostat(), fixture_dir)
+        source = SimulatedApi(RecordedEurostat(fixture_dir), args.latency)
+        spark = SparkSession.builder.master('local[2]').appName('bench-ingestion').getOrCreate()
+
+        # warm up spark session and arrow conversion before timing
+        arrow_ingest(spark, SimulatedApi(source.source, 0))
+
+        former, former_wall = timed(former_ingest, spark, source, args.repeats)
+        arrow, arrow_wall = timed(arrow_ingest, spark, source, args.repeats)
+
+        print(f"{'dataset':>14} | {'rows':>6} | {'former fetch s':>14} | {'former frame s':>14} | "
+              f"{'arrow fetch s':>13} | {'arrow frame s':>13}")
+        for code in DATASETS:
+            print(f"{code:>14} | {former[code]['rows']:6.0f} | {former[code]['fetch_s']:14.2f} | "
+                  f"{former[code]['frame_s']:14.2f} | {arrow[code]['fetch_s']:13.2f} | {arrow[code]['frame_s']:13.2f}")
+        print(f"whole ingest: former {former_wall:.2f} s, arrow {arrow_wall:.2f} s")
+    finally:
+        if not args.fixtures:
+            shutil.rmtree(fixture_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
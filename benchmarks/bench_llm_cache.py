@@ -0,0 +1,77 @@
+"""Model calls of SQL agent without and with persistent LLM response cache.
+
+Fixed question set is asked by a fresh process (cold cache), again after app restart (new cache
+object and model on the same SQLite file) and after agent tables got new versions (new namespace).
+Model is the scripted SQL model counting calls that reach it, agent streams like in the app.
+
+Usage: python -m benchmarks.bench_llm_cache [--scale eu27] [--max-mb 50]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_community.agent_toolkits.sql.base import create_sql_agent
+
+from benchmarks.bench_query_validation import QUESTIONS
+from benchmarks.fake_llm import ScriptedSQLFixingModel
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_agent
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.services.llm_cache import PersistentLLMCache, StreamingCacheMixin
+from src.services.queries.query_builder import METRIC_COLUMNS
+from src.services.sql_validator import ValidatingSQLToolkit
+
+
+class CachedScriptedModel(StreamingCacheMixin, ScriptedSQLFixingModel):
+    pass
+
+
+def ask_all(warehouse, cache):
+    # new model and agent like after app restart, -> (model calls, seconds)
+    llm = CachedScriptedModel(scripts=QUESTIONS, cache=cache) if cache else ScriptedSQLFixingModel(scripts=QUESTIONS)
+    db, _ = connect_agent(warehouse, llm)
+    agent = create_sql_agent(llm=llm, toolkit=ValidatingSQLToolkit(db=db, llm=llm, column_aliases=METRIC_COLUMNS),
+                             verbose=False)
+    start = time.perf_counter()
+    for question in QUESTIONS:
+        # agent executor streams model output, as AgentWrapper does in app
+        for _ in agent.stream({'input': question}):
+            pass
+    return llm.calls, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='eu27', choices=list(SCALES))
+    parser.add_argument('--max-mb', type=float, default=50)
+    args = parser.parse_args()
+
+    warehouse = SQLiteWarehouse(scaled_tables(args.scale))
+    cache_dir = tempfile.mkdtemp(prefix='bench_llm_cache_')
+    path = Path(cache_dir) / 'llm_responses.sqlite'
+    namespace = {'version': 'v1'}
+    new_cache = lambda: PersistentLLMCache(path, max_bytes=int(args.max_mb * 2**20),
+                                           namespace_provider=lambda: namespace['version'])
+    try:
+        runs = [('no cache', ask_all(warehouse, None), None)]
+        for phase in ['cold cache', 'after restart', 'after restart']:
+            cache = new_cache()
+            runs.append((phase, ask_all(warehouse, cache), cache.stats()))
+        namespace['version'] = 'v2'
+        cache = new_cache()
+        runs.append(('new table versions', ask_all(warehouse, cache), cache.stats()))
+
+        print(f"{len(QUESTIONS)} questions")
+        print(f"{'phase':>18} | {'model calls':>11} | {'hit rate':>8} | {'entries':>7} | {'cache KB':>8} | {'time (ms)':>9}")
+        for phase, (calls, seconds), stats in runs:
+            hit_rate = f"{stats['hit_rate']:8.0%}" if stats else f"{'-':>8}"
+            entries = f"{stats['entries']:7d}" if stats else f"{'-':>7}"
+            size = f"{stats['bytes'] / 1024:8.1f}" if stats else f"{'-':>8}"
+            print(f"{phase:>18} | {calls:11d} | {hit_rate} | {entries} | {size} | {seconds * 1000:9.1f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Prompt size per turn of full-history replay vs token budgeted conversation memory over 100 turns.
+
+Memory total includes prompts of summary LLM calls, turns are summarized in batches.
+
+Budget and summary behaviour are checked in tests/test_conversation_memory.py.
+
+Usage: python -m benchmarks.bench_memory [--turns 100] [--budget 1500]
+"""
+import argparse
+import time
+
+from langchain_core.language_models.fake import FakeListLLM
+
+from src.services.conversation_memory import ConversationMemory, estimate_tokens
+
+ANSWER = ("Based on the data, {country} spent {value:.1f} euro per inhabitant on healthcare in {year}, "
+          "which is {cmp} the EU average. Government schemes financed most of it, while out-of-pocket "
+          "payments made up {share:.1f}% of total spending.")
+SQL = ("SELECT Country_Code, SUM(Euro_per_inhabitant) FROM healthcare_expenditure "
+       "WHERE Year = '{year}' AND Country_Code = '{country}' GROUP BY Country_Code")
+
+
+def full_replay_prompt(history, question):
+    # former ask_agent behaviour - every earlier message concatenated into each prompt
+    formatted = ''.join(f"Human: {q}\nAI: {a}\n" for q, a in history)
+    return f"Previous conversation:\n{formatted}\nNew question: {question}" if formatted else question
+
+
+class CountingLLM(FakeListLLM):
+    # summary LLM recording size of every prompt sent to it
+    prompt_tokens: int = 0
+
+    def invoke(self, prompt, *args, **kwargs):
+        self.prompt_tokens += estimate_tokens(prompt)
+        return super().invoke(prompt, *args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=100)
+    parser.add_argument('--budget', type=int, default=1500)
+    args = parser.parse_args()
+
+    summaries = [f"User compared healthcare spending of {n} countries across years; "
+                 f"answers covered per capita spending and financing shares." for n in range(1, args.turns + 1)]
+    llm = CountingLLM(responses=summaries)
+    memory = ConversationMemory(llm=llm, token_budget=args.budget)
+    history, full_total, memory_total = [], 0, 0
+
+    print(f"{'turn':>5} | {'full replay tokens':>18} | {'memory tokens':>13} | {'summary calls':>13} | {'render (ms)':>11}")
+    for turn in range(1, args.turns + 1):
+        country, year = ['PL', 'DE', 'FR', 'SE'][turn % 4], ['2016', '2019', '2022'][turn % 3]
+        question = f"How much did {country} spend per inhabitant in {year} compared to turn {turn - 1}?"
+
+        full_tokens = estimate_tokens(full_replay_prompt(history, question))
+        start = time.perf_counter()
+        memory_tokens = estimate_tokens(memory.render(question))
+        render_ms = (time.perf_counter() - start) * 1000
+        full_total += full_tokens
+        memory_total += memory_tokens
+
+        answer = ANSWER.format(country=country, value=1000 + turn * 7.5, year=year,
+                               cmp='above' if turn % 2 else 'below', share=10 + turn % 20)
+        history.append((question, answer))
+        memory.add_turn(question, answer, [SQL.format(year=year, country=country)])
+
+        if turn in (1, 2, 5, 10, 25, 50, 75, 100) or turn == args.turns:
+            print(f"{turn:>5} | {full_tokens:>18} | {memory_tokens:>13} | {memory.summary_calls:>13} | {render_ms:11.3f}")
+
+    print(f"summary LLM calls: {memory.summary_calls} ({memory.summary_calls / args.turns:.2f} per turn), "
+          f"{llm.prompt_tokens} prompt tokens")
+    print(f"total prompt tokens over {args.turns} turns: full replay={full_total} "
+          f"memory={memory_total + llm.prompt_tokens} (agent {memory_total} + summaries {llm.prompt_tokens})")
+
+
+if __name__ == '__main__':
+    main()
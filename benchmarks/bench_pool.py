@@ -0,0 +1,123 @@
+"""Throughput of the connection pool with 50 simultaneous sessions against a fake connector.
+
+The fake connector fails every n-th connection attempt, kills random connections
+between queries and raises when two threads use one connection at the same time. Pool correctness
+is covered by tests/test_connection_pool.py, this only times it.
+
+Usage: python -m benchmarks.bench_pool [--sessions 50] [--queries 20] [--pool-size 8]
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.local_warehouse import LocalConnection, static_result
+from benchmarks.synthetic_data import expenditure_table
+from src.services.connection_pool import ConnectionPool
+from src.services.databricks_connection import fetch_as_arrow
+
+
+class FakeConnection(LocalConnection):
+
+    def __init__(self, executor, latency):
+        super().__init__(executor, latency)
+        self.users = 0
+        self.users_lock = threading.Lock()
+        self.dead = False
+
+    def cursor(self):
+        if self.dead or not self.open:
+            raise ConnectionError("connection was closed by warehouse")
+        with self.users_lock:
+            self.users += 1
+            if self.users > 1:
+                raise RuntimeError("connection shared by two threads")
+        cursor = super().cursor()
+        close = cursor.close
+
+        def release():
+            close()
+            with self.users_lock:
+                self.users -= 1
+        cursor.close = release
+        return cursor
+
+
+class FakeConnector:
+
+    def __init__(self, latency, fail_every, kill_probability):
+        self.table = expenditure_table(1000)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.kill_probability = kill_probability
+        self.attempts = 0
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def connect(self):
+        with self.lock:
+            self.attempts += 1
+            if self.fail_every and self.attempts % self.fail_every == 0:
+                raise ConnectionError("warehouse is starting")
+        connection = FakeConnection(static_result(self.table), self.latency)
+        self.connections.append(connection)
+        return connection
+
+    def chaos(self, stop):
+        # warehouse randomly drops connections
+        while not stop.is_set():
+            for connection in list(self.connections):
+                if random.random() < self.kill_probability:
+                    connection.dead = True
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    connector = FakeConnector(args.latency, fail_every=7, kill_probability=0.02)
+    pool = ConnectionPool(connector.connect, max_size=args.pool_size, checkout_timeout=30,
+                          max_lifetime=2, backoff=0.01)
+    errors, latencies = [], []
+    stop = threading.Event()
+
+    def session():
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            try:
+                with pool.connection() as connection, connection.cursor() as cursor:
+                    cursor.execute("SELECT * FROM eurostat.healthcare_expenditure")
+                    fetch_as_arrow(cursor)
+            except ConnectionError:
+                # dead connection is reported once to the session and replaced by pool on next checkout
+                errors.append('dropped')
+            except Exception as e:
+                errors.append(repr(e))
+            latencies.append(time.perf_counter() - start)
+
+    threading.Thread(target=connector.chaos, args=(stop,), daemon=True).start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+
+    unexpected = [e for e in errors if e != 'dropped']
+    latencies.sort()
+    print(f"sessions={args.sessions} queries={len(latencies)} elapsed={elapsed:.2f}s "
+          f"throughput={len(latencies) / elapsed:.0f} q/s p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+    print(f"dropped connections seen by sessions={errors.count('dropped')} unexpected errors={len(unexpected)}")
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == '__main__':
+    main()
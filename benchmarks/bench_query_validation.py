@@ -0,0 +1,90 @@
+"""LLM calls per question of SQL agent with LLM query checker against local query validation.
+
+Before, the agent sent every query to `sql_db_query_checker` - one more agent step and one more LLM
+call of the checker itself. Now `sql_db_query` validates queries locally against table schemas and
+returns structured errors, only broken queries take one more agent step to get fixed. Questions are
+a fixed set answered by scripted model, some of them with a mistake in the first query.
+
+Usage: python -m benchmarks.bench_query_validation [--scale eu27]
+"""
+import argparse
+import time
+
+from langchain_community.agent_toolkits.sql.base import create_sql_agent
+from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+
+from benchmarks.fake_llm import ScriptedSQLFixingModel
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_agent
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.services.queries.query_builder import METRIC_COLUMNS
+from src.services.sql_validator import ValidatingSQLToolkit
+
+# question: (first query, corrected query)
+QUESTIONS = {
+    "Which five countries spent most per inhabitant in 2022?": (
+        "SELECT Country_Code, SUM(Euro_per_inhabitant) AS spending FROM eurostat.healthcare_expenditure "
+        "WHERE Year = '2022' GROUP BY Country_Code ORDER BY spending DESC LIMIT 5",
+    ) * 2,
+    "How many people rated their health as very bad in 2019?": (
+        "SELECT SUM(Number_of_People) FROM eurostat.own_health_assesement "
+        "WHERE Year = '2019' AND Health_Assesement = 'Very bad'",
+    ) * 2,
+    "What was total spending in PPS per country in 2016?": (
+        "SELECT Country_Code, SUM(`Total Spending (PPS)`) AS pps FROM eurostat.gold_expenditure "
+        "WHERE Year = '2016' GROUP BY Country_Code ORDER BY pps DESC",
+        "SELECT Country_Code, SUM(Million_purchasing_power_standards__PPS_) AS pps FROM eurostat.gold_expenditure "
+        "WHERE Year = '2016' GROUP BY Country_Code ORDER BY pps DESC",
+    ),
+    "Which age group reports bad health most often?": (
+        "SELECT Age_Group, SUM(Number_of_People) AS people FROM eurostat.own_health_assesement "
+        "WHERE Health_Assessment IN ('Bad', 'Very bad') GROUP BY Age_Group ORDER BY people DESC",
+        "SELECT Age_Group, SUM(Number_of_People) AS people FROM eurostat.own_health_assesement "
+        "WHERE Health_Assesement IN ('Bad', 'Very bad') GROUP BY Age_Group ORDER BY people DESC",
+    ),
+    "What share of GDP do out-of-pocket payments take on average?": (
+        "SELECT AVG(Percentage_of_gross_domestic_product__GDP_) FROM eurostat.healthcare_expenditure "
+        "WHERE \"Financing_type\" = 'Out-of-pocket payments'",
+        "SELECT AVG(Percentage_of_gross_domestic_product__GDP_) FROM eurostat.healthcare_expenditure "
+        "WHERE `Financing_type` = 'Out-of-pocket payments'",
+    ),
+}
+
+
+def run_questions(agent, llm):
+    # -> [(llm calls, seconds, answer)] per question
+    results = []
+    for question in QUESTIONS:
+        calls, start = llm.calls, time.perf_counter()
+        answer = agent.invoke({'input': question})['output']
+        results.append((llm.calls - calls, time.perf_counter() - start, answer))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='eu27', choices=list(SCALES))
+    args = parser.parse_args()
+
+    llm = ScriptedSQLFixingModel(scripts=QUESTIONS)
+    db, _ = connect_agent(SQLiteWarehouse(scaled_tables(args.scale)), llm)
+    toolkits = {
+        'llm checker': SQLDatabaseToolkit(db=db, llm=llm),
+        'local validation': ValidatingSQLToolkit(db=db, llm=llm, column_aliases=METRIC_COLUMNS),
+    }
+
+    runs = {}
+    for mode, toolkit in toolkits.items():
+        db.cache.clear()
+        runs[mode] = run_questions(create_sql_agent(llm=llm, toolkit=toolkit, verbose=False), llm)
+
+    print(f"{'question':>60} | " + " | ".join(f"{mode + ' calls':>22}" for mode in runs))
+    for i, question in enumerate(QUESTIONS):
+        print(f"{question:>60} | " + " | ".join(f"{results[i][0]:22d}" for results in runs.values()))
+    for mode, results in runs.items():
+        assert not any(answer.startswith('Error') for _, _, answer in results), results
+        calls = sum(result[0] for result in results) / len(results)
+        print(f"{mode}: {calls:.1f} LLM calls per question, {sum(r[1] for r in results) * 1000:.0f} ms in total")
+
+
+if __name__ == '__main__':
+    main()
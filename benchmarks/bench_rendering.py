@@ -0,0 +1,84 @@
+"""Browser payload size and build time of dashboard charts at growing regional scale,
+with large data rendering (WebGL, top-N bucketing, server-side histogram) against the former charts.
+
+Usage: python -m benchmarks.bench_rendering [--scales eu27 nuts2 nuts3]
+"""
+import argparse
+import time
+from unittest import mock
+
+import plotly.express as px
+
+from benchmarks.bench_figures import source_frames
+from benchmarks.harness import build_cubes
+from benchmarks.synthetic_data import SCALES
+from src.components import data_visuals
+from src.services.transforms import bad_health_by_country, create_line_breaks
+
+METRIC = 'Total Spending'
+
+# thresholds high enough that every chart is drawn the former way
+UNLIMITED = {'WEBGL_THRESHOLD': float('inf'), 'TEXT_LABEL_THRESHOLD': float('inf'),
+             'BAR_TOP_N': float('inf'), 'DONUT_TOP_N': float('inf')}
+
+
+def former_histogram(df):
+    # former histogram - percentages computed by plotly.js from every input row
+    return px.histogram(df, x="Age_Group", y="Number_of_People", color="Health_Assesement", barnorm='percent',
+                        text_auto='.1f', color_discrete_sequence=['red', 'lightpink', 'lightblue', 'lightgreen', 'green'])
+
+
+def chart_inputs(cubes, year):
+    expenditure_cube, assesement_cube = cubes
+    expenditure_slice = expenditure_cube.slice(Year=year)
+    assesement_slice = assesement_cube.slice(Year=year)
+
+    bar = expenditure_slice.aggregate(['Country_Code'], [METRIC]).sort_values(METRIC, ascending=False)
+    donut = expenditure_slice.aggregate(['Financing_type'], [METRIC])
+    donut['Type'] = create_line_breaks(donut['Financing_type'])
+    # histogram input at regional grain, as it would come without aggregation on the page
+    histogram = assesement_slice.aggregate(['Country_Code', 'Age_Group', 'Health_Assesement'], ['Number_of_People'])
+    scatter = expenditure_slice.aggregate(['Country_Code'], ['Percentage of GDP']) \
+        .rename(columns={'Percentage of GDP': 'perc_of_gdp'}) \
+        .merge(bad_health_by_country(assesement_slice.aggregate(['Country_Code', 'Health_Assesement'],
+                                                               ['Number_of_People'])), on='Country_Code')
+    return {'bar': bar, 'donut': donut, 'histogram': histogram, 'scatter': scatter}
+
+
+def build_all(inputs, former):
+    builders = {
+        'bar': lambda df: data_visuals.build_bar_chart(df, METRIC),
+        'donut': lambda df: data_visuals.build_pie_chart(df, METRIC),
+        'histogram': former_histogram if former else data_visuals.build_histogram,
+        'scatter': data_visuals.build_scatter_plot,
+    }
+    results = {}
+    for chart, build in builders.items():
+        start = time.perf_counter()
+        payload = len(build(inputs[chart]).to_json())
+        results[chart] = (payload, (time.perf_counter() - start) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', nargs='+', default=['eu27', 'nuts2', 'nuts3'], choices=list(SCALES))
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} | {'chart':>9} | {'rows':>6} | {'former KiB':>10} | {'former ms':>9} | "
+          f"{'large data KiB':>14} | {'large data ms':>13}")
+    for scale in args.scales:
+        cubes = build_cubes(*source_frames(scale))
+        inputs = chart_inputs(cubes, cubes[0].labels['Year'][-1])
+        with mock.patch.multiple(data_visuals, **UNLIMITED):
+            former = build_all(inputs, former=True)
+        current = build_all(inputs, former=False)
+        for chart in former:
+            (former_bytes, former_ms), (bytes_, ms) = former[chart], current[chart]
+            print(f"{scale:>6} | {chart:>9} | {len(inputs[chart]):>6} | {former_bytes / 2**10:10.1f} | {former_ms:9.1f} | "
+                  f"{bytes_ / 2**10:14.1f} | {ms:13.1f}")
+    print(f"payload limit: {data_visuals.PAYLOAD_LIMIT_BYTES / 2**10:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Routing accuracy and latency of the fast-path question router on a fixed question set.
+
+Questions labelled with an intent should be answered from sql templates, questions labelled None
+should fall back to the agent. Routed answers run against local sqlite warehouse.
+
+Usage: python -m benchmarks.bench_router [--latency 0.05] [--repeat 20]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_app
+from benchmarks.synthetic_data import warehouse_tables
+from src.services.question_router import MIN_CONFIDENCE, classify, route_question
+
+QUESTIONS = [
+    ("Which country spent the most per capita on healthcare in 2022?", 'spending_by_country'),
+    ("Show healthcare spending per inhabitant by country", 'spending_by_country'),
+    ("Rank countries by health expenditure as percentage of GDP in 2019", 'spending_by_country'),
+    ("What is the total healthcare expenditure of Poland and Germany in 2016?", 'spending_by_country'),
+    ("Which EU member states have the lowest spending per person in PPS?", 'spending_by_country'),
+    ("Top countries by healthcare costs in 2022", 'spending_by_country'),
+    ("How much did each country spend on health in 2019?", 'spending_by_country'),
+    ("What share of healthcare spending is out-of-pocket payments?", 'out_of_pocket_share'),
+    ("What percentage of health expenditure was paid out of pocket by households in Greece in 2022?",
+     'out_of_pocket_share'),
+    ("Breakdown of healthcare financing schemes in 2016", 'out_of_pocket_share'),
+    ("What proportion of spending comes from government schemes in Sweden?", 'out_of_pocket_share'),
+    ("How much of healthcare is financed by voluntary schemes, as a percentage?", 'out_of_pocket_share'),
+    ("What is the share of out of pocket payments in FR in 2019?", 'out_of_pocket_share'),
+    ("Percentage of people with bad health by age group", 'bad_health_by_age'),
+    ("Which age group reports very bad health most often in 2022?", 'bad_health_by_age'),
+    ("How does self-perceived health differ between older and younger people in Italy?", 'bad_health_by_age'),
+    ("Show poor health share per age group in 2016", 'bad_health_by_age'),
+    ("Do older people report bad health more often in Spain?", 'bad_health_by_age'),
+    ("Health assesement of age groups in Lithuania in 2019", 'bad_health_by_age'),
+    ("Why does Germany spend so much on healthcare?", None),
+    ("How did spending per capita change between 2016 and 2022?", None),
+    ("Is there a correlation between GDP share of health spending and bad health?", None),
+    ("Compare out-of-pocket share of Poland versus Czechia", None),
+    ("Which countries use euro as currency?", None),
+    ("What is the population of Malta?", None),
+    ("Do women report bad health more often than men in older age groups?", None),
+    ("Hello, what can you do?", None),
+    ("List all tables in the database", None),
+    ("Show the trend of healthcare spending in France over time", None),
+    ("Which countries joined the EU after 2000?", None),
+]
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated warehouse round trip in seconds')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    # accuracy - routed intent must match label, unlabelled questions must fall back
+    correct, wrong = 0, []
+    for question, expected in QUESTIONS:
+        intent, confidence = classify(question)
+        routed = intent if confidence >= MIN_CONFIDENCE else None
+        if routed == expected:
+            correct += 1
+        else:
+            wrong.append((question, expected, routed, confidence))
+
+    routed_labels = [expected for _, expected in QUESTIONS if expected]
+    print(f"routing accuracy: {correct}/{len(QUESTIONS)} ({correct / len(QUESTIONS):.0%}), "
+          f"{len(routed_labels)} template questions, {len(QUESTIONS) - len(routed_labels)} agent questions")
+    for question, expected, routed, confidence in wrong:
+        print(f"  miss: {question!r} expected={expected} routed={routed} confidence={confidence:.2f}")
+
+    # classification latency
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for question, _ in QUESTIONS:
+            classify(question)
+    classify_us = (time.perf_counter() - start) / (args.repeat * len(QUESTIONS)) * 1e6
+    print(f"classification: {classify_us:.1f} us per question")
+
+    # end to end latency of routed answers - first call goes to warehouse, later ones hit query cache
+    warehouse = SQLiteWarehouse(warehouse_tables(20_000, 20_000), latency=args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        connect_app(warehouse, directory)
+        cold, warm = [], []
+        for question, expected in QUESTIONS:
+            if not expected:
+                continue
+            start = time.perf_counter()
+            answer = route_question(question)
+            cold.append(time.perf_counter() - start)
+            assert answer and answer['route'] == expected, question
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                route_question(question)
+                warm.append(time.perf_counter() - start)
+
+    print(f"{'routed answer':>13} | {'p50 (ms)':>8} | {'p95 (ms)':>8}")
+    for name, values in [('cold', cold), ('warm', warm)]:
+        print(f"{name:>13} | {statistics.median(values) * 1000:8.1f} | {percentile(values, 0.95) * 1000:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
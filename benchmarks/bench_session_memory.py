@@ -0,0 +1,99 @@
+"""Per session memory and rerun CPU of dashboard data - cache_data copies against shared data store.
+
+Before, every session rerun got its own unpickled copy of both cube query results from
+`execute_sql_query` (st.cache_data). Now `fetch_shared_table` hands every session the same compact
+Arrow table of process-wide data store. Every mode runs in its own process, so RSS of one doesn't
+carry over to the other; RSS is read from /proc/self/status.
+
+Usage: python -m benchmarks.bench_session_memory [--scale nuts3] [--sessions 100] [--reruns 200]
+"""
+import argparse
+import gc
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pyarrow as pa
+
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_app
+from benchmarks.synthetic_data import SCALES, scaled_tables
+from src.services import databricks_connection
+from src.services.queries.query_builder import build_assesement_cube_query, build_expenditure_cube_query
+
+MODES = {
+    'copies': databricks_connection.execute_sql_query,
+    'shared': databricks_connection.fetch_shared_table,
+}
+
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+
+def data_bytes(table):
+    # arrow table of data store or pandas frame of cache_data
+    return table.nbytes if isinstance(table, pa.Table) else int(table.memory_usage(deep=True).sum())
+
+
+def session_data(execute):
+    # what one session rerun holds of dashboard data
+    return [execute(*build_expenditure_cube_query()), execute(*build_assesement_cube_query())]
+
+
+def run_mode(mode, scale, n_sessions, reruns):
+    execute = MODES[mode]
+    snapshot_dir = tempfile.mkdtemp(prefix='bench_sessions_')
+    try:
+        connect_app(SQLiteWarehouse(scaled_tables(scale)), snapshot_dir)
+        # first call fills snapshot and in-memory caches, so only per session cost is measured
+        session_data(execute)
+        gc.collect()
+        baseline = rss_mb()
+        sessions = [session_data(execute) for _ in range(n_sessions)]
+        gc.collect()
+        per_session_mb = (rss_mb() - baseline) / n_sessions
+
+        start = time.process_time()
+        for _ in range(reruns):
+            session_data(execute)
+        rerun_cpu_ms = (time.process_time() - start) / reruns * 1000
+
+        nbytes = sum(data_bytes(table) for table in sessions[0])
+        return {'mode': mode, 'per_session_mb': per_session_mb, 'rerun_cpu_ms': rerun_cpu_ms,
+                'data_mb': nbytes / 2**20}
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='nuts3', choices=list(SCALES))
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--reruns', type=int, default=200)
+    parser.add_argument('--mode', choices=list(MODES), help='run one mode in this process and print json')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.scale, args.sessions, args.reruns)))
+        return
+
+    print(f"scale={args.scale} sessions={args.sessions}")
+    print(f"{'mode':>6} | {'table size (MB)':>15} | {'RSS per session (MB)':>20} | {'rerun CPU (ms)':>14}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_session_memory', '--mode', mode, '--scale', args.scale,
+             '--sessions', str(args.sessions), '--reruns', str(args.reruns)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>6} | {result['data_mb']:15.2f} | {result['per_session_mb']:20.3f} | {result['rerun_cpu_ms']:14.3f}")
+
+
+if __name__ == '__main__':
+    main()
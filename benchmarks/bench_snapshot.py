@@ -0,0 +1,74 @@
+"""Startup latency with and without local snapshots against a slow local warehouse.
+
+Usage: python -m benchmarks.bench_snapshot [--latency 2.0] [--rows 100000]
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.local_warehouse import SQLiteWarehouse
+from benchmarks.synthetic_data import warehouse_tables
+from src.services.databricks_connection import arrow_to_pandas, fetch_arrow_table
+from src.services.queries.query_builder import build_assesement_cube_query, build_expenditure_cube_query
+from src.services.snapshot_cache import SnapshotCache
+
+QUERIES = [build_expenditure_cube_query(), build_assesement_cube_query()]
+
+
+def snapshot_cache(warehouse, directory):
+    def run_query(query, parameters):
+        with warehouse.connect().cursor() as cursor:
+            cursor.execute(query, parameters)
+            return fetch_arrow_table(cursor)
+
+    def table_version(table_name):
+        with warehouse.connect().cursor() as cursor:
+            cursor.execute(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+            return cursor.fetchall_arrow().column('version')[0].as_py()
+
+    return SnapshotCache(directory, run_query, table_version, check_interval=0)
+
+
+def load_all(cache):
+    start = time.perf_counter()
+    for query, parameters in QUERIES:
+        arrow_to_pandas(cache.get(query, parameters))
+    return time.perf_counter() - start
+
+
+def wait_for_revalidation(cache):
+    while cache.stats()['revalidating']:
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=2.0, help='simulated warehouse round trip in seconds')
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    warehouse = SQLiteWarehouse(warehouse_tables(args.rows, args.rows), latency=args.latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cold = load_all(snapshot_cache(warehouse, directory))
+        print(f"cold start (warehouse queries)        : {cold:7.3f} s")
+
+        # new process - snapshots are served from disk, version check happens in background
+        cache = snapshot_cache(warehouse, directory)
+        warm = load_all(cache)
+        wait_for_revalidation(cache)
+        print(f"warm start (disk snapshots)           : {warm:7.3f} s  refreshes={cache.stats()['refreshes']}")
+
+        # source table and its gold table rewritten - next start still serves from disk and refreshes in background
+        changed_tables = warehouse_tables(args.rows, 1, seed=1)
+        for name in ['eurostat.healthcare_expenditure', 'eurostat.gold_expenditure']:
+            warehouse.load_table(name, changed_tables[name])
+        cache = snapshot_cache(warehouse, directory)
+        changed = load_all(cache)
+        wait_for_revalidation(cache)
+        print(f"start after table change (stale+swr)  : {changed:7.3f} s  refreshes={cache.stats()['refreshes']}")
+        print(f"stats: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Micro-benchmark of vectorized dashboard transforms vs former row-wise callbacks.
+
+Row-wise callbacks below are also the reference of tests/test_transforms.py. Sort id stays row-wise
+in transforms too - at ~30 histogram rows of the dashboard it is faster than any vectorized version.
+
+Usage: python -m benchmarks.bench_transforms [--sizes 1000 100000 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import FINANCING_TYPES, assesement_table
+from src.services import transforms
+
+
+# former row-wise implementations from dashboard page and data visuals
+
+def create_line_breaks_rowwise(text):
+    words = text.split(' ')
+    for i, word in enumerate(words):
+        if i != 0 and len(word) > 2:
+            words[i] = '<br>' + word
+    return ' '.join(words)
+
+
+def add_sort_id_rowwise(assesement):
+    return {'Very bad': 1, 'Bad': 2, 'Fair': 3, 'Good': 4, 'Very good': 5}.get(assesement)
+
+
+def only_bad_health_rowwise(row):
+    if row['Health_Assesement'] in ['Bad', 'Very bad']:
+        return row['Number_of_People']
+
+
+def assign_quadrant_rowwise(df, x_avg, y_avg):
+    def assign(row):
+        if row["perc_of_gdp"] > x_avg and row["perc_of_bad_health"] > y_avg:
+            return "Top Right"
+        elif row["perc_of_gdp"] < x_avg and row["perc_of_bad_health"] > y_avg:
+            return "Top Left"
+        elif row["perc_of_gdp"] < x_avg and row["perc_of_bad_health"] < y_avg:
+            return "Bottom Left"
+        else:
+            return "Bottom Right"
+    return df.apply(assign, axis=1)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[30, 1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>9} | {'transform':>16} | {'row-wise (ms)':>13} | {'vectorized (ms)':>15}")
+    for n_rows in args.sizes:
+        df = assesement_table(n_rows).to_pandas()
+        scatter = pd.DataFrame({'perc_of_gdp': rng.uniform(0, 10, n_rows),
+                                'perc_of_bad_health': rng.uniform(0, 20, n_rows)})
+        financing = pd.Series(np.resize(FINANCING_TYPES, n_rows))
+
+        x_avg, y_avg = scatter['perc_of_gdp'].mean(), scatter['perc_of_bad_health'].mean()
+        cases = {
+            'line breaks': (lambda: financing.map(create_line_breaks_rowwise),
+                            lambda: transforms.create_line_breaks(financing)),
+            'sort id': (lambda: df['Health_Assesement'].map(add_sort_id_rowwise),
+                        lambda: transforms.add_sort_id(df['Health_Assesement'])),
+            'only bad health': (lambda: df.apply(only_bad_health_rowwise, axis=1),
+                                lambda: transforms.only_bad_health(df)),
+            'quadrant': (lambda: assign_quadrant_rowwise(scatter, x_avg, y_avg),
+                         lambda: transforms.assign_quadrant(scatter['perc_of_gdp'], scatter['perc_of_bad_health'],
+                                                            x_avg, y_avg)),
+        }
+        for name, (rowwise, vectorized) in cases.items():
+            print(f"{n_rows:>9} | {name:>16} | {timed(rowwise):13.2f} | {timed(vectorized):15.2f}")
+
+
+if __name__ == '__main__':
+    main()
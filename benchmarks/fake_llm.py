@@ -0,0 +1,104 @@
+"""Scripted chat model standing in for Gemini in benchmarks.
+
+`ScriptedChatModel` plays the ReAct SQL agent: lists tables, reads schema, runs one aggregate
+query against the local warehouse and answers from its result. The step is taken from the
+number of observations already in the prompt, so one model serves any number of questions.
+Calls sleep for `latency` seconds; only streamed calls (`_stream`) give their text word by word,
+`_generate` returns it whole without token callbacks like a non-streaming call of a real model.
+
+`ScriptedSQLFixingModel` answers a fixed question set with a first query (some with mistakes) and
+its corrected version. Like Gemini following the toolkit prompt, it runs every query through
+`sql_db_query_checker` when the agent has one (and answers checker prompts with corrected query),
+otherwise it runs the query and rewrites it after an error observation.
+"""
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+SCRIPTED_QUERY = (
+    "SELECT Country_Code, SUM(Euro_per_inhabitant) AS spending FROM eurostat.healthcare_expenditure "
+    "WHERE Year = '{year}' GROUP BY Country_Code ORDER BY spending DESC LIMIT 5"
+)
+
+
+class ScriptedChatModel(BaseChatModel):
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def respond(self, prompt):
+        scratchpad = prompt.split('Question:')[-1]
+        step = scratchpad.count('Observation:')
+        years = re.findall(r'\b20\d{2}\b', scratchpad)
+        year = years[0] if years else '2022'
+
+        if step == 0:
+            return "Thought: I should look at the tables in the database.\nAction: sql_db_list_tables\nAction Input: "
+        if step == 1:
+            return ("Thought: Expenditure table looks relevant, I should check its schema.\n"
+                    "Action: sql_db_schema\nAction Input: healthcare_expenditure")
+        if step == 2:
+            return (f"Thought: I can query spending per inhabitant now.\n"
+                    f"Action: sql_db_query\nAction Input: {SCRIPTED_QUERY.format(year=year)}")
+        observation = scratchpad.split('Observation:')[-1].strip().split('\n')[0]
+        return (f"Thought: I now know the final answer\n"
+                f"Final Answer: Countries with the highest spending per inhabitant in {year} are {observation}")
+
+    def scripted_text(self, messages):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.respond(str(messages[-1].content))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        # whole response at once and no token callbacks, like a non-streaming call of a real model
+        text = self.scripted_text(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self.scripted_text(messages)
+        for token in re.findall(r'\s*\S+|\s+$', text):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class ScriptedSQLFixingModel(ScriptedChatModel):
+    # scripts: {question: (first query, corrected query)}
+    scripts: Dict[str, Tuple[str, str]] = {}
+
+    def respond(self, prompt):
+        if 'Double check the' in prompt:
+            # checker tool prompt - query to check is above the instructions
+            query = prompt.split('Double check the')[0].strip()
+            return next((fixed for first, fixed in self.scripts.values() if first == query), query)
+
+        scratchpad = prompt.split('Question:')[-1]
+        question = scratchpad.split('\n')[0].strip()
+        first, fixed = self.scripts[question]
+        actions = re.findall(r'Action: (\w+)', scratchpad)
+        observation = scratchpad.split('Observation:')[-1].split('\nThought:')[0].strip() if actions else ''
+
+        if not actions:
+            return "Thought: I should look at the tables in the database.\nAction: sql_db_list_tables\nAction Input: "
+        if len(actions) == 1:
+            return ("Thought: I should check schemas of the relevant tables.\n"
+                    "Action: sql_db_schema\nAction Input: healthcare_expenditure, own_health_assesement")
+        if actions[-1] == 'sql_db_schema':
+            tool = 'sql_db_query_checker' if 'sql_db_query_checker' in prompt else 'sql_db_query'
+            return f"Thought: I can write the query now.\nAction: {tool}\nAction Input: {first}"
+        if actions[-1] == 'sql_db_query_checker':
+            return f"Thought: Query is checked, I can run it.\nAction: sql_db_query\nAction Input: {observation}"
+        if observation.startswith('Error'):
+            return f"Thought: I have to fix the query.\nAction: sql_db_query\nAction Input: {fixed}"
+        return f"Thought: I now know the final answer\nFinal Answer: {observation.splitlines()[0]}"
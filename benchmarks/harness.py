@@ -0,0 +1,188 @@
+"""Offline benchmark suite of the whole app against local warehouse and scripted chat model.
+
+Drives `execute_sql_query` (cold, snapshot and cached), dashboard cube load and filter path,
+`data_visuals` figure builders and `ask_agent` (template routed and full agent loop) headlessly
+and reports p50/p95 latency, throughput and peak traced memory of every stage.
+
+Usage: python -m benchmarks.harness [--scales eu27 nuts2] [--iterations 20] [--output results.json]
+"""
+import argparse
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.local_warehouse import SQLiteWarehouse, connect_agent, connect_app
+from benchmarks.synthetic_data import SCALES, region_codes, scale_years, scaled_tables
+from src.components import data_visuals
+from src.components.dashboard_sections import bar_frame, donut_frame, histogram_frame, scatter_frame
+from src.services import databricks_connection, langchain_agent
+from src.services.conversation_memory import ConversationMemory
+from src.services.olap_cube import Cube
+from src.services.queries.query_builder import (
+    METRIC_COLUMNS, build_assesement_cube_query, build_bar_query, build_expenditure_cube_query,
+    build_histogram_query
+)
+
+# first question needs full agent loop, second one is answered by fast-path router
+AGENT_QUESTION = "Name five regions with the biggest healthcare budgets per person in {year}"
+ROUTED_QUESTION = "Which country spent the most per capita on healthcare in {year}?"
+
+
+def measure(results, stage, iterations, fn, setup=None):
+    # latency percentiles and throughput from timed runs, peak memory from one extra traced run
+    timings = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ordered = sorted(timings)
+    results.append({
+        'stage': stage,
+        'iterations': iterations,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        'throughput': iterations / sum(timings),
+        'peak_mb': peak / 2**20,
+    })
+
+
+def build_cubes(df_expenditure, df_assesement):
+    # same cubes as load_dashboard_cubes in dashboard page
+    expenditure_cube = Cube.from_frame(
+        df_expenditure, ['Year', 'Country_Code', 'Financing_type'], list(METRIC_COLUMNS), count_column='Row_count'
+    )
+    assesement_cube = Cube.from_frame(
+        df_assesement, ['Year', 'Country_Code', 'Sex', 'Age_Group', 'Health_Assesement'], ['Number_of_People'],
+        count_column='Row_count'
+    )
+    return expenditure_cube, assesement_cube
+
+
+def random_filters(rng, expenditure_cube, assesement_cube):
+    countries = list(expenditure_cube.labels['Country_Code'])
+    return {
+        'year': rng.choice(list(expenditure_cube.labels['Year'])),
+        'countries': countries if rng.random() < 0.5 else rng.sample(countries, max(1, len(countries) // 3)),
+        'types': list(expenditure_cube.labels['Financing_type']),
+        'sexes': rng.choice([['M', 'F'], ['M'], ['F']]),
+        'age_groups': list(assesement_cube.labels['Age_Group']),
+        'metric': rng.choice(list(METRIC_COLUMNS)[:4]),
+    }
+
+
+def dashboard_frames(expenditure_cube, assesement_cube, f):
+    # chart inputs exactly as dashboard page derives them from cube slices
+    expenditure_slice = expenditure_cube.slice(Year=f['year'], Country_Code=f['countries'],
+                                               Financing_type=f['types'])
+    assesement_slice = assesement_cube.slice(Year=f['year'], Country_Code=f['countries'], Sex=f['sexes'],
+                                             Age_Group=f['age_groups'])
+    metric = f['metric']
+    return {'bar': bar_frame(expenditure_slice, metric), 'donut': donut_frame(expenditure_slice, metric),
+            'histogram': histogram_frame(assesement_slice),
+            'scatter': scatter_frame(expenditure_slice, assesement_slice), 'metric': metric}
+
+
+
+def draw_figures(frames):
+    # without script run context streamlit still serializes figures, it only doesn't send them anywhere
+    data_visuals.draw_bar_chart(frames['bar'], frames['metric'])
+    data_visuals.draw_pie_chart(frames['donut'], frames['metric'])
+    data_visuals.draw_histogram(frames['histogram'])
+    data_visuals.draw_scatter_plot(frames['scatter'])
+
+
+def run_scale(scale, iterations, agent_iterations, warehouse_latency, llm_latency, seed=0):
+    rng = random.Random(seed)
+    results = []
+    warehouse = SQLiteWarehouse(scaled_tables(scale, seed), latency=warehouse_latency)
+    snapshot_dir = tempfile.mkdtemp(prefix='bench_snapshots_')
+
+    try:
+        connect_app(warehouse, snapshot_dir)
+        queries = [build_expenditure_cube_query(), build_assesement_cube_query()]
+        n_regions, n_years = SCALES[scale]
+        year = scale_years(n_years)[-1]
+        chart_filters = {'year': year, 'countries': region_codes(n_regions)[:3], 'types': ['Out-of-pocket payments'],
+                         'sexes': ['M', 'F'], 'age_groups': ['Y65+']}
+        queries += [build_bar_query(chart_filters, 'Total Spending'), build_histogram_query(chart_filters)]
+
+        def clear_all():
+            databricks_connection.execute_sql_query.clear()
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            databricks_connection.get_snapshot_cache().directory.mkdir(parents=True, exist_ok=True)
+
+        run_queries = lambda: [databricks_connection.execute_sql_query(*query) for query in queries]
+        measure(results, 'query cold', iterations, run_queries, setup=clear_all)
+        measure(results, 'query snapshot', iterations, run_queries, setup=databricks_connection.execute_sql_query.clear)
+        measure(results, 'query cached', iterations, run_queries)
+
+        df_expenditure, df_assesement = run_queries()[:2]
+        measure(results, 'dashboard load', iterations, lambda: build_cubes(df_expenditure, df_assesement))
+
+        cubes = build_cubes(df_expenditure, df_assesement)
+        filter_states = [random_filters(rng, *cubes) for _ in range(iterations)]
+        states = iter(filter_states * 2)
+        measure(results, 'dashboard filter', iterations, lambda: dashboard_frames(*cubes, next(states)))
+
+        frames = [dashboard_frames(*cubes, f) for f in filter_states]
+        figure_inputs = iter(frames * 2)
+        measure(results, 'figures', iterations, lambda: draw_figures(next(figure_inputs)))
+
+        llm = ScriptedChatModel(latency=llm_latency)
+        _, answer_cache = connect_agent(warehouse, llm)
+        ask = lambda question: langchain_agent.ask_agent(question.format(year=year), ConversationMemory())
+        measure(results, 'ask_agent routed', agent_iterations, lambda: ask(ROUTED_QUESTION))
+        calls_before = llm.calls
+        measure(results, 'ask_agent agent', agent_iterations, lambda: ask(AGENT_QUESTION),
+                setup=answer_cache.clear)
+        results[-1]['llm_calls_per_question'] = (llm.calls - calls_before) / (agent_iterations + 1)
+        measure(results, 'ask_agent cached', agent_iterations, lambda: ask(AGENT_QUESTION))
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    for result in results:
+        result['scale'] = scale
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scales', nargs='+', default=['eu27', 'nuts2'], choices=list(SCALES))
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--agent-iterations', type=int, default=5)
+    parser.add_argument('--warehouse-latency', type=float, default=0.0, help='simulated round trip in seconds')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='simulated LLM call time in seconds')
+    parser.add_argument('--output', help='write results as json for comparing runs')
+    args = parser.parse_args()
+
+    all_results = []
+    print(f"{'scale':>6} | {'stage':>16} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'ops/s':>8} | {'peak (MB)':>9}")
+    for scale in args.scales:
+        results = run_scale(scale, args.iterations, args.agent_iterations, args.warehouse_latency, args.llm_latency)
+        for r in results:
+            print(f"{scale:>6} | {r['stage']:>16} | {r['p50_ms']:9.2f} | {r['p95_ms']:9.2f} | "
+                  f"{r['throughput']:8.1f} | {r['peak_mb']:9.2f}")
+        all_results += results
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(all_results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
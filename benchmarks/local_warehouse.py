@@ -0,0 +1,205 @@
+"""Local stand-in for the Databricks SQL connector used by benchmarks.
+
+Connections and cursors mimic the parts of `databricks.sql` the app relies on
+(`execute`, `fetchall`, `fetchall_arrow`, `fetchmany_arrow`, context managers).
+Results come from an executor callable mapping `(query, parameters)` to an
+arrow table, so no warehouse is needed. `SQLiteWarehouse` is such an executor
+serving `workspace.eurostat` tables from in-memory sqlite, including Delta
+style table versions for `DESCRIBE HISTORY`.
+"""
+import re
+import sqlite3
+import threading
+import time
+
+import pyarrow as pa
+from databricks.sql.types import Row
+
+
+class LocalCursor:
+
+    def __init__(self, executor, latency=0.0):
+        self.executor = executor
+        self.latency = latency
+        self.result = None
+        self.offset = 0
+        self.description = None
+
+    def execute(self, operation, parameters=None):
+        if self.latency:
+            time.sleep(self.latency)
+        self.result = self.executor(operation, parameters)
+        self.offset = 0
+        self.description = [(name, str(field.type), None, None, None, None, None)
+                            for name, field in zip(self.result.column_names, self.result.schema)]
+        return self
+
+    def _take(self, size=None):
+        end = self.result.num_rows if size is None else min(self.offset + size, self.result.num_rows)
+        chunk = self.result.slice(self.offset, end - self.offset)
+        self.offset = end
+        return chunk
+
+    def fetchall_arrow(self):
+        return self._take()
+
+    def fetchmany_arrow(self, size):
+        return self._take(size)
+
+    def fetchall(self):
+        return self._rows(self._take())
+
+    def fetchmany(self, size):
+        return self._rows(self._take(size))
+
+    def _rows(self, table):
+        names = table.column_names
+        return [Row(**dict(zip(names, values))) for values in zip(*[c.to_pylist() for c in table.columns])]
+
+    def close(self):
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalConnection:
+
+    def __init__(self, executor, latency=0.0):
+        self.executor = executor
+        self.latency = latency
+        self.open = True
+
+    def cursor(self):
+        return LocalCursor(self.executor, self.latency)
+
+    def close(self):
+        self.open = False
+
+
+def sqlite_type(arrow_type):
+    # declared column types, so reflected tables look like typed warehouse tables
+    if pa.types.is_integer(arrow_type):
+        return 'INTEGER'
+    if pa.types.is_floating(arrow_type):
+        return 'REAL'
+    return 'TEXT'
+
+
+def static_result(table):
+    # executor returning the same arrow table for every query
+    return lambda operation, parameters=None: table
+
+
+class SQLiteWarehouse:
+
+    def __init__(self, tables, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.schemas = {}
+        self.versions = {}
+        self.query_count = 0
+        for name, table in tables.items():
+            self.load_table(name, table)
+
+    def load_table(self, name, table):
+        # every load creates new table version like a delta overwrite
+        schema, table_name = name.split('.')
+        columns = ', '.join(f'"{field.name}" {sqlite_type(field.type)}' for field in table.schema)
+        markers = ', '.join('?' for _ in table.column_names)
+        with self.lock:
+            if schema not in [row[1] for row in self.db.execute('PRAGMA database_list')]:
+                self.db.execute(f"ATTACH ':memory:' AS {schema}")
+            self.db.execute(f'DROP TABLE IF EXISTS {name}')
+            self.db.execute(f'CREATE TABLE {name} ({columns})')
+            self.db.executemany(f'INSERT INTO {name} VALUES ({markers})',
+                                zip(*[column.to_pylist() for column in table.columns]))
+            self.db.commit()
+        self.schemas[name] = table.column_names
+        self.versions[name] = self.versions.get(name, -1) + 1
+
+    def connect(self):
+        return LocalConnection(self.execute, self.latency)
+
+    def translate(self, query):
+        # databricks dialect bits used by app queries rewritten for sqlite
+        query = re.sub(r'\bworkspace\.(\w+)\.', r'\1.', query)
+        except_match = re.search(r'\*\s+EXCEPT\s*\(([^)]*)\)\s+FROM\s+(\w+\.\w+)', query, re.IGNORECASE)
+        if except_match:
+            excluded = {column.strip() for column in except_match.group(1).split(',')}
+            kept = ', '.join(f'"{c}"' for c in self.schemas[except_match.group(2)] if c not in excluded)
+            query = query.replace(except_match.group(0), f'{kept} FROM {except_match.group(2)}')
+        return query
+
+    def execute(self, operation, parameters=None):
+        self.query_count += 1
+        history = re.match(r'\s*DESCRIBE\s+HISTORY\s+([\w.]+)', operation, re.IGNORECASE)
+        if history:
+            name = re.sub(r'^workspace\.', '', history.group(1))
+            return pa.table({'version': [self.versions[name]]})
+
+        with self.lock:
+            cursor = self.db.execute(self.translate(operation), parameters or {})
+            names = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+
+        columns = list(zip(*rows)) if rows else [[] for _ in names]
+        return pa.table({name: pa.array(list(values)) for name, values in zip(names, columns)})
+
+
+def connect_app(warehouse, snapshot_dir, pool_size=8):
+    # point app's databricks_connection module at local warehouse instead of secrets based client
+    from src.services import databricks_connection
+    from src.services.connection_pool import ConnectionPool
+    from src.services.snapshot_cache import SnapshotCache
+
+    pool = ConnectionPool(warehouse.connect, max_size=pool_size)
+    snapshots = SnapshotCache(
+        snapshot_dir,
+        run_query=lambda query, parameters: databricks_connection.run_arrow_query(pool, query, parameters),
+        table_version=lambda table_name: databricks_connection.get_table_version(pool, table_name),
+    )
+    databricks_connection.get_databricks_client = lambda: pool
+    databricks_connection.get_snapshot_cache = lambda: snapshots
+    databricks_connection.execute_sql_query.clear()
+    databricks_connection.get_data_store().clear()
+    return pool, snapshots
+
+
+def agent_patches(warehouse, llm):
+    # -> (db, answer cache, {(module, attribute): value}) pointing app's data agent at local warehouse and
+    # given chat model, answers are cached in memory only
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+    from src.services import databricks_connection, langchain_agent
+    from src.services.cached_sql_database import CachingSQLDatabase
+
+    engine = create_engine('sqlite://', creator=lambda: warehouse.db, poolclass=StaticPool)
+    db = CachingSQLDatabase(engine, schema='eurostat', lazy_table_reflection=True,
+                            version_provider=langchain_agent.get_data_version,
+                            max_result_rows=langchain_agent.AGENT_MAX_ROWS,
+                            max_result_bytes=langchain_agent.AGENT_MAX_BYTES,
+                            preview_rows=langchain_agent.AGENT_PREVIEW_ROWS)
+    answer_cache = langchain_agent.AnswerCache()
+    return db, answer_cache, {
+        (langchain_agent, 'get_snapshot_cache'): databricks_connection.get_snapshot_cache,
+        (langchain_agent, 'get_gemini_llm'): lambda: llm,
+        (langchain_agent, 'get_database_connection'): lambda: db,
+        (langchain_agent, 'get_answer_cache'): lambda: answer_cache,
+    }
+
+
+def connect_agent(warehouse, llm):
+    # patches stay for the rest of the process - meant for benchmarks, tests apply agent_patches
+    # with monkeypatch (tests/conftest.py)
+    from src.services import langchain_agent
+
+    db, answer_cache, patches = agent_patches(warehouse, llm)
+    for (module, attribute), value in patches.items():
+        setattr(module, attribute, value)
+    langchain_agent.create_ai_agent.clear()
+    return db, answer_cache
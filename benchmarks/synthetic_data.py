@@ -0,0 +1,205 @@
+"""Synthetic Eurostat-shaped tables for local benchmarks."""
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+EU_COUNTRIES = [
+    "AT", "BE", "BG", "HR", "CY", "CZ", "DK", "EE", "FI", "FR",
+    "DE", "EL", "HU", "IE", "IT", "LV", "LT", "LU", "MT", "NL",
+    "PL", "PT", "RO", "SK", "SI", "ES", "SE"
+]
+FINANCING_TYPES = [
+    'Government and compulsory schemes', 'Voluntary schemes', 'Out-of-pocket payments', 'Rest of world'
+]
+AGE_GROUPS = ['Y16-24', 'Y25-34', 'Y35-44', 'Y45-54', 'Y55-64', 'Y65+']
+HEALTH_LEVELS = ['Very bad', 'Bad', 'Fair', 'Good', 'Very good']
+YEARS = ['2016', '2019', '2022']
+SEXES = ['M', 'F']
+
+# scale name -> (number of regions, number of years); regions below country level get NUTS-like codes
+SCALES = {
+    'eu27': (27, 3),
+    'nuts1': (92, 5),
+    'nuts2': (244, 10),
+    'nuts3': (1165, 20),
+}
+
+
+def expenditure_table(n_rows, seed=0):
+    # rows shaped like expenditure rows with dashboard metric labels as column names
+    rng = np.random.default_rng(seed)
+    return pa.table({
+        'Country_Code': pa.array(np.array(EU_COUNTRIES)[rng.integers(0, len(EU_COUNTRIES), n_rows)]),
+        'Year': pa.array(np.array(YEARS)[rng.integers(0, len(YEARS), n_rows)]),
+        'Financing_type': pa.array(np.array(FINANCING_TYPES)[rng.integers(0, len(FINANCING_TYPES), n_rows)]),
+        'Total Spending': rng.uniform(10, 300000, n_rows),
+        'Total Spending (PPS)': rng.uniform(10, 300000, n_rows),
+        'Spending per inhabitant': rng.uniform(1, 6000, n_rows),
+        'Spending per inhabitant (PPS)': rng.uniform(1, 6000, n_rows),
+        'Percentage of GDP': rng.uniform(0, 10, n_rows),
+    })
+
+
+def assesement_table(n_rows, seed=0):
+    # rows shaped like own_health_assesement table rows
+    rng = np.random.default_rng(seed)
+    return pa.table({
+        'Age_Group': pa.array(np.array(AGE_GROUPS)[rng.integers(0, len(AGE_GROUPS), n_rows)]),
+        'Country_Code': pa.array(np.array(EU_COUNTRIES)[rng.integers(0, len(EU_COUNTRIES), n_rows)]),
+        'Sex': pa.array(np.array(['M', 'F'])[rng.integers(0, 2, n_rows)]),
+        'Health_Assesement': pa.array(np.array(HEALTH_LEVELS)[rng.integers(0, len(HEALTH_LEVELS), n_rows)]),
+        'Year': pa.array(np.array(YEARS)[rng.integers(0, len(YEARS), n_rows)]),
+        'Number_of_People': rng.integers(1000, 2_000_000, n_rows),
+    })
+
+
+def warehouse_tables(expenditure_rows, assesement_rows, seed=0):
+    # source tables of workspace.eurostat schema with their original column names
+    from src.services.queries.query_builder import METRIC_COLUMNS
+
+    expenditure = expenditure_table(expenditure_rows, seed)
+    expenditure = expenditure.rename_columns([METRIC_COLUMNS.get(name, name) for name in expenditure.column_names])
+    assesement = assesement_table(assesement_rows, seed)
+    assesement = assesement.append_column('Percentage', pa.array(np.zeros(assesement_rows)))
+    return with_gold_tables({
+        'eurostat.healthcare_expenditure': expenditure,
+        'eurostat.own_health_assesement': assesement,
+    })
+
+
+def region_codes(n_regions):
+    # EU countries first, then country code followed by region number like NUTS codes (PL021, DE113, ...)
+    if n_regions <= len(EU_COUNTRIES):
+        return EU_COUNTRIES[:n_regions]
+    return [f"{EU_COUNTRIES[i % len(EU_COUNTRIES)]}{i // len(EU_COUNTRIES):03d}" for i in range(n_regions)]
+
+
+def scale_years(n_years):
+    if n_years <= len(YEARS):
+        return YEARS[-n_years:]
+    return [str(year) for year in range(2023 - n_years, 2023)]
+
+
+def full_grain(**dimensions):
+    # every combination of dimension members once, like eurostat datasets after unpivot
+    grids = np.meshgrid(*[np.array(members) for members in dimensions.values()], indexing='ij')
+    return {name: grid.ravel() for name, grid in zip(dimensions, grids)}
+
+
+def scaled_tables(scale, seed=0):
+    # workspace.eurostat tables at given scale with full dimension grain and original column names
+    from src.services.queries.query_builder import METRIC_COLUMNS
+
+    n_regions, n_years = SCALES[scale]
+    regions, years = region_codes(n_regions), scale_years(n_years)
+    rng = np.random.default_rng(seed)
+
+    expenditure = full_grain(Country_Code=regions, Year=years, Financing_type=FINANCING_TYPES)
+    n_rows = len(expenditure['Country_Code'])
+    expenditure.update({
+        METRIC_COLUMNS['Total Spending']: rng.uniform(10, 300000, n_rows),
+        METRIC_COLUMNS['Total Spending (PPS)']: rng.uniform(10, 300000, n_rows),
+        METRIC_COLUMNS['Spending per inhabitant']: rng.uniform(1, 6000, n_rows),
+        METRIC_COLUMNS['Spending per inhabitant (PPS)']: rng.uniform(1, 6000, n_rows),
+        METRIC_COLUMNS['Percentage of GDP']: rng.uniform(0, 10, n_rows),
+    })
+
+    assesement = full_grain(Age_Group=AGE_GROUPS, Country_Code=regions, Sex=SEXES,
+                            Health_Assesement=HEALTH_LEVELS, Year=years)
+    n_rows = len(assesement['Country_Code'])
+    assesement.update({
+        'Number_of_People': rng.integers(1000, 2_000_000, n_rows),
+        'Percentage': np.zeros(n_rows),
+    })
+
+    dim_countries = {
+        'Country_ISO2_code': regions,
+        'Country_Name': [f"Region {code}" for code in regions],
+        'Estimated_Population': rng.integers(100_000, 80_000_000, len(regions)),
+    }
+
+    return with_gold_tables({
+        'eurostat.healthcare_expenditure': pa.table({k: pa.array(v) for k, v in expenditure.items()}),
+        'eurostat.own_health_assesement': pa.table({k: pa.array(v) for k, v in assesement.items()}),
+        'eurostat.dim_countries': pa.table({k: pa.array(v) for k, v in dim_countries.items()}),
+    })
+
+
+def gold_tables(expenditure, assesement):
+    # same aggregates as databricks_etl/gold_tables.py builds in the ETL notebook
+    from src.services.queries.query_builder import BAD_HEALTH_LEVELS, METRIC_COLUMNS
+
+    def grouped(table, keys, sums):
+        result = table.group_by(keys).aggregate([(column, 'sum') for column in sums] + [([], 'count_all')])
+        return result.rename_columns([name.removesuffix('_sum').replace('count_all', 'Row_count')
+                                      for name in result.column_names])
+
+    gold_expenditure = grouped(expenditure, ['Year', 'Country_Code', 'Financing_type'], list(METRIC_COLUMNS.values()))
+    gold_assesement = grouped(assesement, ['Year', 'Country_Code', 'Sex', 'Age_Group', 'Health_Assesement'],
+                              ['Number_of_People'])
+
+    is_bad = pc.is_in(assesement['Health_Assesement'], pa.array(BAD_HEALTH_LEVELS))
+    people = assesement['Number_of_People']
+    bad_health = assesement.append_column('num_of_bad_health', pc.if_else(is_bad, people, 0)) \
+        .append_column('num_of_total_health', people)
+    gold_bad_health = grouped(bad_health, ['Year', 'Country_Code', 'Sex', 'Age_Group'],
+                              ['num_of_bad_health', 'num_of_total_health']).drop_columns(['Row_count'])
+    gold_bad_health = gold_bad_health.append_column('perc_of_bad_health', pc.multiply(
+        pc.divide(pc.cast(gold_bad_health['num_of_bad_health'], pa.float64()),
+                          gold_bad_health['num_of_total_health']), 100.0))
+
+    return {
+        'eurostat.gold_expenditure': gold_expenditure,
+        'eurostat.gold_health_assesement': gold_assesement,
+        'eurostat.gold_bad_health': gold_bad_health,
+    }
+
+
+def with_gold_tables(tables):
+    return {**tables, **gold_tables(tables['eurostat.healthcare_expenditure'],
+                                    tables['eurostat.own_health_assesement'])}
+
+
+# raw eurostat api datasets at roughly real size - all geo entities including aggregates and non EU
+# countries, every dimension member and full time range, as `eurostat.get_data` returns them
+EUROSTAT_GEOS = EU_COUNTRIES + ['EU27_2020', 'EA20', 'IS', 'LI', 'NO', 'CH', 'UK', 'ME', 'MK', 'AL', 'RS', 'TR', 'BA']
+EUROSTAT_DATASETS = {
+    'demo_pjan': {
+        'dimensions': {'freq': ['A'], 'unit': ['NR'], 'sex': ['F', 'M', 'T'],
+                       'age': ['TOTAL', 'Y_LT1'] + [f'Y{age}' for age in range(1, 100)] + ['Y_OPEN', 'UNK']},
+        'periods': range(1960, 2025),
+    },
+    'hlth_sha11_hf': {
+        'dimensions': {'freq': ['A'], 'unit': ['MIO_EUR', 'EUR_HAB', 'MIO_PPS', 'PPS_HAB', 'MIO_NAC', 'NAC_HAB',
+                                               'PC_GDP', 'PC_CHE'],
+                       'icha11_hf': ['TOT_HF', 'HF1', 'HF11', 'HF12', 'HF121', 'HF122', 'HF2', 'HF21', 'HF22',
+                                     'HF23', 'HF3', 'HF31', 'HF32', 'HF4', 'HF_UNK']},
+        'periods': range(2014, 2024),
+    },
+    'hlth_silc_02': {
+        'dimensions': {'freq': ['A'], 'unit': ['PC'], 'levels': ['VGOOD', 'GOOD', 'FAIR', 'BAD', 'VBAD'],
+                       'isced11': ['TOTAL', 'ED0-2', 'ED3_4', 'ED5-8'], 'sex': ['F', 'M', 'T'],
+                       'age': ['Y16-24', 'Y25-34', 'Y35-44', 'Y45-54', 'Y55-64', 'Y_GE65', 'Y16-44', 'Y_GE16',
+                               'Y65-74', 'Y_GE75', 'Y16-64']},
+        'periods': range(2008, 2025),
+    },
+}
+
+
+def eurostat_data(code, seed=0, missing_share=0.1):
+    # header row with geo\TIME_PERIOD column followed by tuples of codes and period values, None for missing
+    spec = EUROSTAT_DATASETS[code]
+    rng = np.random.default_rng(seed)
+    dimensions = full_grain(**spec['dimensions'], geo=EUROSTAT_GEOS)
+    n_rows, n_periods = len(dimensions['geo']), len(spec['periods'])
+
+    values = np.round(rng.uniform(0, 100_000, (n_rows, n_periods)), 1).astype(object)
+    values[rng.random((n_rows, n_periods)) < missing_share] = None
+
+    header = tuple(spec['dimensions']) + ('geo\\TIME_PERIOD',) + tuple(str(period) for period in spec['periods'])
+    codes = zip(*[dimensions[name].tolist() for name in list(spec['dimensions']) + ['geo']])
+    return [header] + [code_row + tuple(value_row) for code_row, value_row in zip(codes, values.tolist())]
+
+
+def eurostat_dic(code, param):
+    return [(value, f"Description of {value}") for value in EUROSTAT_DATASETS[code]['dimensions'][param]]
@@ -0,0 +1,68 @@
+"""Eurostat API access for the ETL - live API or recorded fixtures replayed without network.
+
+Both sources return payloads in the shape of the `eurostat` package: `get_data` a list of tuples
+with header row first, `get_dic` a list of (value, description) tuples.
+
+Record fixtures once with network access:
+    python -m databricks_etl.eurostat_source --record databricks_etl/fixtures
+"""
+import argparse
+import json
+from pathlib import Path
+
+# datasets loaded by the ETL and their dictionaries used in transformations
+DATASETS = {
+    'demo_pjan': [],
+    'hlth_sha11_hf': ['icha11_hf', 'unit'],
+    'hlth_silc_02': ['levels'],
+}
+
+
+class EurostatApi:
+
+    def get_data(self, code):
+        import eurostat
+        return eurostat.get_data(code)
+
+    def get_dic(self, code, param):
+        import eurostat
+        return eurostat.get_dic(code, param)
+
+
+class RecordedEurostat:
+    # replays payloads recorded by record_fixtures, e.g. for local spark runs
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def read(self, file_name):
+        with open(self.directory / file_name) as file:
+            return [tuple(row) for row in json.load(file)]
+
+    def get_data(self, code):
+        return self.read(f'{code}.json')
+
+    def get_dic(self, code, param):
+        return self.read(f'{code}.{param}.json')
+
+
+def record_fixtures(source, directory, datasets=DATASETS):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for code, params in datasets.items():
+        payloads = {f'{code}.json': source.get_data(code)}
+        payloads.update({f'{code}.{param}.json': source.get_dic(code, param) for param in params})
+        for file_name, payload in payloads.items():
+            with open(directory / file_name, 'w') as file:
+                json.dump(payload, file)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--record', required=True, metavar='DIRECTORY', help='fixture directory to write')
+    args = parser.parse_args()
+    record_fixtures(EurostatApi(), args.record)
+
+
+if __name__ == '__main__':
+    main()
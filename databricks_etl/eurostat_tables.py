@@ -0,0 +1,133 @@
+"""Transformations of ingested Eurostat frames into Unity Catalog fact tables.
+
+Every table in `TABLES` names its source dataset, upstream tables it reads and the key columns
+identifying a row - used by incremental load to merge changed rows only.
+Table names are relative to the catalog, so the same code runs against `workspace` on Databricks
+and `spark_catalog` on local spark. Transformations get spark frames of their dataset (`data`)
+and its dictionaries (by parameter name).
+"""
+import re
+
+from pyspark.sql.functions import col, regexp_replace, when, sum as spark_sum
+
+eu_iso2_codes = [
+    "AT", "BE", "BG", "HR", "CY", "CZ", "DK", "EE", "FI", "FR",
+    "DE", "EL", "HU", "IE", "IT", "LV", "LT", "LU", "MT", "NL",
+    "PL", "PT", "RO", "SK", "SI", "ES", "SE"
+]
+
+# base codes of expenditure classification
+sha_11_codes = ['HF1','HF2','HF3','HF4']
+
+
+def population_split(spark, frames, catalog):
+
+    # Population on 1 January by age, sex
+    df = frames['data']
+
+    return df \
+        .withColumnsRenamed({'geo':'Country_Code'}) \
+        .withColumn('Age',regexp_replace('age','Y','').try_cast('int')) \
+        .filter(
+            (df.sex.isin(['M','F'])) &
+            (col('Country_Code').isin(eu_iso2_codes)) &
+            (col('Age').isNotNull())) \
+        .select('Age','Sex','Country_Code','2016','2019','2022') \
+        .unpivot(
+            ['Age','Sex','Country_Code'],
+            ['2016','2019','2022'], 'Year', 'Population') \
+        .filter(col('Population') > 0)
+
+
+def healthcare_expenditure(spark, frames, catalog):
+
+    # health care expenditure by financing scheme
+    data = frames['data']
+    map_health = frames['icha11_hf']
+    map_unit = frames['unit']
+
+    df_transformed = data \
+        .withColumnRenamed('geo','Country_Code').withColumnRenamed('icha11_hf','SHA_11') \
+        .filter(
+            (col('Country_Code').isin(eu_iso2_codes)) &
+            (col('SHA_11').isin(sha_11_codes))) \
+        .join( map_health, col('SHA_11') == map_health.value, 'left' ) \
+        .join( map_unit, col('unit') == map_unit.value, 'left' ) \
+        .select('SHA_11','Country_Code','2016','2019','2022',
+                map_health.description.alias('Financing_schema'), map_unit.description.alias('unit')) \
+        .withColumn('Financing_type',
+            when(col('SHA_11') == 'HF1', 'Government and compulsory schemes')
+            .when(col('SHA_11') == 'HF2', 'Voluntary schemes')
+            .when(col('SHA_11') == 'HF3', 'Out-of-pocket payments')
+            .otherwise('Rest of world')) \
+        .unpivot(
+            ['Country_Code','Financing_schema','unit','SHA_11','Financing_type'],
+            ['2016','2019','2022'], 'Year', 'Value') \
+        .groupBy('Country_Code','Year','SHA_11','Financing_type','Financing_schema').pivot('unit').max('Value')
+
+    # remove spaces or other illegal characters from column names
+    return df_transformed.toDF(*[re.sub(r'[^0-9a-zA-Z_]','_',c) for c in df_transformed.columns])
+
+
+def own_health_assesement(spark, frames, catalog):
+
+    # Self-perceived health by sex, age and educational attainment level
+    data = frames['data']
+    map_levels = frames['levels']
+    population = spark.read.table(f'{catalog}.general.population_split')
+
+    df_transformed = data \
+        .withColumnsRenamed({'geo':'Country_Code', 'age':'Age_Group'}) \
+        .filter(
+            (col('Country_Code').isin(eu_iso2_codes)) &
+            (col('levels').isin(['VGOOD', 'GOOD', 'FAIR', 'BAD', 'VBAD'])) &
+            (col('isced11') == 'TOTAL') &
+            (col('sex').isin(['M','F'])) &
+            (col('Age_Group').isin(['Y16-24', 'Y25-34', 'Y35-44', 'Y45-54', 'Y55-64', 'Y_GE65']))) \
+        .withColumn('Age_Group', when(col('Age_Group') == 'Y_GE65', 'Y65+').otherwise(col('Age_Group'))) \
+        .join( map_levels, data.levels == map_levels.value, 'left' ) \
+        .select('Age_Group','Country_Code','sex', '2016','2019','2022', map_levels.description.alias('Health_Assesement')) \
+        .unpivot(
+            ['Age_Group','Country_Code','Sex','Health_Assesement'],
+            ['2016','2019','2022'], 'Year', 'Percentage')
+
+    # joining actual population numbers to calculate number of people in each category from percantage info
+    return df_transformed.alias('d') \
+        .join(population.alias('p'),
+            (col('d.Country_Code') == col('p.Country_Code')) &
+            (col('d.Sex')==col('p.Sex')) &
+            (col('d.Year')==col('p.Year')) &
+            (col('d.Age_Group') == when(col('p.Age') >= 65, 'Y65+')
+            .when(col('p.Age') >= 55, 'Y55-64')
+            .when(col('p.Age') >= 45, 'Y45-54')
+            .when(col('p.Age') >= 35, 'Y35-44')
+            .when(col('p.Age') >= 25, 'Y25-34')
+            .when(col('p.Age') >= 16, 'Y16-24')
+            .otherwise('0')),'left') \
+        .select('d.*' , 'Population') \
+        .groupBy(df_transformed.columns).agg(spark_sum('Population').alias('Population')) \
+        .withColumn('Number_of_People', ((col('Percentage')/100)*col('Population')).cast('int')) \
+        .drop('Population', 'Percentage')
+
+
+# in load order - upstream tables come before tables reading them
+TABLES = {
+    'general.population_split': {
+        'dataset': 'demo_pjan',
+        'upstream': [],
+        'keys': ['Age','Sex','Country_Code','Year'],
+        'transform': population_split,
+    },
+    'eurostat.healthcare_expenditure': {
+        'dataset': 'hlth_sha11_hf',
+        'upstream': [],
+        'keys': ['Country_Code','Year','SHA_11'],
+        'transform': healthcare_expenditure,
+    },
+    'eurostat.own_health_assesement': {
+        'dataset': 'hlth_silc_02',
+        'upstream': ['general.population_split'],
+        'keys': ['Age_Group','Country_Code','Sex','Health_Assesement','Year'],
+        'transform': own_health_assesement,
+    },
+}
@@ -0,0 +1,110 @@
+"""Pre-aggregated gold tables keyed by dashboard filter dimensions.
+
+Dashboard cubes, chart queries and the fast-path router read these instead of aggregating row level
+fact tables on every load; the agent gets small, commented tables for common questions. A gold table
+is rebuilt only when one of its source tables got new rows in the incremental load, or without load
+entries when Delta versions of its sources differ from the ones it was built from.
+"""
+import json
+
+from databricks_etl.incremental_load import table_version
+
+# rebuilt by loads with these statuses of a source table
+CHANGED_STATUSES = ['created', 'merged', 'overwritten']
+
+# table property with delta versions of source tables gold table was built from
+SOURCE_VERSIONS_PROPERTY = 'gold.source_versions'
+
+GOLD_TABLES = {
+    'eurostat.gold_expenditure': {
+        'sources': ['eurostat.healthcare_expenditure'],
+        # ingestion keeps top level financing schemes HF1-HF4 only (sha_11_codes in eurostat_tables) -
+        # they don't overlap, so summing them gives total expenditure without counting money twice
+        'comment': 'Healthcare expenditure summed per year, country and financing type over top level '
+                   'financing schemes HF1-HF4 (SHA_11). '
+                   'Row_count is number of rows summed from healthcare_expenditure',
+        'query': """
+            SELECT
+                Year, Country_Code, Financing_type,
+                SUM(Million_euro) AS Million_euro,
+                SUM(Million_purchasing_power_standards__PPS_) AS Million_purchasing_power_standards__PPS_,
+                SUM(Euro_per_inhabitant) AS Euro_per_inhabitant,
+                SUM(Purchasing_power_standard__PPS__per_inhabitant) AS Purchasing_power_standard__PPS__per_inhabitant,
+                SUM(Percentage_of_gross_domestic_product__GDP_) AS Percentage_of_gross_domestic_product__GDP_,
+                COUNT(*) AS Row_count
+            FROM {catalog}.eurostat.healthcare_expenditure
+            GROUP BY Year, Country_Code, Financing_type
+        """,
+    },
+    'eurostat.gold_health_assesement': {
+        'sources': ['eurostat.own_health_assesement'],
+        'comment': 'Number of people per year, country, sex, age group and health assesement. '
+                   'Row_count is number of rows summed from own_health_assesement',
+        'query': """
+            SELECT
+                Year, Country_Code, Sex, Age_Group, Health_Assesement,
+                SUM(Number_of_People) AS Number_of_People,
+                COUNT(*) AS Row_count
+            FROM {catalog}.eurostat.own_health_assesement
+            GROUP BY Year, Country_Code, Sex, Age_Group, Health_Assesement
+        """,
+    },
+    'eurostat.gold_bad_health': {
+        'sources': ['eurostat.own_health_assesement'],
+        'comment': 'People reporting bad or very bad health against all people per year, country, sex and age group. '
+                   'Shares of several groups are calculated from summed counts, not by averaging perc_of_bad_health',
+        'query': """
+            SELECT
+                Year, Country_Code, Sex, Age_Group,
+                COALESCE(SUM(CASE WHEN Health_Assesement IN ('Bad', 'Very bad') THEN Number_of_People END), 0)
+                    AS num_of_bad_health,
+                SUM(Number_of_People) AS num_of_total_health,
+                COALESCE(SUM(CASE WHEN Health_Assesement IN ('Bad', 'Very bad') THEN Number_of_People END), 0)
+                    * 100.0 / SUM(Number_of_People) AS perc_of_bad_health
+            FROM {catalog}.eurostat.own_health_assesement
+            GROUP BY Year, Country_Code, Sex, Age_Group
+        """,
+    },
+}
+
+
+def changed_tables(entries):
+    # source tables written by incremental load, from its manifest entries
+    return {entry['table_name'] for entry in entries if entry['status'] in CHANGED_STATUSES}
+
+
+def source_versions(spark, catalog, spec):
+    return {source: table_version(spark, f'{catalog}.{source}') for source in spec['sources']}
+
+
+def built_from_versions(spark, table_name):
+    # source versions stored by last rebuild, None for missing table or table built without them
+    if not spark.catalog.tableExists(table_name):
+        return None
+    properties = {row['key']: row['value'] for row in spark.sql(f"SHOW TBLPROPERTIES {table_name}").collect()}
+    stored = properties.get(SOURCE_VERSIONS_PROPERTY)
+    return json.loads(stored) if stored else None
+
+
+def refresh_gold_tables(spark, catalog='workspace', entries=None):
+    # with load entries only the gold tables with changed or missing sources, without them the ones
+    # built from older source versions - unchanged gold table gets no new delta version
+    changed = None if entries is None else changed_tables(entries)
+    refreshed = []
+    for table, spec in GOLD_TABLES.items():
+        table_name = f'{catalog}.{table}'
+        if changed is not None and spark.catalog.tableExists(table_name) and not changed & set(spec['sources']):
+            continue
+        versions = source_versions(spark, catalog, spec)
+        if changed is None and built_from_versions(spark, table_name) == versions:
+            continue
+        comment = spec['comment'].replace("'", "\\'")
+        query = spec['query'].format(catalog=catalog)
+        spark.sql(f"""
+            CREATE OR REPLACE TABLE {table_name}
+            COMMENT '{comment}'
+            TBLPROPERTIES ('{SOURCE_VERSIONS_PROPERTY}' = '{json.dumps(versions, sort_keys=True)}')
+            AS {query}
+        """)
+        refreshed.append({'table_name': table, 'rows': spark.read.table(table_name).count()})
+    return refreshed
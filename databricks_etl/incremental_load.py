@@ -0,0 +1,216 @@
+"""Incremental, change-detecting load of Eurostat tables.
+
+Full load rewrote every table with `mode('overwrite')` on each run - a new Delta version and
+invalidated downstream caches even when Eurostat published nothing new. Incremental load instead:
+
+- fingerprints source payload of every table (dataset, its dictionaries and fingerprints of
+  upstream tables), table is skipped when fingerprint matches the last load
+- for changed payloads MERGEs only new, changed and removed keys into the table, a payload change
+  not touching any rows (e.g. reordered api output) doesn't write at all
+- appends one row per table to load manifest recording what changed and resulting table version
+
+Runs on local spark with Delta and recorded fixtures in place of Eurostat api:
+    python -m databricks_etl.incremental_load --fixtures databricks_etl/fixtures --warehouse /tmp/etl
+"""
+import argparse
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+
+from pyspark.sql.functions import lit
+from pyspark.sql.types import LongType, StringType, StructField, StructType, TimestampType
+
+from databricks_etl.eurostat_source import DATASETS, RecordedEurostat
+from databricks_etl.eurostat_tables import TABLES
+from databricks_etl.ingestion import fetch_payloads, ingest_frames
+
+MANIFEST_TABLE = 'general.load_manifest'
+
+MANIFEST_SCHEMA = StructType([
+    StructField('load_id', StringType()),
+    StructField('loaded_at', TimestampType()),
+    StructField('mode', StringType()),
+    StructField('table_name', StringType()),
+    StructField('dataset', StringType()),
+    StructField('fingerprint', StringType()),
+    StructField('status', StringType()),         # created, merged, unchanged, skipped or overwritten
+    StructField('rows_upserted', LongType()),
+    StructField('rows_deleted', LongType()),
+    StructField('table_version', LongType()),
+])
+
+
+def payload_fingerprint(*payloads):
+    # canonical json of api payloads - tuples and lists hash the same, so recorded fixtures match live api
+    digest = hashlib.sha256()
+    for payload in payloads:
+        digest.update(json.dumps(payload, default=str, separators=(',', ':')).encode())
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def check_unique_keys(df, table_name, keys):
+    # MERGE matches source rows to target rows by keys - duplicates would update one row several times
+    # and set difference below would silently collapse them
+    duplicates = df.groupBy(*keys).count().filter('count > 1').limit(5).collect()
+    if duplicates:
+        examples = [{key: row[key] for key in keys} for row in duplicates]
+        raise ValueError(f"Duplicate keys {keys} in source of {table_name}, e.g. {examples}")
+
+
+def merge_changes(spark, df, table_name, keys):
+    # rows new or different in source and keys gone from source, merged in one Delta commit
+    check_unique_keys(df, table_name, keys)
+    target = spark.read.table(table_name)
+    columns = df.columns
+
+    upserts = df.subtract(target.select(*columns)).withColumn('_change', lit('upsert'))
+    deletes = target.select(*keys).subtract(df.select(*keys)).withColumn('_change', lit('delete'))
+    changes = upserts.unionByName(deletes, allowMissingColumns=True).cache()
+
+    rows_upserted = changes.filter("_change = 'upsert'").count()
+    rows_deleted = changes.filter("_change = 'delete'").count()
+    if rows_upserted or rows_deleted:
+        changes.createOrReplaceTempView('_incremental_changes')
+        on = ' AND '.join(f't.`{key}` <=> s.`{key}`' for key in keys)
+        update = ', '.join(f't.`{column}` = s.`{column}`' for column in columns)
+        insert_columns = ', '.join(f'`{column}`' for column in columns)
+        insert_values = ', '.join(f's.`{column}`' for column in columns)
+        spark.sql(f"""
+            MERGE INTO {table_name} t
+            USING _incremental_changes s
+            ON {on}
+            WHEN MATCHED AND s._change = 'delete' THEN DELETE
+            WHEN MATCHED THEN UPDATE SET {update}
+            WHEN NOT MATCHED AND s._change = 'upsert' THEN INSERT ({insert_columns}) VALUES ({insert_values})
+        """)
+    changes.unpersist()
+    return rows_upserted, rows_deleted
+
+
+def table_version(spark, table_name):
+    return spark.sql(f'DESCRIBE HISTORY {table_name} LIMIT 1').first()['version']
+
+
+class IncrementalLoader:
+    # mode 'full' overwrites every table as before, 'incremental' skips or merges
+
+    def __init__(self, spark, source, catalog='workspace', mode='incremental'):
+        if mode not in ('incremental', 'full'):
+            raise ValueError(f"Unknown load mode: {mode}")
+        self.spark = spark
+        self.source = source
+        self.catalog = catalog
+        self.mode = mode
+        self.load_id = str(uuid.uuid4())
+        self.entries = []
+        self.fingerprints = {}
+        self.payloads = None
+        self.timings = {}
+        self.previous_fingerprints = self.read_previous_fingerprints()
+
+    def full_name(self, table):
+        return f'{self.catalog}.{table}'
+
+    def read_previous_fingerprints(self):
+        manifest = self.full_name(MANIFEST_TABLE)
+        if not self.spark.catalog.tableExists(manifest):
+            return {}
+        fingerprints = {}
+        for row in self.spark.read.table(manifest).orderBy('loaded_at').select('table_name', 'fingerprint').collect():
+            fingerprints[row['table_name']] = row['fingerprint']
+        return fingerprints
+
+    def fetch(self):
+        # payloads of all datasets fetched concurrently on first load
+        datasets = {spec['dataset']: DATASETS[spec['dataset']] for spec in TABLES.values()}
+        self.payloads, self.timings = fetch_payloads(self.source, datasets)
+
+    def load(self, table):
+        spec = TABLES[table]
+        table_name = self.full_name(table)
+        if self.payloads is None:
+            self.fetch()
+        payload = self.payloads[spec['dataset']]
+
+        # upstream fingerprints included, e.g. new population numbers change health assesement table
+        fingerprint = payload_fingerprint(payload, *[self.fingerprints[upstream] for upstream in spec['upstream']])
+        self.fingerprints[table] = fingerprint
+        exists = self.spark.catalog.tableExists(table_name)
+
+        rows_upserted = rows_deleted = 0
+        if self.mode == 'incremental' and exists and self.previous_fingerprints.get(table) == fingerprint:
+            status = 'skipped'
+        else:
+            frames = ingest_frames(self.spark, payload, self.timings[spec['dataset']])
+            df = spec['transform'](self.spark, frames, self.catalog)
+            if self.mode == 'full' or not exists or set(df.columns) != set(self.spark.read.table(table_name).columns):
+                # first load and schema changes are written whole, dropped columns are dropped from table too
+                df.write.option('overwriteSchema', 'true').mode('overwrite').saveAsTable(table_name)
+                status = 'overwritten' if exists else 'created'
+                rows_upserted = self.spark.read.table(table_name).count()
+            else:
+                rows_upserted, rows_deleted = merge_changes(self.spark, df, table_name, spec['keys'])
+                status = 'merged' if rows_upserted or rows_deleted else 'unchanged'
+
+        entry = {
+            'load_id': self.load_id,
+            'loaded_at': datetime.now(timezone.utc),
+            'mode': self.mode,
+            'table_name': table,
+            'dataset': spec['dataset'],
+            'fingerprint': fingerprint,
+            'status': status,
+            'rows_upserted': rows_upserted,
+            'rows_deleted': rows_deleted,
+            'table_version': table_version(self.spark, table_name),
+        }
+        self.entries.append(entry)
+        return entry
+
+    def load_all(self):
+        return [self.load(table) for table in TABLES]
+
+    def ingest_timings(self):
+        # per dataset fetch, arrow conversion and spark frame creation seconds (conversion only for loaded tables)
+        return [{'dataset': dataset, **timing} for dataset, timing in self.timings.items()]
+
+    def write_manifest(self):
+        manifest = self.spark.createDataFrame(self.entries, MANIFEST_SCHEMA)
+        manifest.write.mode('append').saveAsTable(self.full_name(MANIFEST_TABLE))
+        return manifest
+
+
+def local_spark(warehouse_dir):
+    # local spark session with Delta tables in spark_catalog, schemas created like in workspace catalog
+    from delta import configure_spark_with_delta_pip
+    from pyspark.sql import SparkSession
+
+    builder = SparkSession.builder.master('local[2]').appName('eurostat-etl') \
+        .config('spark.sql.extensions', 'io.delta.sql.DeltaSparkSessionExtension') \
+        .config('spark.sql.catalog.spark_catalog', 'org.apache.spark.sql.delta.catalog.DeltaCatalog') \
+        .config('spark.sql.warehouse.dir', warehouse_dir)
+    spark = configure_spark_with_delta_pip(builder).getOrCreate()
+    for schema in ['general', 'eurostat']:
+        spark.sql(f'CREATE SCHEMA IF NOT EXISTS spark_catalog.{schema}')
+    return spark
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixtures', required=True, help='directory with recorded api payloads')
+    parser.add_argument('--warehouse', required=True, help='local spark warehouse directory')
+    parser.add_argument('--mode', default='incremental', choices=['incremental', 'full'])
+    args = parser.parse_args()
+
+    spark = local_spark(args.warehouse)
+    loader = IncrementalLoader(spark, RecordedEurostat(args.fixtures), catalog='spark_catalog', mode=args.mode)
+    loader.load_all()
+    loader.write_manifest().select('table_name', 'status', 'rows_upserted', 'rows_deleted', 'table_version').show()
+    for timing in loader.ingest_timings():
+        print(timing)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Parallel, Arrow-based ingestion of Eurostat payloads into Spark frames.
+
+Datasets and their dictionaries are fetched concurrently (the API calls are network bound), every
+payload is converted into an Arrow table with explicit schema - codes as strings, period values
+as doubles - and Spark frames are created from Arrow instead of letting the driver infer types
+by scanning Python rows.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+
+from databricks_etl.eurostat_source import DATASETS
+
+MAX_FETCH_WORKERS = 8
+
+MAPPING_SCHEMA = pa.schema([pa.field('value', pa.string()), pa.field('description', pa.string())])
+
+
+def data_schema(header):
+    # dimension columns up to geo\TIME_PERIOD hold codes, every column after it is one period of values
+    names = [h.split('\\')[0] for h in header]
+    time_start = next(i for i, h in enumerate(header) if '\\' in h) + 1
+    return pa.schema(
+        [pa.field(name, pa.string()) for name in names[:time_start]] +
+        [pa.field(name, pa.float64()) for name in names[time_start:]]
+    )
+
+
+def data_table(data):
+    schema = data_schema(data[0])
+    columns = list(zip(*data[1:])) or [[] for _ in schema]
+    return pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                                schema=schema)
+
+
+def mapping_table(rows):
+    columns = list(zip(*rows)) or [[], []]
+    return pa.Table.from_arrays([pa.array(column, type=pa.string()) for column in columns], schema=MAPPING_SCHEMA)
+
+
+def arrow_payload(payload):
+    tables = {'data': data_table(payload['data'])}
+    tables.update({param: mapping_table(rows) for param, rows in payload.items() if param != 'data'})
+    return tables
+
+
+def spark_frame(spark, table):
+    # spark 4 creates frames from arrow tables directly, older versions through arrow enabled pandas conversion
+    if int(spark.version.split('.')[0]) >= 4:
+        return spark.createDataFrame(table)
+    spark.conf.set('spark.sql.execution.arrow.pyspark.enabled', 'true')
+    return spark.createDataFrame(table.to_pandas())
+
+
+def timed_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def fetch_payloads(source, datasets=DATASETS, max_workers=MAX_FETCH_WORKERS):
+    # every dataset and dictionary request runs concurrently, dataset fetch time is its slowest request
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            code: {'data': executor.submit(timed_call, source.get_data, code),
+                   **{param: executor.submit(timed_call, source.get_dic, code, param) for param in params}}
+            for code, params in datasets.items()
+        }
+        payloads, timings = {}, {}
+        for code, requests in futures.items():
+            results = {name: future.result() for name, future in requests.items()}
+            payloads[code] = {name: payload for name, (payload, _) in results.items()}
+            timings[code] = {'fetch_s': max(elapsed for _, elapsed in results.values())}
+    return payloads, timings
+
+
+def ingest_frames(spark, payload, timing=None):
+    # spark frames of dataset and its dictionaries, conversion times added to timing dict
+    tables, arrow_s = timed_call(arrow_payload, payload)
+    start = time.perf_counter()
+    frames = {name: spark_frame(spark, table) for name, table in tables.items()}
+    if timing is not None:
+        timing.update({'rows': tables['data'].num_rows, 'arrow_s': arrow_s,
+                       'spark_s': time.perf_counter() - start})
+    return frames
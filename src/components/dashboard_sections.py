@@ -0,0 +1,90 @@
+import pandas as pd
+import streamlit as st
+from src.components.data_visuals import draw_bar_chart, draw_pie_chart, draw_histogram, draw_scatter_plot
+from src.services.transforms import create_line_breaks, add_sort_id, bad_health_by_country
+
+# Dashboard sections as st.fragment units - every section gets the filter state it depends on as arguments,
+# so a widget inside a section (e.g. spending measure radios) reruns only that section instead of whole page.
+# Sidebar filters stay outside of fragments (fragments can't write to sidebar) and rerun every section,
+# sections with unchanged chart inputs are then served from figure cache.
+
+# spending measure for (Euro value as, Spending scope) radio selection
+SPENDING_METRICS = {
+    ('Nominal', 'Total'): 'Total Spending',
+    ('Nominal', 'Per capita'): 'Spending per inhabitant',
+    ('PPP', 'Total'): 'Total Spending (PPS)',
+    ('PPP', 'Per capita'): 'Spending per inhabitant (PPS)',
+}
+
+
+def bar_frame(expenditure_slice, metric):
+    df = expenditure_slice.aggregate(['Country_Code'], [metric]).sort_values(by=metric, ascending=False)
+    df['Index'] = range(len(df))
+    return df
+
+
+def donut_frame(expenditure_slice, metric):
+    df = expenditure_slice.aggregate(['Financing_type'], [metric]).sort_values(by=metric, ascending=False)
+    df['Type'] = create_line_breaks(df['Financing_type'])
+    return df
+
+
+def histogram_frame(assesement_slice):
+    df = assesement_slice.aggregate(['Age_Group','Health_Assesement'], ['Number_of_People'])
+    df['Sort_ID'] = add_sort_id(df['Health_Assesement'])
+    return df.sort_values(['Age_Group','Sort_ID'])
+
+
+def scatter_frame(expenditure_slice, assesement_slice):
+
+    # spending as % of GDP by country
+    df_gdp = expenditure_slice.aggregate(['Country_Code'], ['Percentage of GDP']) \
+        .rename(columns={'Percentage of GDP':'perc_of_gdp'})
+
+    # percentage of bad and very bad health people in all polulation by country
+    df_bad_health = bad_health_by_country(
+        assesement_slice.aggregate(['Country_Code','Health_Assesement'], ['Number_of_People'])
+    )
+
+    return pd.merge(df_gdp, df_bad_health, on='Country_Code')
+
+
+def draw_expenditure_charts(expenditure_cube, year, countries, types, metric):
+
+    expenditure_slice = expenditure_cube.slice(Year=year, Country_Code=countries, Financing_type=types)
+
+    # defining section layout as two columns with some separation
+    left_split, buffer, right_split = st.columns([5,0.5,4])
+    with left_split:
+        draw_bar_chart(df=bar_frame(expenditure_slice, metric), metric=metric)
+    with right_split:
+        draw_pie_chart(df=donut_frame(expenditure_slice, metric), metric=metric)
+
+
+@st.fragment
+def expenditure_section(expenditure_cube, year, countries, types):
+
+    # additional switch slicers to determine spending measure - changing them reruns only this section
+    first_slicer, second_slicer = st.columns([1,4])
+    with first_slicer:
+        spend_type = st.radio('Euro value as:', ['Nominal','PPP'], horizontal=True)
+    with second_slicer:
+        spend_unit = st.radio('Spending scope:', ['Total','Per capita'], horizontal=True)
+    metric = SPENDING_METRICS[(spend_type, spend_unit)]
+
+    draw_expenditure_charts(expenditure_cube, year, countries, types, metric)
+
+
+@st.fragment
+def health_section(assesement_cube, year, countries, sexes, age_groups):
+
+    assesement_slice = assesement_cube.slice(Year=year, Country_Code=countries, Sex=sexes, Age_Group=age_groups)
+    draw_histogram(df=histogram_frame(assesement_slice))
+
+
+@st.fragment
+def spending_vs_health_section(expenditure_cube, assesement_cube, year, countries, types, sexes, age_groups):
+
+    expenditure_slice = expenditure_cube.slice(Year=year, Country_Code=countries, Financing_type=types)
+    assesement_slice = assesement_cube.slice(Year=year, Country_Code=countries, Sex=sexes, Age_Group=age_groups)
+    draw_scatter_plot(df=scatter_frame(expenditure_slice, assesement_slice))
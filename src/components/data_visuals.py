@@ -1,5 +1,22 @@
+import json
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
+from src.services.transforms import assign_quadrant, top_n_with_other, QUADRANT_COLORS
+from src.services.figure_cache import FigureCache, frame_hash
+
+# Max number of serialized figures kept for reruns with unchanged chart inputs
+FIGURE_CACHE_SIZE = 128
+
+# Large data rendering - charts were designed for ~27 EU countries, regional data can have thousands
+WEBGL_THRESHOLD = 500           # scatter points drawn with WebGL instead of SVG above this count
+TEXT_LABEL_THRESHOLD = 60       # per point text labels only up to this count, hover labels above
+BAR_TOP_N = 30                  # bars above this count are folded into "Other"
+DONUT_TOP_N = 6                 # donut slices above this count are folded into "Other"
+PAYLOAD_LIMIT_BYTES = 1_000_000 # warning shown for charts sending more json to browser
+
+# metrics which are ratios - folded into "Other" as average instead of sum
+RATIO_METRICS = ['Spending per inhabitant', 'Spending per inhabitant (PPS)', 'Percentage of GDP']
 
 def title_formatting(title_text, subtitle_text=None):
 
@@ -11,7 +28,10 @@ def title_formatting(title_text, subtitle_text=None):
     return title + subtitle
 
 
-def draw_pie_chart(df, metric):
+def build_pie_chart(df, metric):
+
+    # Only largest slices are drawn separately
+    df = top_n_with_other(df, 'Type', metric, DONUT_TOP_N)
 
     # Create Pie Chart
     fig = px.pie(
@@ -42,13 +62,16 @@ def draw_pie_chart(df, metric):
         texttemplate='%{percent:.1%}'    #'%{label}<br>%{percent:.1%}'
     )
 
-    # Show chart
-    st.plotly_chart(fig)
+    return fig
 
-def draw_bar_chart(df, metric):
+def build_bar_chart(df, metric):
 
-    # Define chart coordinates
+    # Average of all countries, only largest ones are drawn as separate bars
     y_avg = df[metric].mean()
+    df = top_n_with_other(df, 'Country_Code', metric, BAR_TOP_N, 'mean' if metric in RATIO_METRICS else 'sum')
+    df = df.assign(Index=range(len(df)))
+
+    # Define chart coordinates
     try:
         x_start = df['Country_Code'].iloc[0]
         x_end = df['Country_Code'].iloc[-1]
@@ -91,10 +114,9 @@ def draw_bar_chart(df, metric):
         font=dict(color="red", size=12)
     )
 
-    # Show figure
-    st.plotly_chart(fig)
+    return fig
 
-def draw_scatter_plot(df):
+def build_scatter_plot(df):
 
     # Calculate main chart coordinates
     x_avg = df["perc_of_gdp"].mean()
@@ -107,35 +129,25 @@ def draw_scatter_plot(df):
     y_max = df["perc_of_bad_health"].max()*1.05
 
     # Assign quadrant label
-    def assign_quadrant(row):
-        if row["perc_of_gdp"] > x_avg and row["perc_of_bad_health"] > y_avg:
-            return "Top Right"
-        elif row["perc_of_gdp"] < x_avg and row["perc_of_bad_health"] > y_avg:
-            return "Top Left"
-        elif row["perc_of_gdp"] < x_avg and row["perc_of_bad_health"] < y_avg:
-            return "Bottom Left"
-        else:
-            return "Bottom Right"
-
-    df["Quadrant"] = df.apply(assign_quadrant, axis=1)
+    df = df.assign(Quadrant=assign_quadrant(df["perc_of_gdp"], df["perc_of_bad_health"], x_avg, y_avg))
+
+    # Many points are drawn with WebGL and labeled on hover only
+    many_points = len(df) > TEXT_LABEL_THRESHOLD
 
     # Create scatter plot
     fig = px.scatter(
         df,
         x="perc_of_gdp",
         y="perc_of_bad_health",
-        text="Country_Code",
+        text=None if many_points else "Country_Code",
+        hover_name="Country_Code",
+        render_mode="webgl" if len(df) > WEBGL_THRESHOLD else "auto",
         color="Quadrant",
         title = title_formatting(
             "Spending on helahcare vs reported health",
             "Quadrants by low/high spend and more/less bad health people"
         ),
-        color_discrete_map={
-            "Top Right": "red",
-            "Top Left": "orange",
-            "Bottom Left": "green",
-            "Bottom Right": "blue"
-        }
+        color_discrete_map=QUADRANT_COLORS
     )
 
     # Quadrant background shading
@@ -178,17 +190,22 @@ def draw_scatter_plot(df):
         showlegend=False
     )
 
-    st.plotly_chart(fig)
+    return fig
 
-def draw_histogram(df):
+def build_histogram(df):
 
-    # Create histogram figure
-    fig = px.histogram(
-        df,
+    # Percentages are calculated here instead of browser, so only one row per bar is sent
+    bars = df.groupby(['Age_Group','Health_Assesement'], observed=True, sort=False)['Number_of_People'] \
+        .sum().reset_index()
+    bars['Percentage'] = bars['Number_of_People'] * 100 / \
+        bars.groupby('Age_Group', observed=True)['Number_of_People'].transform('sum')
+
+    # Create stacked bars figure
+    fig = px.bar(
+        bars,
         x="Age_Group",
-        y="Number_of_People",
+        y="Percentage",
         color="Health_Assesement",
-        barnorm='percent',
         text_auto='.1f',
         title=title_formatting("Reported health by age groups"),
         color_discrete_sequence=['red','lightpink','lightblue','lightgreen','green']
@@ -217,5 +234,83 @@ def draw_histogram(df):
         textfont_size=10
     )
 
+    return fig
+
+
+@st.cache_resource
+def get_figure_cache():
+    # figures shared by all sessions - the same chart inputs always give the same figure
+    return FigureCache(max_entries=FIGURE_CACHE_SIZE)
+
+def cached_figure(build_figure, df, *params):
+    # figure is built only for chart inputs not seen before, otherwise its stored json is reused,
+    # size of json is the payload sent to browser
+    figure_cache = get_figure_cache()
+    key = (build_figure.__name__, frame_hash(df), params)
+    figure_json = figure_cache.get(key)
+    if figure_json is not None:
+        return json.loads(figure_json), len(figure_json)
+    fig = build_figure(df, *params)
+    figure_json = fig.to_json()
+    figure_cache.put(key, figure_json)
+    return fig, len(figure_json)
+
+def render_figure(figure, payload_bytes):
+    # accepts built figure or its deserialized json
+    if payload_bytes > PAYLOAD_LIMIT_BYTES:
+        st.warning(f"Chart sends {payload_bytes / 2**20:.1f} MB of data to the browser, narrowing filters will make it faster.")
+    st.plotly_chart(figure)
+
+def draw_pie_chart(df, metric):
+    render_figure(*cached_figure(build_pie_chart, df, metric))
+
+def draw_bar_chart(df, metric):
+    render_figure(*cached_figure(build_bar_chart, df, metric))
+
+def draw_scatter_plot(df):
+    render_figure(*cached_figure(build_scatter_plot, df))
+
+def draw_histogram(df):
+    render_figure(*cached_figure(build_histogram, df))
+
+def draw_trace_waterfall(trace):
+
+    # One bar per LLM or tool call, placed at its start time within the answer
+    spans = trace['spans']
+    labels = [f"{i+1}. {span['name']}" for i, span in enumerate(spans)]
+    hover = [
+        f"{span['duration']:.2f}s" + (
+            f"<br>{span['prompt_tokens']} prompt / {span['completion_tokens']} completion tokens"
+            if span['kind'] == 'llm' else f"<br>{span['input']}"
+        ) + (f"<br>{span['retries']} retries" if span['retries'] else "")
+        for span in spans
+    ]
+
+    # Create waterfall figure
+    fig = go.Figure(go.Bar(
+        y=labels,
+        x=[span['duration'] for span in spans],
+        base=[span['start'] for span in spans],
+        orientation='h',
+        marker_color=['#4285F4' if span['kind'] == 'llm' else '#FF3621' for span in spans],
+        hovertext=hover,
+        hoverinfo='text'
+    )).update_layout(
+        width=500, height=120 + 25 * len(spans),
+        margin=dict(l=10, r=10, t=60, b=30),
+        plot_bgcolor="white",
+        xaxis=dict(title="Seconds", gridcolor='lightgray', gridwidth=0.5, title_font=dict(size=11)),
+        yaxis=dict(autorange='reversed', tickfont=dict(size=10)),
+        title=dict(
+            text=title_formatting(
+                f"Answer in {trace['total_time']:.1f}s",
+                f"LLM {trace['llm_time']:.1f}s ({trace['llm_calls']} calls, "
+                f"{trace['prompt_tokens'] + trace['completion_tokens']} tokens), "
+                f"tools {trace['tool_time']:.1f}s ({trace['tool_calls']} calls)"
+            ),
+            y=1, yanchor='top'
+        )
+    )
+
     # Show figure
-    st.plotly_chart(fig)
\ No newline at end of file
+    st.plotly_chart(fig)
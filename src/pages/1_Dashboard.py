@@ -1,10 +1,13 @@
 import streamlit as st
-from src.services.databricks_connection import execute_sql_query
+from src.services.databricks_connection import (
+    execute_sql_queries, fetch_shared_table, get_data_store, revalidate_snapshots
+)
+from src.services.queries.query_builder import (
+    build_expenditure_cube_query, build_assesement_cube_query, METRIC_COLUMNS
+)
+from src.services.olap_cube import Cube
 from src.components.ui_elements import shared_page_header
-import plotly.express as px
-from pathlib import Path
-from src.components.data_visuals import *
-import pandas as pd
+from src.components.dashboard_sections import expenditure_section, health_section, spending_vs_health_section
 
 # Configure Streamlit page settings
 st.set_page_config(page_title="Healthcare in EU", layout="wide")
@@ -18,19 +21,52 @@ shared_page_header(
 
 # ----------------------------------------------------------------------------------------
 
-# loading and staging data from databricks
-query_expenditure = Path('src/services/queries/source_query_expenditure.sql').read_text()
-df1_raw  = execute_sql_query(query_expenditure)
-
-query_assesement = Path('src/services/queries/source_query_assesement.sql').read_text()
-df2_raw = execute_sql_query(query_assesement)
+class DashboardDataUnavailable(Exception):
+    pass
+
+def dashboard_queries():
+    return {
+        'expenditure': build_expenditure_cube_query(),
+        'assesement': build_assesement_cube_query()
+    }
+
+# loading data from databricks aggregated to grain of dashboard filters and building cubes once per load,
+# every sidebar change afterwards is only slicing and summing of small numpy arrays - cubes are keyed
+# by data store generation, so refreshed snapshots (store cleared) rebuild them on next rerun
+@st.cache_resource(show_spinner="Building data cubes...", max_entries=1)
+def load_dashboard_cubes(data_generation):
+    # both queries run concurrently - loading takes as long as the slower one, results are compact
+    # arrow tables of process-wide data store and cubes are built from views of their buffers
+    results = execute_sql_queries(dashboard_queries(), execute=fetch_shared_table)
+    df_expenditure, df_assesement = results['expenditure'], results['assesement']
+    if df_expenditure is None or df_assesement is None:
+        # failed load is not cached, next rerun tries again
+        raise DashboardDataUnavailable()
+
+    expenditure_cube = Cube.from_arrow(
+        df_expenditure, ['Year','Country_Code','Financing_type'], list(METRIC_COLUMNS), count_column='Row_count'
+    )
+    assesement_cube = Cube.from_arrow(
+        df_assesement, ['Year','Country_Code','Sex','Age_Group','Health_Assesement'], ['Number_of_People'],
+        count_column='Row_count'
+    )
+    return expenditure_cube, assesement_cube
+
+# cubes stay in memory for the whole server life, new delta versions are looked for on every load
+# (at most once per snapshot revalidate interval) and picked up by the next rerun
+revalidate_snapshots(dashboard_queries())
+try:
+    expenditure_cube, assesement_cube = load_dashboard_cubes(get_data_store().generation)
+except DashboardDataUnavailable:
+    # query errors were already shown by execute_sql_queries
+    st.stop()
 
 # creating dat categories for filters
-years = df1_raw['Year'].unique()
-countries = df1_raw['Country_Code'].unique()
-types = list(df1_raw['Financing_type'].unique()) + ['Select All']
+years = list(expenditure_cube.labels['Year'][::-1])
+countries = list(expenditure_cube.labels['Country_Code'])
+types = list(expenditure_cube.labels['Financing_type']) + ['Select All']
 genders = ['M','F','Select All']
-age_buckets = df2_raw['Age_Group'].unique()
+age_buckets = list(assesement_cube.labels['Age_Group'])
 
 # -----------------------------------------------------------------------------------------
 
@@ -81,130 +117,22 @@ with st.sidebar:
 
 # --------------------------------------------------------------------------------------------------
 
-# defining final dataframes to work with after filters are applied
-df1_withFilters = df1_raw[
-            (df1_raw['Year']==selected_year) & 
-            (df1_raw['Country_Code'].isin(selected_countires)) &
-            (df1_raw['Financing_type']).isin(selected_types)
-    ].copy()
-
-df2_withFilters = df2_raw[
-            (df2_raw['Year']==selected_year) & 
-            (df2_raw['Country_Code'].isin(selected_countires)) &
-            (df2_raw['Sex']).isin(selected_sexes) &
-            (df2_raw['Age_Group']).isin(selected_age_buckets)
-    ].copy()
-
-# additional switch slicers to determine spending measure
-first_slicer, second_slicer = st.columns([1,4])
-with first_slicer:
-    spend_type = st.radio('Euro value as:', ['Nominal','PPP'], horizontal=True)
-with second_slicer:
-    spend_unit = st.radio('Spending scope:', ['Total','Per capita'], horizontal=True)
-
-# Conditionally set measure for selected filters
-if spend_type == 'Nominal' and spend_unit == 'Total':
-    metric = 'Total Spending'
-elif spend_type == 'Nominal' and spend_unit == 'Per capita':
-    metric = 'Spending per inhabitant'
-elif spend_type == 'PPP' and spend_unit == 'Total':
-    metric = 'Total Spending (PPS)'
-elif spend_type == 'PPP' and spend_unit == 'Per capita':
-    metric = 'Spending per inhabitant (PPS)'
-
-# ----------------------------------------------------------------------------------------------------
-
-first_charts_section = st.container()
-with first_charts_section:
-
-    # defining page layout as two columns with some separation
-    left_split, buffer, right_split = st.columns([5,0.5,4])
+# every section is a fragment with explicit filter dependencies - widgets inside a section rerun only it
 
-    # bar chart
-    with left_split:
+expenditure_section(expenditure_cube, selected_year, selected_countires, selected_types)
 
-        df2_viz = df1_withFilters \
-            .groupby('Country_Code').agg({metric:'sum'}).reset_index() \
-            .sort_values(by=metric, ascending=False)
-
-        df2_viz['Index'] = range(len(df2_viz))
-
-        draw_bar_chart(df=df2_viz, metric=metric)
-
-
-    # dount chart
-    with right_split:
-
-        def create_line_breaks(text):
-            words = text.split(' ')
-            for i, word in enumerate(words):
-                if i != 0 and len(word)>2 :
-                    words[i] = '<br>' + word
-            return ' '.join(words)
-
-        df1_withFilters['Type'] = df1_withFilters['Financing_type'].map(create_line_breaks)
-
-        df1_viz = df1_withFilters \
-            .groupby('Type').agg({metric:'sum'}).reset_index() \
-            .sort_values(by=metric, ascending=False)
-        
-        draw_pie_chart(df=df1_viz, metric=metric)
+st.write('------------')
 
-# ------------------------------------------------------------------------------------------------------
+# defining page layout as two columns with some separation
+left_split, buffer, right_split = st.columns([5,0.5,4])
 
-st.write('------------')
+# histogram
+with left_split:
+    health_section(assesement_cube, selected_year, selected_countires, selected_sexes, selected_age_buckets)
 
-second_charts_section = st.container()
-with second_charts_section:
-
-    # defining page layout as two columns with some separation
-    left_split, buffer, right_split = st.columns([5,0.5,4])
-
-    # histogram
-    with left_split:
-
-        def add_sort_id(assesement):
-            if assesement == 'Very bad':
-                return 1
-            elif assesement == 'Bad':    
-                return 2
-            elif assesement == 'Fair':        
-                return 3
-            elif assesement == 'Good':
-                return 4
-            elif assesement == 'Very good':
-                return 5
-        
-        df2_withFilters['Sort_ID'] = df2_withFilters['Health_Assesement'].map(add_sort_id)
-        df4_viz = df2_withFilters \
-            .groupby(['Age_Group','Health_Assesement','Sort_ID'])['Number_of_People'].sum().reset_index() \
-            .sort_values(['Age_Group','Sort_ID'])
-        
-        draw_histogram(df=df4_viz)
-
-    # scatter plot
-    with right_split:
-
-        # Create temporary view for spending as % of GDP by country
-        df1_temp = df1_withFilters[['Country_Code', 'Percentage of GDP']] \
-            .groupby('Country_Code').agg(perc_of_gdp=('Percentage of GDP','sum')) \
-            .reset_index()
-
-        # Create a temporary view for percentage of bad and very bad health people in all polulation
-        def only_bad_health(row):
-            if row['Health_Assesement'] in ['Bad','Very bad']:
-                return row['Number_of_People'] 
-            
-        df2_withFilters['Number only for bad health'] = df2_withFilters.apply(only_bad_health, axis=1)
-
-        df2_temp = df2_withFilters.groupby('Country_Code').agg(
-            num_of_bad_health=('Number only for bad health','sum'),
-            num_of_total_health=('Number_of_People','sum')
-        ).reset_index()
-
-        df2_temp['perc_of_bad_health'] = df2_temp['num_of_bad_health']*100/df2_temp['num_of_total_health']
-
-        # Merge both temp dataframes
-        df3_viz = pd.merge(df1_temp, df2_temp, on='Country_Code')
-
-        draw_scatter_plot(df=df3_viz)
\ No newline at end of file
+# scatter plot
+with right_split:
+    spending_vs_health_section(
+        expenditure_cube, assesement_cube, selected_year, selected_countires, selected_types,
+        selected_sexes, selected_age_buckets
+    )
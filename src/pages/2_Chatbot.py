@@ -1,6 +1,10 @@
 import streamlit as st
 import sqlparse
-from src.services.langchain_agent import ask_agent
+import time
+from src.services.langchain_agent import (
+    stream_agent_answer, get_answer_cache, get_llm_cache, get_trace_store, create_conversation_memory, TOOL_LABELS
+)
+from src.components.data_visuals import draw_trace_waterfall
 from src.components.ui_elements import shared_page_header
 
 # Configure Streamlit page settings
@@ -17,14 +21,44 @@ shared_page_header(
 if "queries_log" not in st.session_state:
     st.session_state.queries_log =[]
 
+# Initialize agent tools cache counters
+if "tool_cache" not in st.session_state:
+    st.session_state.tool_cache = {}
+
 # Create sidebar
 with st.sidebar:
     st.header('ChatBot Interaction')
     st.write('Below you can see what actual sql queries were generted for processing you questions')
     popover = st.popover("SQL Logs")
+
+    def show_answer_log(number, answer_log):
+        # generated sql next to timing waterfall of LLM and tool calls
+        answer_expander = popover.expander(f"Answer {number} logs")
+        sql_column, timing_column = answer_expander.columns(2)
+        if answer_log['sql']:
+            sql_column.code(answer_log['sql'], language='sql')
+        if answer_log['trace'] and answer_log['trace']['spans']:
+            with timing_column:
+                draw_trace_waterfall(answer_log['trace'])
+
     for i, answer_log in enumerate(st.session_state.queries_log):
-        answer_expander = popover.expander(f"Answer {i+1} logs")
-        answer_expander.code(answer_log, language='sql')
+        show_answer_log(i+1, answer_log)
+
+    # answers shared between all sessions
+    cache_stats = get_answer_cache().stats()
+    st.caption(f"Answer cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} stored")
+    llm_cache_stats = get_llm_cache().stats()
+    st.caption(f"LLM response cache: {llm_cache_stats['hit_rate']:.0%} hit rate of "
+               f"{llm_cache_stats['hits'] + llm_cache_stats['misses']} calls, {llm_cache_stats['entries']} stored")
+
+    # hit rates of memoized agent tools in this session
+    for tool, stats in st.session_state.tool_cache.items():
+        tool_hit_rate = stats['hits'] / (stats['hits'] + stats['misses'])
+        st.caption(f"{tool} cache: {tool_hit_rate:.0%} of {stats['hits'] + stats['misses']} calls")
+
+    # traces of recent questions from all sessions
+    st.download_button("Export agent traces", get_trace_store().to_jsonl(), file_name="agent_traces.jsonl",
+                       mime="application/jsonl")
 
 # Initialize chat session in Streamlit if not already present
 if "chat_session" not in st.session_state:
@@ -32,6 +66,10 @@ if "chat_session" not in st.session_state:
     opening_message = "Hello, I'm a helpful chatbot that can help you to explain the data displayed in this dashabord. Please, feel free to ask!"
     st.session_state.chat_session.append({"role": "assistant", "content": opening_message})
 
+# Initialize token budgeted memory used as conversation context for agent
+if "conversation_memory" not in st.session_state:
+    st.session_state.conversation_memory = create_conversation_memory()
+
 # Display the chat history
 for msg in st.session_state.chat_session:
     with st.chat_message(msg["role"]):
@@ -43,27 +81,53 @@ if user_input:
     # Add user's message to chat and display it
     st.chat_message("user").markdown(user_input)
 
-    # Send user's message to Gemini and get the response
-    gemini_response = ask_agent(user_input, st.session_state.chat_session)
-        
-    # Display Gemini's response
+    # Send user's message to Gemini and show agent steps while it works, then stream the answer
+    gemini_response = {}
     with st.chat_message("assistant"):
-        st.markdown(gemini_response['text'])
+        status = st.status("Wait a sec! I'm exploring data and analyzing results.")
+        started = time.perf_counter()
+
+        def answer_stream():
+            for event in stream_agent_answer(user_input, st.session_state.conversation_memory):
+                if event[0] == 'action':
+                    status.update(label=f"{TOOL_LABELS.get(event[1], event[1])}...")
+                elif event[0] == 'step':
+                    _, tool, tool_input, elapsed = event
+                    status.write(f"{TOOL_LABELS.get(tool, tool)} `{tool_input[:80]}` ({elapsed:.1f}s)")
+                elif event[0] == 'token':
+                    yield event[1]
+                elif event[0] == 'result':
+                    gemini_response.update(event[1])
+
+        st.write_stream(answer_stream())
+        if gemini_response.get('text'):
+            status.update(label=f"Answer ready in {time.perf_counter() - started:.1f}s", state="complete",
+                          expanded=False)
+        else:
+            # stream ended without result or with empty answer
+            status.update(label="No answer", state="error", expanded=False)
+            st.error("Agent didn't produce an answer. Please try again or rephrase your question.")
 
     # Add user and assistant messages to the chat history
     st.session_state.chat_session.append({"role": "user", "content": user_input})
-    st.session_state.chat_session.append({"role": "assistant", "content": gemini_response['text']})
+    st.session_state.chat_session.append({"role": "assistant", "content": gemini_response.get('text', '')})
+
+    # Add agent tools cache counters from processing single answer
+    for tool, stats in gemini_response.get('tool_cache', {}).items():
+        session_stats = st.session_state.tool_cache.setdefault(tool, {'hits': 0, 'misses': 0})
+        session_stats['hits'] += stats['hits']
+        session_stats['misses'] += stats['misses']
 
     # Add sql queries log returned from processing single answer
     consolidated_sql_log = ''
-    for log in gemini_response['logs']:
+    for log in gemini_response.get('logs', []):
     
         formatted_sql = sqlparse.format(log, reindent=True, keyword_case='upper')
         sql_with_header = '-- agent query:\n' + formatted_sql + '\n'
         consolidated_sql_log = consolidated_sql_log + sql_with_header
 
-    if consolidated_sql_log != '':
-        st.session_state.queries_log.append(consolidated_sql_log)
+    trace = gemini_response.get('trace')
+    if consolidated_sql_log != '' or (trace and trace['spans']):
+        st.session_state.queries_log.append({'sql': consolidated_sql_log, 'trace': trace})
         log_len = len(st.session_state.queries_log)
-        answer_expander = popover.expander(f"Answer {log_len} logs")
-        answer_expander.code(consolidated_sql_log, language='sql')
\ No newline at end of file
+        show_answer_log(log_len, st.session_state.queries_log[-1])
\ No newline at end of file
@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from langchain.callbacks.base import BaseCallbackHandler
+from src.services.conversation_memory import estimate_tokens
+
+# Per question traces of the data agent - wall time of every LLM and tool call with token usage,
+# retries and parse error recoveries - kept in bounded in-process store and exported as JSONL.
+
+TRACE_STORE_SIZE = 200
+MAX_INPUT_LENGTH = 200
+
+
+def message_text(message):
+    content = getattr(message, 'content', message)
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+class TraceRecorder(BaseCallbackHandler):
+
+    def __init__(self, question):
+        self.question = question
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.open_spans = {}
+        self.spans = []
+        self.parse_recoveries = 0
+        self.lock = threading.Lock()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def open_span(self, run_id, kind, name, **details):
+        with self.lock:
+            self.open_spans[run_id] = {'kind': kind, 'name': name, 'start': self.elapsed(), 'retries': 0, **details}
+
+    def close_span(self, run_id, **details):
+        with self.lock:
+            span = self.open_spans.pop(run_id, None)
+            if span is None:
+                return
+            span['duration'] = self.elapsed() - span['start']
+            span.update(details)
+            self.spans.append(span)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        name = kwargs.get('name') or (serialized or {}).get('name', 'llm')
+        self.open_span(run_id, 'llm', name, prompt_estimate=sum(estimate_tokens(p) for p in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        prompts = [message_text(message) for batch in messages for message in batch]
+        self.on_llm_start(serialized, prompts, run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        # token counts reported by model, estimated from text when model doesn't report usage
+        generations = [generation for batch in response.generations for generation in batch]
+        usage = {}
+        for generation in generations:
+            for key, value in (getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}).items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+
+        with self.lock:
+            span = self.open_spans.get(run_id, {})
+        if usage:
+            tokens = {'prompt_tokens': usage.get('input_tokens', 0), 'completion_tokens': usage.get('output_tokens', 0),
+                      'estimated_tokens': False}
+        else:
+            tokens = {'prompt_tokens': span.get('prompt_estimate', 0),
+                      'completion_tokens': sum(estimate_tokens(g.text) for g in generations),
+                      'estimated_tokens': True}
+        self.close_span(run_id, **tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.close_span(run_id, error=str(error))
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        with self.lock:
+            if run_id in self.open_spans:
+                self.open_spans[run_id]['retries'] += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get('name') or (serialized or {}).get('name', 'tool')
+        self.open_span(run_id, 'tool', name, input=str(input_str)[:MAX_INPUT_LENGTH])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self.close_span(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.close_span(run_id, error=str(error))
+
+    def on_parse_recovery(self, error):
+        # called by AgentWrapper when final answer was recovered from unparsable LLM output
+        self.parse_recoveries += 1
+
+    def finish(self, route='agent', error=None):
+        with self.lock:
+            spans = sorted(self.spans, key=lambda span: span['start'])
+        for span in spans:
+            span.pop('prompt_estimate', None)
+        llm_spans = [span for span in spans if span['kind'] == 'llm']
+        tool_spans = [span for span in spans if span['kind'] == 'tool']
+        return {
+            'question': self.question,
+            'started_at': self.started_at,
+            'route': route,
+            'error': error,
+            'total_time': self.elapsed(),
+            'llm_calls': len(llm_spans),
+            'llm_time': sum(span['duration'] for span in llm_spans),
+            'tool_calls': len(tool_spans),
+            'tool_time': sum(span['duration'] for span in tool_spans),
+            'prompt_tokens': sum(span.get('prompt_tokens', 0) for span in llm_spans),
+            'completion_tokens': sum(span.get('completion_tokens', 0) for span in llm_spans),
+            'retries': sum(span['retries'] for span in spans),
+            'parse_recoveries': self.parse_recoveries,
+            'spans': spans
+        }
+
+
+class TraceStore:
+    # most recent traces of all sessions, oldest are dropped when store is full
+
+    def __init__(self, max_traces=TRACE_STORE_SIZE):
+        self.traces = deque(maxlen=max_traces)
+        self.lock = threading.Lock()
+
+    def add(self, trace):
+        with self.lock:
+            self.traces.append(trace)
+
+    def recent(self, count=None):
+        with self.lock:
+            traces = list(self.traces)
+        return traces if count is None else traces[-count:]
+
+    def to_jsonl(self):
+        return ''.join(json.dumps(trace, default=str) + '\n' for trace in self.recent())
+
+    def export_jsonl(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_jsonl())
+        return path
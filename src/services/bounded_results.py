@@ -0,0 +1,94 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import sqlparse
+from langchain_community.utilities.sql_database import truncate_word
+
+# Bounded result handling - query results are read batch by batch and reading stops at row or
+# byte cap, so a `SELECT *` over a fact table never lands whole in memory or in the agent prompt.
+# Agent gets a preview of first rows with summary statistics of all fetched rows instead.
+
+
+class ResultTooLarge(Exception):
+    pass
+
+
+def ensure_limit(query, limit):
+    # SELECT without top level LIMIT gets one appended, limits inside subqueries and CTEs don't count,
+    # other statements are returned unchanged
+    formatted = sqlparse.format(query, strip_comments=True).strip().rstrip(';').strip()
+    if not formatted:
+        return query
+    statement = sqlparse.parse(formatted)[0]
+    if statement.get_type() != 'SELECT':
+        return query
+    if any(token.is_keyword and token.normalized == 'LIMIT' for token in statement.tokens):
+        return formatted
+    return f"{formatted}\nLIMIT {limit}"
+
+
+def row_batches(result, batch_size):
+    # sqlalchemy result -> arrow tables of at most batch_size rows
+    rows = result.fetchmany(batch_size)
+    if not rows:
+        yield pa.table({column: pa.array([], pa.null()) for column in result.keys()})
+    while rows:
+        yield pa.Table.from_pylist([row._asdict() for row in rows])
+        rows = result.fetchmany(batch_size)
+
+
+def read_bounded(batches, max_rows=None, max_bytes=None):
+    # arrow tables -> (table, truncated), batches after the cap are never fetched
+    kept, rows, nbytes, truncated = [], 0, 0, False
+    for batch in batches:
+        if max_rows is not None and rows + batch.num_rows > max_rows:
+            batch, truncated = batch.slice(0, max_rows - rows), True
+        if max_bytes is not None and nbytes + batch.nbytes > max_bytes:
+            # rows fitting into byte cap estimated from average row size of the batch
+            row_bytes = max(batch.nbytes / max(batch.num_rows, 1), 1)
+            batch, truncated = batch.slice(0, int((max_bytes - nbytes) / row_bytes)), True
+        kept.append(batch)
+        rows += batch.num_rows
+        nbytes += batch.nbytes
+        if truncated:
+            break
+    if not kept:
+        return pa.table({}), False
+    return pa.concat_tables(kept, promote_options='default'), truncated
+
+
+def format_number(value):
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+def column_summary(name, column):
+    nulls = f", nulls={column.null_count}" if column.null_count else ""
+    if pa.types.is_integer(column.type) or pa.types.is_floating(column.type) or pa.types.is_decimal(column.type):
+        low, high = pc.min_max(column).values()
+        stats = [('min', low.as_py()), ('max', high.as_py()), ('mean', pc.mean(column).as_py()),
+                 ('sum', pc.sum(column).as_py())]
+        return f"- {name}: " + ", ".join(f"{stat}={format_number(value)}" for stat, value in stats) + nulls
+    if pa.types.is_null(column.type):
+        return f"- {name}: all null"
+    return f"- {name}: {pc.count_distinct(column).as_py()} distinct values{nulls}"
+
+
+def format_result(table, truncated, preview_rows, max_string_length=300, include_columns=False):
+    # same output as SQLDatabase.run for small complete results, otherwise preview rows followed
+    # by row counts and per column statistics of everything fetched
+    rows = [
+        {column: truncate_word(value, length=max_string_length) for column, value in row.items()}
+        for row in table.slice(0, preview_rows).to_pylist()
+    ]
+    if not include_columns:
+        rows = [tuple(row.values()) for row in rows]
+    if not truncated and table.num_rows <= preview_rows:
+        return str(rows) if rows else ""
+
+    if truncated:
+        notes = [f"Showing first {len(rows)} rows of more than {table.num_rows} - result was cut off, "
+                 f"use WHERE, GROUP BY or aggregate functions to get the rest."]
+    else:
+        notes = [f"Showing first {len(rows)} of {table.num_rows} rows."]
+    notes.append(f"Statistics of {table.num_rows} fetched rows:")
+    notes += [column_summary(name, column) for name, column in zip(table.column_names, table.columns)]
+    return str(rows) + "\n" + "\n".join(notes)
@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import sqlparse
+from sqlparse.tokens import Literal
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import text
+from src.services.bounded_results import ensure_limit, format_result, read_bounded, row_batches
+from src.services.schema_context import format_table_info
+
+# Result of last cache lookup made by current thread - read by callback handler after each agent tool call
+lookup_state = threading.local()
+
+
+def normalize_sql(query):
+    # queries differing only in comments, letter case (outside string literals), whitespace
+    # or trailing semicolon share cache entry - databricks identifiers are case insensitive
+    formatted = sqlparse.format(query, strip_comments=True)
+    tokens = []
+    for token in sqlparse.parse(formatted)[0].flatten() if formatted.strip() else []:
+        if token.is_whitespace:
+            if tokens and tokens[-1] != ' ':
+                tokens.append(' ')
+        elif token.ttype in Literal.String.Single or token.ttype in Literal.String.Symbol:
+            tokens.append(token.value)
+        else:
+            tokens.append(token.value.upper())
+    return ''.join(tokens).strip().rstrip(';').strip()
+
+
+def is_read_query(query):
+    statements = [s for s in sqlparse.parse(query) if s.get_type() != 'UNKNOWN']
+    return len(statements) == 1 and statements[0].get_type() == 'SELECT'
+
+
+class CachingSQLDatabase(SQLDatabase):
+    # SQLDatabase memoizing results of agent tools, shared by all sessions.
+    # Entries are stamped with data version, so results are not reused after tables are rewritten.
+    # With max_result_rows read queries are bounded - LIMIT is injected, results are streamed
+    # up to row and byte caps and anything above preview_rows is summarized.
+
+    def __init__(self, *args, version_provider=None, schema_context_provider=None, cache_max_bytes=20 * 2**20,
+                 max_result_rows=None, max_result_bytes=None, preview_rows=50, fetch_batch_rows=500, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version_provider = version_provider
+        self.schema_context_provider = schema_context_provider
+        self.cache_max_bytes = cache_max_bytes
+        self.max_result_rows = max_result_rows
+        self.max_result_bytes = max_result_bytes
+        self.preview_rows = preview_rows
+        self.fetch_batch_rows = fetch_batch_rows
+        self.columns = (None, None)
+        self.cache = OrderedDict()
+        self.cache_bytes = 0
+        self.cache_lock = threading.Lock()
+        self.tool_stats = {}
+
+    def data_version(self):
+        if self.version_provider is None:
+            return None
+        try:
+            return repr(sorted(self.version_provider().items()))
+        except Exception:
+            return None
+
+    def memoized(self, tool, key, compute):
+        version = self.data_version()
+        key = (tool, key, version)
+
+        with self.cache_lock:
+            stats = self.tool_stats.setdefault(tool, {'hits': 0, 'misses': 0})
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                stats['hits'] += 1
+                lookup_state.hit = True
+                return self.cache[key]
+            stats['misses'] += 1
+            lookup_state.hit = False
+
+        result = compute()
+        # errors and results of unknown data version are not remembered
+        if version is None or not isinstance(result, str) or result.startswith('Error:'):
+            return result
+
+        with self.cache_lock:
+            if key not in self.cache:
+                self.cache[key] = result
+                self.cache_bytes += len(result)
+            while self.cache_bytes > self.cache_max_bytes and self.cache:
+                _, evicted = self.cache.popitem(last=False)
+                self.cache_bytes -= len(evicted)
+        return result
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        run = lambda: super(CachingSQLDatabase, self).run(
+            command, fetch, include_columns, parameters=parameters, execution_options=execution_options
+        )
+        if not isinstance(command, str) or parameters or execution_options or not is_read_query(command):
+            return run()
+        if fetch == "all" and self.max_result_rows:
+            run = lambda: self.run_bounded(command, include_columns)
+        return self.memoized('sql_db_query', (normalize_sql(command), fetch, include_columns), run)
+
+    def run_bounded(self, command, include_columns=False):
+        # one row above the cap is requested, so a cut off result is told apart from an exact fit
+        query = ensure_limit(command, self.max_result_rows + 1)
+        with self._engine.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(text(query))
+            try:
+                table, truncated = read_bounded(
+                    row_batches(result, self.fetch_batch_rows), self.max_result_rows, self.max_result_bytes
+                )
+                return format_result(table, truncated, self.preview_rows, self._max_string_length, include_columns)
+            except (pa.ArrowException, ValueError, TypeError) as e:
+                # rows arrow can't hold (mixed types in one column) go back to agent like database errors
+                # of run_no_throw instead of failing the tool call
+                return f"Error: result could not be read - {type(e).__name__}: {e}"
+            finally:
+                result.close()
+
+    def get_table_info(self, table_names=None, get_col_comments=False):
+        key = (tuple(sorted(table_names)) if table_names else None, get_col_comments)
+        return self.memoized('sql_db_schema', key, lambda: self.table_info(table_names, get_col_comments))
+
+    def table_columns(self):
+        # {table: [column names]} for query validation - from schema context when there is one,
+        # otherwise reflected once per data version
+        version = self.data_version()
+        cached_version, columns = self.columns
+        if columns is not None and cached_version == version:
+            return columns
+
+        context = self.schema_context()
+        if context is not None:
+            columns = {name: [column['name'] for column in table['columns']] for name, table in context['tables'].items()}
+        else:
+            columns = {
+                name: [column['name'] for column in self._inspector.get_columns(name, schema=self._schema)]
+                for name in self.get_usable_table_names()
+            }
+        self.columns = (version, columns)
+        return columns
+
+    def schema_context(self):
+        if self.schema_context_provider is None:
+            return None
+        try:
+            return self.schema_context_provider()
+        except Exception:
+            return None
+
+    def table_info(self, table_names, get_col_comments):
+        # tables from persisted schema context are served without reflection,
+        # only tables never seen before are reflected lazily from database
+        context = self.schema_context()
+        if context is None:
+            return super().get_table_info(table_names, get_col_comments)
+
+        table_names = table_names or sorted(context['tables'])
+        known = [name for name in table_names if name in context['tables']]
+        unknown = [name for name in table_names if name not in context['tables']]
+
+        infos = [format_table_info(context, known)] if known else []
+        if unknown:
+            infos.append(super().get_table_info(unknown, get_col_comments))
+        return "\n\n".join(infos)
+
+    def cache_stats(self):
+        with self.cache_lock:
+            return {
+                'entries': len(self.cache),
+                'bytes': self.cache_bytes,
+                'tools': {tool: dict(stats) for tool, stats in self.tool_stats.items()}
+            }
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Bounded pool of warehouse connections shared by all streamlit sessions.
+# Every session thread checks out its own connection, so cursors are never opened on one connection
+# from different threads. Connections are validated before reuse, replaced after max lifetime
+# and re-created with backoff when warehouse drops them.
+
+class PoolTimeout(Exception):
+    pass
+
+
+def ping_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+
+
+class PooledConnection:
+    # proxy returned to callers - close() gives connection back to pool instead of closing it
+
+    def __init__(self, pool, connection, created_at):
+        self._pool = pool
+        self._connection = connection
+        self.created_at = created_at
+        self.last_used = time.monotonic()
+        self.suspect = False
+        self.checked_out = False
+
+    def close(self):
+        if self.checked_out:
+            self._pool.checkin(self)
+
+    def __getattr__(self, name):
+        # Delegate other methods to the wrapped connection
+        return getattr(self._connection, name)
+
+
+class ConnectionPool:
+
+    def __init__(self, connect, max_size=5, checkout_timeout=30, max_lifetime=3600, idle_timeout=60,
+                 pre_ping=False, ping=ping_connection, max_retries=3, backoff=0.5):
+        self.connect = connect
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.pre_ping = pre_ping
+        self.ping = ping
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.condition = threading.Condition()
+        self.idle = []              # last returned connection is reused first
+        self.size = 0               # idle + checked out + being created
+        self.queue = deque()        # sessions waiting for connection
+        self.counters = {
+            'checkouts': 0, 'timeouts': 0, 'created': 0, 'reconnects': 0, 'failed_pings': 0,
+            'expired': 0, 'total_wait_time': 0.0, 'max_wait_time': 0.0
+        }
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.checkout(timeout)
+        try:
+            yield connection
+        except Exception:
+            # error can come from query itself or from dead connection - validate before next use
+            connection.suspect = True
+            raise
+        finally:
+            self.checkin(connection)
+
+    def checkout(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            connection = None
+            with self.condition:
+                # waiting sessions are served in order of arrival, so no session is starved
+                ticket = object()
+                self.queue.append(ticket)
+                try:
+                    while self.queue[0] is not ticket or (not self.idle and self.size >= self.max_size):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.counters['timeouts'] += 1
+                            raise PoolTimeout(f"No database connection available within {timeout}s")
+                        self.condition.wait(remaining)
+                finally:
+                    self.queue.remove(ticket)
+                    self.condition.notify_all()
+
+                if self.idle:
+                    connection = self.idle.pop()
+                else:
+                    # reserve slot, connection itself is created outside of lock
+                    self.size += 1
+
+            if connection is None:
+                connection = self.create()
+            elif not self.validate(connection):
+                continue
+
+            waited = time.monotonic() - start
+            with self.condition:
+                self.counters['checkouts'] += 1
+                self.counters['total_wait_time'] += waited
+                self.counters['max_wait_time'] = max(self.counters['max_wait_time'], waited)
+            connection.checked_out = True
+            return connection
+
+    def checkin(self, connection):
+        if not connection.checked_out:
+            return
+        connection.checked_out = False
+        connection.last_used = time.monotonic()
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify_all()
+
+    def validate(self, connection):
+        # expired or broken connection is discarded and its slot released - caller tries again
+        now = time.monotonic()
+        if now - connection.created_at > self.max_lifetime:
+            self.count('expired')
+            self.discard(connection)
+            return False
+
+        if self.pre_ping or connection.suspect or now - connection.last_used > self.idle_timeout:
+            try:
+                self.ping(connection._connection)
+                connection.suspect = False
+            except Exception:
+                self.count('failed_pings')
+                self.count('reconnects')
+                self.discard(connection)
+                return False
+
+        return True
+
+    def create(self):
+        # reconnect with exponential backoff, slot is released when all attempts failed
+        for attempt in range(self.max_retries):
+            try:
+                raw_connection = self.connect()
+                self.count('created')
+                return PooledConnection(self, raw_connection, time.monotonic())
+            except Exception:
+                if attempt == self.max_retries - 1:
+                    self.release_slot()
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def count(self, counter):
+        with self.condition:
+            self.counters[counter] += 1
+
+    def discard(self, connection):
+        try:
+            connection._connection.close()
+        except Exception:
+            pass
+        self.release_slot()
+
+    def release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify_all()
+
+    def sqlalchemy_creator(self):
+        # creator for sqlalchemy engine with NullPool - engine closing connection returns it to this pool
+        return self.checkout
+
+    def watch_engine(self, engine):
+        # engine closes invalidated connections (disconnect errors) the same way as healthy ones,
+        # its invalidate event comes first and marks them for validation before next use
+        from sqlalchemy import event
+        event.listen(engine, 'invalidate', self.invalidated)
+
+    def invalidated(self, connection, connection_record=None, exception=None):
+        if isinstance(connection, PooledConnection):
+            connection.suspect = True
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self.condition:
+            checkouts = self.counters['checkouts']
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiters': len(self.queue),
+                'avg_wait_time': self.counters['total_wait_time'] / checkouts if checkouts else 0.0,
+                **self.counters
+            }
@@ -0,0 +1,141 @@
+# Token budgeted conversation memory for the data agent.
+# Last turns are replayed verbatim, older turns are folded into rolling summary updated incrementally
+# by the LLM and SQL already executed is kept as compact list, so prompt size stays flat no matter
+# how long conversation is. Turns are folded in batches - only once fold_batch turns above recent_turns
+# piled up or turns don't fit their budget, and then down to half of it - one LLM call per batch.
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Progressively summarize the conversation between a user and a data analyst assistant, "
+    "adding onto the previous summary and returning a new summary. Keep facts, numbers, countries, "
+    "years and metrics the user asked about. Use at most {max_words} words.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New lines of conversation:\n{new_lines}\n\n"
+    "New summary:"
+)
+
+# pronouns and openings of questions that refer to earlier turns
+FOLLOW_UP_PATTERN = re.compile(
+    r'\b(it|its|they|them|their|those|these|that|this|there|he|she|his|her|same|also|too|instead|'
+    r'else|previous|above|former|latter|then)\b|^(and|but|or|what about|how about|compared)\b'
+)
+
+
+def is_follow_up(question):
+    text = ' '.join(re.sub(r'[^\w\s%]', ' ', question.lower()).split())
+    return bool(FOLLOW_UP_PATTERN.search(text))
+
+
+def estimate_tokens(text):
+    # rough estimate of ~4 characters per token, good enough for budgeting without tokenizer calls
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, max_tokens, count_tokens=estimate_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split(' ')
+    while words and count_tokens(' '.join(words) + ' ...') > max_tokens:
+        words = words[:-max(1, len(words) // 10)]
+    return ' '.join(words) + ' ...'
+
+
+class ConversationMemory:
+
+    def __init__(self, llm=None, token_budget=1500, recent_turns=3, fold_batch=3, summary_share=0.4, sql_share=0.2,
+                 max_sql=5, count_tokens=estimate_tokens):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.fold_batch = fold_batch
+        self.summary_budget = int(token_budget * summary_share)
+        self.sql_budget = int(token_budget * sql_share)
+        self.max_sql = max_sql
+        self.count_tokens = count_tokens
+
+        self.summary = ""
+        self.turns = []             # verbatim (question, answer) pairs not folded into summary yet
+        self.questions = []         # all questions asked in conversation
+        self.executed_sql = []      # distinct executed queries, most recent last
+        self.summary_calls = 0
+        self.summary_failures = 0
+
+    def add_turn(self, question, answer, sql=None):
+        self.questions.append(question)
+        self.turns.append((question, answer))
+        for query in sql or []:
+            compact = ' '.join(query.split())
+            if compact in self.executed_sql:
+                self.executed_sql.remove(compact)
+            self.executed_sql.append(compact)
+        self.executed_sql = self.executed_sql[-self.max_sql:]
+
+        # turns have budget left after summary and sql, oldest ones are folded once too many piled up
+        turns_budget = self.token_budget - self.summary_budget - self.sql_budget
+        if len(self.turns) < self.recent_turns + self.fold_batch \
+                and self.count_tokens(self.format_turns(self.turns)) <= turns_budget:
+            return
+        folded = 0
+        while len(self.turns) - folded > 1 and (
+            len(self.turns) - folded > self.recent_turns
+            or self.count_tokens(self.format_turns(self.turns[folded:])) > turns_budget // 2
+        ):
+            folded += 1
+        if self.fold(self.turns[:folded]):
+            self.turns = self.turns[folded:]
+
+    def fold(self, turns):
+        # -> whether turns made it into summary, failed LLM call keeps them verbatim for next attempt
+        if not turns:
+            return False
+        new_lines = self.format_turns(turns)
+        if self.llm is None:
+            summary = f"{self.summary}\n{new_lines}".strip()
+        else:
+            prompt = SUMMARY_PROMPT.format(
+                max_words=int(self.summary_budget * 0.75),
+                summary=self.summary or "(empty)",
+                new_lines=new_lines
+            )
+            self.summary_calls += 1
+            try:
+                result = self.llm.invoke(prompt)
+            except Exception:
+                self.summary_failures += 1
+                logger.warning("Summarizing %d conversation turns failed, keeping them verbatim", len(turns),
+                               exc_info=True)
+                return False
+            summary = getattr(result, 'content', result).strip()
+        self.summary = truncate_to_tokens(summary, self.summary_budget, self.count_tokens)
+        return True
+
+    def has_context(self):
+        return bool(self.turns or self.summary)
+
+    @staticmethod
+    def format_turns(turns):
+        return ''.join(f"Human: {question}\nAI: {answer}\n" for question, answer in turns)
+
+    def render(self, new_question):
+        # prompt for agent with compact context in front of new question
+        sections = []
+        if self.summary:
+            sections.append(f"Summary of earlier conversation:\n{self.summary}")
+        if self.executed_sql:
+            sql_lines = '\n'.join(f"- {query}" for query in self.executed_sql)
+            sections.append("SQL queries already executed:\n" + truncate_to_tokens(sql_lines, self.sql_budget,
+                                                                                     self.count_tokens))
+        if self.turns:
+            turns_budget = self.token_budget - self.summary_budget - self.sql_budget
+            turns = truncate_to_tokens(self.format_turns(self.turns), turns_budget, self.count_tokens)
+            sections.append(f"Previous conversation:\n{turns}")
+
+        if not sections:
+            return new_question
+        return '\n\n'.join(sections) + f"\nNew question: {new_question}"
+
+    def context_tokens(self):
+        return self.count_tokens(self.render(''))
@@ -0,0 +1,82 @@
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Process-wide read-only store of query results shared by all sessions. st.cache_data pickles every
+# result and gives each caller its own deserialized copy, here every result is one immutable Arrow
+# table with compact types (dictionary encoded dimensions, int16 years, float32 measures) and every
+# session gets the same table - numpy views of its buffers instead of copies.
+
+# Low cardinality dimension columns stored as dictionary codes
+DICTIONARY_COLUMNS = ['Country_Code', 'Financing_type', 'Sex', 'Age_Group', 'Health_Assesement']
+YEAR_COLUMN = 'Year'
+
+
+def compact_type(name, column):
+    if name in DICTIONARY_COLUMNS and pa.types.is_string(column.type):
+        return pa.dictionary(pa.int16(), pa.string())
+    if name == YEAR_COLUMN:
+        return pa.int16()
+    if pa.types.is_floating(column.type) or pa.types.is_decimal(column.type):
+        return pa.float32()
+    if pa.types.is_integer(column.type):
+        low, high = pc.min_max(column).values()
+        if low.as_py() is None or (-2**31 <= low.as_py() and high.as_py() < 2**31):
+            return pa.int32()
+    return column.type
+
+
+def compact_table(table):
+    # new table with compact types - schema metadata is dropped, unchanged columns keep their buffers
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        target = compact_type(name, column)
+        columns.append(column if column.type == target else column.cast(target))
+    return pa.table(columns, names=table.column_names)
+
+
+class DataStore:
+
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.loading = {}
+        self.hits = 0
+        self.misses = 0
+        # bumped by every clear, results built from stored tables can be cached under it
+        self.generation = 0
+
+    def get(self, key, load):
+        # load() -> pyarrow.Table runs once per key even when several sessions ask at the same time
+        with self.lock:
+            if key in self.tables:
+                self.hits += 1
+                return self.tables[key]
+            key_lock = self.loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self.lock:
+                if key in self.tables:
+                    self.hits += 1
+                    return self.tables[key]
+            table = compact_table(load())
+            with self.lock:
+                self.tables[key] = table
+                self.loading.pop(key, None)
+                self.misses += 1
+            return table
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'tables': len(self.tables),
+                'bytes': sum(table.nbytes for table in self.tables.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
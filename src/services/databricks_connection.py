@@ -1,44 +1,229 @@
 from databricks import sql
 from databricks.sql.types import Row
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+from src.services.snapshot_cache import SnapshotCache
+from src.services.connection_pool import ConnectionPool
+from src.services.data_store import DataStore
+from src.services.bounded_results import ResultTooLarge, read_bounded
 
-# Initialize connection with databricks client using credentials
+# Connections to SQL Warehouse kept open for concurrent sessions and max wait time for free connection
+POOL_SIZE = 8
+POOL_CHECKOUT_TIMEOUT = 30
+
+# Max time page waits for batch of concurrently executed queries
+QUERY_BATCH_TIMEOUT = 120
+
+# Local directory for parquet-like arrow snapshots of warehouse query results
+SNAPSHOT_DIR = '.snapshots'
+SNAPSHOT_MAX_BYTES = 2 * 2**30
+
+# Seconds query results stay in st.cache_data before they are read again from snapshot cache
+QUERY_CACHE_TTL = 300
+
+# Caps of query results streamed from warehouse - larger results are rejected before they fill memory
+QUERY_MAX_ROWS = 5_000_000
+QUERY_MAX_BYTES = 1 * 2**30
+FETCH_BATCH_ROWS = 100_000
+
+# Low cardinality dimension columns converted to pandas categoricals in arrow fetch mode
+CATEGORICAL_COLUMNS = ['Country_Code', 'Financing_type', 'Sex', 'Age_Group', 'Health_Assesement']
+
+# Initialize pool of connections with databricks client using credentials - shared by all sessions,
+# each session thread checks out its own connection and dead connections are replaced automatically
 
 @st.cache_resource(show_spinner="Establishing Databricks connection...")
-def get_databricks_client():
+def get_databricks_client(bricks_catalog = "workspace", bricks_schema = "eurostat"):
     try:
         server_hostname = st.secrets['DATABRICKS_WORKSPACE']
         http_path = st.secrets['DATABRICKS_SQL_WAREHOUSE']
         access_token = st.secrets['DATABRICKS_PAT']
 
-        bricks_client = sql.connect(
-            server_hostname = server_hostname,
-            http_path = http_path,
-            access_token = access_token
+        bricks_pool = ConnectionPool(
+            connect = lambda: sql.connect(
+                server_hostname = server_hostname,
+                http_path = http_path,
+                access_token = access_token,
+                # sqlalchemy engine gets connections from pool creator, so its url catalog and schema aren't applied
+                catalog = bricks_catalog,
+                schema = bricks_schema
+            ),
+            max_size = POOL_SIZE,
+            checkout_timeout = POOL_CHECKOUT_TIMEOUT
         )
-        return bricks_client
-    
+        # opening first connection right away surfaces wrong credentials early
+        bricks_pool.checkout().close()
+        return bricks_pool
+
     except Exception as e:
         st.error(f"Underlying connection error with Databricks: {e}")
         return None
 
+# Convert fetched results into pandas dataframe - row by row (legacy) or columnar with arrow batches
+
+def fetch_as_dicts(cursor):
+    result = []
+    for row in cursor.fetchall():
+        result.append(row.asDict())
+    return pd.DataFrame(result)
+
+def fetch_as_arrow(cursor, batch_size=None):
+    return arrow_to_pandas(fetch_arrow_table(cursor, batch_size))
+
+def arrow_batches(cursor, batch_size):
+    # collecting arrow batches only references their buffers, no data is copied here
+    batch = cursor.fetchmany_arrow(batch_size)
+    if batch.num_rows == 0:
+        yield batch
+    while batch.num_rows > 0:
+        yield batch
+        batch = cursor.fetchmany_arrow(batch_size)
+
+def fetch_arrow_table(cursor, batch_size=None, max_rows=None, max_bytes=None):
+    if max_rows is not None or max_bytes is not None:
+        # streamed batch by batch, fetching stops at first batch above the caps
+        table, truncated = read_bounded(arrow_batches(cursor, batch_size or FETCH_BATCH_ROWS), max_rows, max_bytes)
+        if truncated:
+            raise ResultTooLarge(f"Query result exceeds {max_rows} rows or {max_bytes} bytes")
+        return table
+
+    if batch_size:
+        return pa.concat_tables(list(arrow_batches(cursor, batch_size)))
+
+    return cursor.fetchall_arrow()
+
+def arrow_to_pandas(table, categorical_columns=CATEGORICAL_COLUMNS):
+    # dates and decimals are kept as python objects, dimension columns become categoricals,
+    # split_blocks and self_destruct let pandas take over arrow buffers without consolidation copies
+    categories = [c for c in table.column_names if c in categorical_columns]
+    df = table.to_pandas(
+        categories = categories,
+        date_as_object = True,
+        split_blocks = True,
+        self_destruct = True
+    )
+    # arrow dictionaries keep order of appearance, sorting categories keeps sort_values alphabetical
+    for column in categories:
+        df[column] = df[column].cat.reorder_categories(sorted(df[column].cat.categories))
+    return df
+
+# Query results and delta versions of tables read directly from warehouse - used by snapshot cache
+
+def run_arrow_query(client, pushdown_query, parameters=None, max_rows=QUERY_MAX_ROWS, max_bytes=QUERY_MAX_BYTES):
+    with client.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(pushdown_query, parameters or None)
+        return fetch_arrow_table(cursor, max_rows=max_rows, max_bytes=max_bytes)
+
+def get_table_version(client, table_name):
+    with client.connection() as connection, connection.cursor() as cursor:
+        cursor.execute(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+        return cursor.fetchall_arrow().column('version')[0].as_py()
+
+# Snapshots served from local disk at startup and revalidated in background against delta versions
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_cache():
+    client = get_databricks_client()
+    if client:
+        return SnapshotCache(
+            directory = SNAPSHOT_DIR,
+            run_query = lambda query, parameters: run_arrow_query(client, query, parameters),
+            table_version = lambda table_name: get_table_version(client, table_name),
+            # new data is picked up by next call instead of in-memory cached result, clearing data store
+            # also rebuilds dashboard cubes keyed by its generation
+            on_refresh = lambda query, parameters: (execute_sql_query.clear(), get_data_store().clear()),
+            max_bytes = SNAPSHOT_MAX_BYTES
+        )
+
 # Execute SQL query using established connection to Datbricks Warehouse
 
-@st.cache_data(show_spinner="Executing SQL query...") 
-def execute_sql_query(pushdown_query):
+@st.cache_data(show_spinner="Executing SQL query...", ttl=QUERY_CACHE_TTL)
+def execute_sql_query(pushdown_query, parameters=None, fetch_mode="arrow"):
+    # cached per query text and parameters, so every filter combination is fetched only once per ttl -
+    # expired result is read again from snapshot, which starts its revalidation
     client = get_databricks_client()
     if client:
         try:
-            with client.cursor() as cursor:
-                result = []
-                cursor.execute(pushdown_query)
-                for row in cursor.fetchall():
-                    result.append(row.asDict())
+            if fetch_mode == "arrow":
+                table = get_snapshot_cache().get(pushdown_query, parameters)
+                return arrow_to_pandas(table)
+
+            with client.connection() as connection, connection.cursor() as cursor:
+                cursor.execute(pushdown_query, parameters or None)
+                df = fetch_as_dicts(cursor)
 
-            df = pd.DataFrame(result)
             return df
 
         except Exception as e:
             st.error(f"Error while fetching data: {e}")
             return pd.DataFrame()
+
+# Shared read-only query results - one compact arrow table per query for all sessions, nothing is copied
+
+@st.cache_resource(show_spinner=False)
+def get_data_store():
+    return DataStore()
+
+def fetch_shared_table(pushdown_query, parameters=None):
+    key = get_snapshot_cache().snapshot_path(pushdown_query, parameters).stem
+    return get_data_store().get(key, lambda: get_snapshot_cache().get(pushdown_query, parameters))
+
+def revalidate_snapshots(queries):
+    # queries: {name: (query, parameters)} - results held by data store don't reach snapshot cache again,
+    # so every page load starts throttled version check of their snapshots, changed delta version
+    # refreshes the snapshot and clears the store for next rerun
+    snapshot_cache = get_snapshot_cache()
+    if snapshot_cache:
+        for query, parameters in queries.values():
+            snapshot_cache.revalidate(query, parameters)
+
+# Execute batch of SQL queries concurrently - page waits only as long as the slowest query
+
+@st.cache_resource(show_spinner=False)
+def get_query_executor():
+    return ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="sql-query")
+
+def execute_sql_queries(queries, timeout=QUERY_BATCH_TIMEOUT, execute=execute_sql_query):
+    # queries: {name: (query, parameters)} -> {name: result of execute}, every query still cached on its own
+    # and failed or timed out query gives None without affecting the others,
+    # execute=fetch_shared_table gives shared arrow tables instead of dataframes
+    script_context = get_script_run_ctx()
+
+    def run_in_session(query, parameters):
+        # worker thread is attached to session while query runs, so spinners and errors are shown on
+        # calling page - pooled thread gets its previous context back for the next task
+        current_thread = threading.current_thread()
+        previous_context = get_script_run_ctx(suppress_warning=True)
+        add_script_run_ctx(current_thread, script_context)
+        try:
+            return execute(query, parameters)
+        finally:
+            if previous_context is None:
+                current_thread.__dict__.pop(SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+            else:
+                add_script_run_ctx(current_thread, previous_context)
+
+    executor = get_query_executor()
+    futures = {
+        name: executor.submit(run_in_session, query, parameters)
+        for name, (query, parameters) in queries.items()
+    }
+    done, _ = wait(futures.values(), timeout=timeout)
+
+    results = {}
+    for name, future in futures.items():
+        results[name] = None
+        if future not in done:
+            future.cancel()
+            st.warning(f"Query '{name}' did not finish within {timeout} seconds")
+        elif future.exception():
+            st.error(f"Error while fetching data for '{name}': {future.exception()}")
+        else:
+            results[name] = future.result()
+
+    return results
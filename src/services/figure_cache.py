@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Serialized plotly figures keyed on content hash of chart input frame and chart parameters.
+# Streamlit reruns with unchanged chart inputs (e.g. after unrelated widget change) render stored
+# figure json instead of building figure with its shapes, annotations and layout again.
+
+
+def frame_hash(df):
+    # one vectorized hash per row plus column names and types - no per cell python work
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+class FigureCache:
+
+    def __init__(self, max_entries=128, max_bytes=50 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            figure_json = self.entries.get(key)
+            if figure_json is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return figure_json
+
+    def put(self, key, figure_json):
+        with self.lock:
+            if key in self.entries:
+                self.bytes -= len(self.entries.pop(key))
+            self.entries[key] = figure_json
+            self.bytes += len(figure_json)
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -1,22 +1,117 @@
 import streamlit as st
 import os
+import re
+import json
+import time
+import hashlib
+import queue
+import sqlite3
+import threading
+from pathlib import Path
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
-from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
-from langchain_community.utilities import SQLDatabase
+from src.services.cached_sql_database import CachingSQLDatabase, lookup_state
 from langchain.callbacks.base import BaseCallbackHandler
+from sqlalchemy.pool import NullPool
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from src.services.databricks_connection import get_databricks_client, get_snapshot_cache, run_arrow_query
+from src.services.schema_context import build_schema_context, load_schema_context, save_schema_context
+from src.services.conversation_memory import ConversationMemory
+from src.services.question_router import route_question
+from src.services.agent_tracing import TraceRecorder, TraceStore
+from src.services.sql_validator import ValidatingSQLToolkit
+from src.services.llm_cache import PersistentLLMCache, StreamingCacheMixin
+from src.services.queries.query_builder import METRIC_COLUMNS
+
+# Tables agent can query - their delta versions stamp cached answers
+AGENT_TABLES = [
+    'workspace.eurostat.healthcare_expenditure',
+    'workspace.eurostat.own_health_assesement',
+    'workspace.eurostat.dim_countries',
+    'workspace.eurostat.gold_expenditure',
+    'workspace.eurostat.gold_health_assesement',
+    'workspace.eurostat.gold_bad_health'
+]
+
+# Answers shared between sessions, kept on disk so they survive app restarts
+ANSWER_CACHE_PATH = '.agent_cache/answers.sqlite'
+ANSWER_CACHE_SIZE = 500
+ANSWER_CACHE_TTL = 7 * 24 * 3600
+
+# Gemini responses shared between sessions and app restarts, namespaced by versions of agent tables
+LLM_CACHE_PATH = '.agent_cache/llm_responses.sqlite'
+LLM_CACHE_MAX_BYTES = 50 * 2**20
+
+# Max size of conversation context added to every agent prompt
+CONVERSATION_TOKEN_BUDGET = 1500
+
+# Caps of agent query results - LIMIT is injected into queries without one, result rows above
+# the preview are summarized with column statistics instead of being pasted into the prompt
+AGENT_MAX_ROWS = 1000
+AGENT_MAX_BYTES = 2 * 2**20
+AGENT_PREVIEW_ROWS = 50
+
+# Persisted table definitions, comments and sample rows served by agent's schema tool
+SCHEMA_CONTEXT_PATH = '.agent_cache/schema_context.json'
+
+# Agent steps shown in chat while agent works
+TOOL_LABELS = {
+    'sql_db_list_tables': 'Listing tables',
+    'sql_db_schema': 'Reading table schema',
+    'sql_db_query': 'Running SQL'
+}
+
+# ReAct LLM output after this marker is streamed to chat as final answer
+FINAL_ANSWER_MARKER = 'Final Answer:'
+
+class CachedChatGoogleGenerativeAI(StreamingCacheMixin, ChatGoogleGenerativeAI):
+    # Gemini chat model reading its cache on streamed agent calls too
+    pass
+
+@st.cache_resource(show_spinner=False)
+def get_llm_cache():
+    # prompts carry table schemas and query results, so responses are valid only for the same table versions
+    return PersistentLLMCache(
+        LLM_CACHE_PATH,
+        max_bytes = LLM_CACHE_MAX_BYTES,
+        namespace_provider = get_data_version_key
+    )
 
 @st.cache_resource(show_spinner="Connecting to Gemini LLM...")
 def get_gemini_llm(gemini_version="gemini-2.5-flash"):
     try:
         os.environ["GOOGLE_API_KEY"] = st.secrets['GOOGLE_API_KEY']
-        llm = ChatGoogleGenerativeAI(model=gemini_version)
+        # streaming=True makes non-streamed calls go through `_stream` too, so every response fires token callbacks
+        llm = CachedChatGoogleGenerativeAI(model=gemini_version, cache=get_llm_cache(), streaming=True)
         return llm
     
     except Exception as e:
         st.error(f"Error while calling Gemini API: {e}")
         return None
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def read_schema_context(modified, data_version):
+    # parsed artifact is reused until its file is rewritten or tables get new versions
+    return load_schema_context(SCHEMA_CONTEXT_PATH, data_version)
+
+def get_schema_context(bricks_catalog = "workspace", bricks_schema = "eurostat"):
+    # artifact is rebuilt only when source tables got new delta version
+    data_version = get_data_version()
+    try:
+        context = read_schema_context(os.stat(SCHEMA_CONTEXT_PATH).st_mtime_ns, data_version)
+    except FileNotFoundError:
+        context = None
+    if context is None:
+        bricks_pool = get_databricks_client()
+        context = build_schema_context(
+            run_query = lambda query: run_arrow_query(bricks_pool, query),
+            catalog = bricks_catalog,
+            schema = bricks_schema
+        )
+        context['data_version'] = data_version
+        save_schema_context(context, SCHEMA_CONTEXT_PATH)
+    return context
+
 @st.cache_resource(show_spinner="Establishing Databricks connection...")    
 def get_database_connection(bricks_catalog = "workspace", bricks_schema = "eurostat"):
     try:
@@ -24,15 +119,28 @@ def get_database_connection(bricks_catalog = "workspace", bricks_schema = "euros
         warehouse_id = st.secrets['DATABRICKS_SQL_WAREHOUSE'].split('/')[-1]
         access_token = st.secrets['DATABRICKS_PAT']
 
-        # initializing Langchain's SQL database class based on databricks connection
-        db = SQLDatabase.from_databricks(
+        # connections are borrowed from shared databricks pool (validated and reconnected there),
+        # sqlalchemy's own pooling is disabled so closing connection gives it back to shared pool
+        bricks_pool = get_databricks_client()
+
+        # initializing Langchain's SQL database class based on databricks connection,
+        # results of agent's queries and schema lookups are memoized until tables change
+        db = CachingSQLDatabase.from_databricks(
             catalog = bricks_catalog,
             schema = bricks_schema,
             host = host_url,
             api_token = access_token,
             warehouse_id = warehouse_id,
-            engine_args = {"pool_pre_ping": True}
+            engine_args = {"creator": bricks_pool.sqlalchemy_creator(), "poolclass": NullPool},
+            # tables are not reflected at startup, schema tool is served from persisted schema context
+            lazy_table_reflection = True,
+            version_provider = get_data_version,
+            max_result_rows = AGENT_MAX_ROWS,
+            max_result_bytes = AGENT_MAX_BYTES,
+            preview_rows = AGENT_PREVIEW_ROWS,
+            schema_context_provider = lambda: get_schema_context(bricks_catalog, bricks_schema)
         )
+        bricks_pool.watch_engine(db._engine)
         return db
     
     except Exception as e:
@@ -47,13 +155,17 @@ def create_ai_agent():
 
     if llm and db:
         try:
-            # tools avaialble to agent: sql_db_query, sql_db_schema, sql_db_list_tables, sql_db_query_checker
-            toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+            # tools avaialble to agent: sql_db_query, sql_db_schema, sql_db_list_tables - queries are validated
+            # locally against table schemas instead of LLM based sql_db_query_checker,
+            # dashboard metric labels are reported with their column names
+            toolkit = ValidatingSQLToolkit(db=db, llm=llm, column_aliases=METRIC_COLUMNS)
             # initializng Langchain agent
+            # agent steps call llm.stream, so final answer tokens reach AgentEventHandler as they come
             my_agent = create_sql_agent(
                 llm=llm,
                 toolkit=toolkit,
-                verbose=False
+                verbose=False,
+                stream_runnable=True
             )
             return my_agent
         except Exception as e:
@@ -64,11 +176,69 @@ class SQLHandler(BaseCallbackHandler):
 
     def __init__(self):
         self.sql_result = []
+        self.tool_cache = {}
 
     def on_agent_action(self, action, **kwargs):
         if action.tool in ["sql_db_query"]:
             self.sql_result.append(action.tool_input)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        lookup_state.hit = None
+
+    def on_tool_end(self, output, **kwargs):
+        # count whether memoized database served the tool call (tools not using database are skipped)
+        hit = getattr(lookup_state, 'hit', None)
+        if hit is not None:
+            stats = self.tool_cache.setdefault(kwargs.get('name', 'unknown'), {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
         
+class AgentEventHandler(BaseCallbackHandler):
+    # pushes agent steps and final answer tokens to queue read by streamlit script thread
+
+    def __init__(self, events):
+        self.events = events
+        self.running_tools = {}
+        self.llm_output = ''
+        self.answering = False
+        self.answer_started = False
+        self.streamed = False
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.llm_output = ''
+        self.answering = False
+        self.answer_started = False
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_llm_start(serialized, [], **kwargs)
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not self.answering:
+            self.llm_output += token
+            if FINAL_ANSWER_MARKER not in self.llm_output:
+                return
+            self.answering = True
+            token = self.llm_output.split(FINAL_ANSWER_MARKER, 1)[1]
+        # whitespace after marker is skipped, so answer starts with its first word
+        if not self.answer_started:
+            token = token.lstrip()
+            self.answer_started = bool(token)
+        if token:
+            self.streamed = True
+            self.events.put(('token', token))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        tool = kwargs.get('name') or (serialized or {}).get('name', 'unknown')
+        self.running_tools[run_id] = (tool, input_str, time.perf_counter())
+        self.events.put(('action', tool, input_str))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        if run_id in self.running_tools:
+            tool, input_str, started = self.running_tools.pop(run_id)
+            self.events.put(('step', tool, input_str, time.perf_counter() - started))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.on_tool_end(None, run_id=run_id, **kwargs)
+
 class AgentWrapper:
     
     def __init__(self, agent):
@@ -84,51 +254,233 @@ class AgentWrapper:
                 error_str = str(e).split("Could not parse LLM output")[1]
                 response_start, response_end = error_str.find("`"), error_str.rfind("`")
                 llm_response = error_str[response_start+1:response_end]
+                for callback in callbacks or []:
+                    if hasattr(callback, 'on_parse_recovery'):
+                        callback.on_parse_recovery(e)
                 return llm_response
             raise e
+
+    def stream(self, query, callbacks=None):
+        # agent runs in background thread, its events are yielded as they come:
+        # ('action', tool, input), ('step', tool, input, elapsed), ('token', text) and finally ('output', text)
+        events = queue.Queue()
+        result = {}
+        handler = AgentEventHandler(events)
+
+        def run_agent():
+            try:
+                result['output'] = self.run(query, callbacks=(callbacks or []) + [handler])
+            except Exception as e:
+                result['error'] = e
+            finally:
+                events.put(None)
+
+        agent_thread = threading.Thread(target=run_agent, daemon=True)
+        add_script_run_ctx(agent_thread, get_script_run_ctx())
+        agent_thread.start()
+
+        for event in iter(events.get, None):
+            yield event
+
+        if 'error' in result:
+            raise result['error']
+        # answer recovered from parsing error had no final answer marker, it comes as one token
+        if not handler.streamed:
+            yield ('token', result['output'])
+        yield ('output', result['output'])
     
     def __getattr__(self, name):
         # Delegate other methods to the wrapped agent
         return getattr(self.agent, name)
         
-def ask_agent(user_input, history):
+class AnswerCache:
+    # LRU + TTL cache of agent answers keyed on normalized question, data version and conversation context -
+    # follow-ups aren't always recognizable, so any question asked with earlier turns in memory is answered
+    # from cache only after the same conversation. Entries live in SQLite (in memory without path),
+    # so every answer is one row written instead of whole cache rewritten
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path) if self.path else ':memory:', check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY, text TEXT, logs TEXT, created REAL, last_used REAL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text):
+        # case, punctuation and whitespace differences don't change the question
+        text = re.sub(r'[^\w\s%]', ' ', text.lower())
+        return ' '.join(text.split())
+
+    def key(self, question, context, data_version):
+        # context - rendered conversation memory, empty for first question shared by all sessions
+        context = hashlib.sha256(context.encode()).hexdigest() if context else ''
+        canonical = json.dumps([self.normalize(question), context, data_version])
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT text, logs, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[2] <= self.ttl:
+                self.db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.db.commit()
+                self.hits += 1
+                return {'text': row[0], 'logs': json.loads(row[1]), 'created': row[2]}
+            if row:
+                self.db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.db.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key, text, logs):
+        with self.lock:
+            now = time.time()
+            self.db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                            (key, text, json.dumps(logs), now, now))
+            # least recently used answers above max entries
+            self.db.execute("""
+                DELETE FROM answers WHERE key IN (
+                    SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM answers")
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_answer_cache():
+    return AnswerCache(path=ANSWER_CACHE_PATH)
+
+def get_data_version():
+    # delta versions of agent tables, version checks are shared with snapshot cache and throttled there
+    try:
+        return get_snapshot_cache().current_versions(AGENT_TABLES)
+    except Exception:
+        return None
+
+def get_data_version_key():
+    # data version as namespace of LLM cache, None when versions can't be checked
+    version = get_data_version()
+    return None if version is None else repr(sorted(version.items()))
+
+@st.cache_resource
+def get_trace_store():
+    # timing and token traces of recent questions from all sessions
+    return TraceStore()
+
+def create_conversation_memory():
+    # summaries of older turns are written by the same Gemini model
+    return ConversationMemory(llm=get_gemini_llm(), token_budget=CONVERSATION_TOKEN_BUDGET)
+
+def ask_agent(user_input, memory):
+    with st.spinner("Wait a sec! I'm exploring data and analyzing results."):
+        for event in stream_agent_answer(user_input, memory):
+            if event[0] == 'result':
+                return event[1]
+
+def stream_agent_answer(user_input, memory):
+    # yields agent steps and final answer tokens while agent works (see AgentWrapper.stream), answers not
+    # generated by LLM (routed, cached or errors) come as one token,
+    # last event is ('result', {"text", "logs", "tool_cache", "trace"})
+    trace_recorder = TraceRecorder(user_input)
+    trace_store = get_trace_store()
+
+    # questions matching what dashboard shows are answered from sql templates without LLM, questions
+    # within conversation may depend on earlier turns templates know nothing about
+    routed_answer = None if memory.has_context() else route_question(user_input)
+    if routed_answer:
+        memory.add_turn(user_input, routed_answer['text'], routed_answer['logs'])
+        routed_answer['trace'] = trace_recorder.finish(route=f"template:{routed_answer['route']}")
+        trace_store.add(routed_answer['trace'])
+        yield ('token', routed_answer['text'])
+        yield ('result', routed_answer)
+        return
+
+    # same question in the same conversation context asked against the same data is answered from cache
+    answer_cache = get_answer_cache()
+    data_version = get_data_version()
+    cache_key = answer_cache.key(user_input, memory.render(''), data_version)
+
+    if data_version:
+        cached_answer = answer_cache.get(cache_key)
+        if cached_answer:
+            memory.add_turn(user_input, cached_answer['text'], cached_answer['logs'])
+            trace = trace_recorder.finish(route='answer_cache')
+            trace_store.add(trace)
+            yield ('token', cached_answer['text'])
+            yield ('result', {
+                "text": cached_answer['text'],
+                "logs": cached_answer['logs'],
+                "trace": trace
+            })
+            return
 
     my_agent = create_ai_agent()
     
     if my_agent:
 
-        with st.spinner("Wait a sec! I'm exploring data and analyzing results."):
+        # handling frequent errors of original SQL agent realated to parsing orginial LLM response
+        enhanced_agent = AgentWrapper(my_agent)
 
-            # handling frequent errors of original SQL agent realated to parsing orginial LLM response
-            enhanced_agent = AgentWrapper(my_agent)
+        # crate callback handler to capture produced SQL queries
+        sql_handler = SQLHandler()
 
-            # crate callback handler to capture produced SQL queries
-            sql_handler = SQLHandler()
+        # injecting conversation context within token budget - recent turns, summary of older ones
+        # and already executed sql - instead of full history
+        combined_input = memory.render(user_input)
 
-            # injecting full conversation history into prompt
-            formatted_history = ""
-
-            for msg in history:
-                if msg["role"] == 'user':
-                    formatted_history += f"Human: {msg['content']}\n"
-                elif msg['role'] == 'assistant':
-                    formatted_history += f"AI: {msg['content']}\n"
-
-            if formatted_history:
-                combined_input = f"Previous conversation:\n{formatted_history}\nNew question: {user_input}"
-            else:
-                combined_input = user_input
+        # calling enhanced agent with prompt augemented with history context
+        try:
+            for event in enhanced_agent.stream(combined_input, callbacks=[sql_handler, trace_recorder]):
+                if event[0] == 'output':
+                    response = event[1]
+                else:
+                    yield event
 
-            # calling enhanced agent with prompt augemented with history context
-            try:
-                response = enhanced_agent.run(combined_input, callbacks=[sql_handler])
-                return {
-                    "text": response,
-                    "logs": sql_handler.sql_result
-                }
-            
-            except Exception as e:
-                return {
-                    "text:": f"Sorry, but there was an error while preparing answer: {e}",
-                    "logs": sql_handler.sql_result
-                }
+            if data_version:
+                answer_cache.put(cache_key, response, sql_handler.sql_result)
+            memory.add_turn(user_input, response, sql_handler.sql_result)
+            trace = trace_recorder.finish()
+            trace_store.add(trace)
+            yield ('result', {
+                "text": response,
+                "logs": sql_handler.sql_result,
+                "tool_cache": sql_handler.tool_cache,
+                "trace": trace
+            })
+        
+        except Exception as e:
+            trace = trace_recorder.finish(error=str(e))
+            trace_store.add(trace)
+            error_text = f"Sorry, but there was an error while preparing answer: {e}"
+            yield ('token', error_text)
+            yield ('result', {
+                "text": error_text,
+                "logs": sql_handler.sql_result,
+                "trace": trace
+            })
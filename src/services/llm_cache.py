@@ -0,0 +1,179 @@
+import contextvars
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import (
+    AIMessageChunk, message_chunk_to_message, message_to_dict, messages_from_dict
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk
+from langchain_core.outputs.chat_generation import merge_chat_generation_chunks
+
+# Persistent cache of LLM responses shared by all sessions and kept across app restarts.
+# Entries live in SQLite keyed by prompt, model parameters and namespace (versions of tables the
+# prompts describe), least recently used entries are evicted above size limit. Plugged into chat
+# model as its `cache`; StreamingCacheMixin makes streamed calls of the agent use it too.
+# Generations are stored as plain message dicts (no beta `loads` of serialized objects on every hit).
+
+# part of every key - entries stored in other format are never read, they are evicted as least recently used
+STORAGE_FORMAT = 'message-dict-1'
+
+# set while model's own cache handling (`_generate_with_cache`) runs the call, so `_stream` doesn't repeat it
+model_cache_active = contextvars.ContextVar('model_cache_active', default=False)
+
+
+class PersistentLLMCache(BaseCache):
+
+    def __init__(self, path, max_bytes=50 * 2**20, namespace_provider=None):
+        # namespace_provider() -> str or None, responses aren't read or stored while it is None
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.namespace_provider = namespace_provider
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY, namespace TEXT, response TEXT, size INTEGER, last_used REAL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)")
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # namespace of the last stored entry, older namespaces are purged once when it changes
+        self.last_namespace = None
+
+    def namespace(self):
+        if self.namespace_provider is None:
+            return ''
+        try:
+            return self.namespace_provider()
+        except Exception:
+            return None
+
+    @staticmethod
+    def key(namespace, prompt, llm_string):
+        return hashlib.sha256('\x00'.join([STORAGE_FORMAT, namespace, llm_string, prompt]).encode()).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        namespace = self.namespace()
+        with self.lock:
+            row = None
+            if namespace is not None:
+                key = self.key(namespace, prompt, llm_string)
+                row = self.db.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.hits += 1
+        # messages are rebuilt from their dicts, no other objects are revived from stored json
+        return [ChatGeneration(message=messages_from_dict([entry['message']])[0],
+                               generation_info=entry['generation_info'])
+                for entry in json.loads(row[0])]
+
+    def update(self, prompt, llm_string, return_val):
+        namespace = self.namespace()
+        if namespace is None:
+            return
+        response = json.dumps([
+            {'message': message_to_dict(generation.message), 'generation_info': generation.generation_info}
+            for generation in return_val
+        ])
+        with self.lock:
+            # entries of older namespaces are never read again, they go first
+            if namespace != self.last_namespace:
+                self.evictions += self.db.execute(
+                    "DELETE FROM llm_responses WHERE namespace != ?", (namespace,)
+                ).rowcount
+                self.last_namespace = namespace
+            self.db.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?)",
+                (self.key(namespace, prompt, llm_string), namespace, response, len(response), time.time())
+            )
+            self.evict()
+            self.db.commit()
+
+    def evict(self):
+        # least recently used entries above size limit, newest entry always stays
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM llm_responses ORDER BY last_used").fetchall()[:-1]:
+            self.db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs):
+        with self.lock:
+            self.db.execute("DELETE FROM llm_responses")
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'bytes': size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class StreamingCacheMixin:
+    # chat model `stream` bypasses model cache - streamed responses are looked up and stored here,
+    # cached response is replayed word by word, so streaming callbacks see it like a fresh one.
+    # `invoke` of a streaming model reaches `_stream` through model's own cache handling, which
+    # already looked the call up and stores its result - then `_stream` only generates
+
+    def _generate_with_cache(self, *args, **kwargs):
+        token = model_cache_active.set(True)
+        try:
+            return super()._generate_with_cache(*args, **kwargs)
+        finally:
+            model_cache_active.reset(token)
+
+    async def _agenerate_with_cache(self, *args, **kwargs):
+        token = model_cache_active.set(True)
+        try:
+            return await super()._agenerate_with_cache(*args, **kwargs)
+        finally:
+            model_cache_active.reset(token)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        cache = self.cache if isinstance(self.cache, BaseCache) else None
+        if cache is None or model_cache_active.get():
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+            return
+
+        llm_string = self._get_llm_string(stop=stop, **kwargs)
+        prompt = dumps(messages)
+        cached = cache.lookup(prompt, llm_string)
+        if cached:
+            for token in re.findall(r'\s*\S+|\s+$', cached[0].text) or ['']:
+                yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+            return
+
+        chunks = []
+        for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        generation = merge_chat_generation_chunks(chunks)
+        if generation is not None:
+            cache.update(prompt, llm_string, [ChatGeneration(
+                message=message_chunk_to_message(generation.message), generation_info=generation.generation_info
+            )])
@@ -0,0 +1,146 @@
+# Builders of parameterized aggregate queries for dashboard charts.
+# Every builder returns (query, parameters) ready for execute_sql_query, filters are pushed down
+# to the warehouse and only aggregated rows per chart are returned. Values of multi-select filters
+# are sorted, so the same filter state always produces the same query and cache key.
+# Queries read gold tables built by ETL notebook (databricks_etl/gold_tables.py) - pre-aggregated
+# to the grain of dashboard filters, with the same column names as row level fact tables.
+
+EXPENDITURE_TABLE = 'workspace.eurostat.gold_expenditure'
+ASSESEMENT_TABLE = 'workspace.eurostat.gold_health_assesement'
+BAD_HEALTH_TABLE = 'workspace.eurostat.gold_bad_health'
+
+# Dashboard metric names mapped to source columns (column names can't be passed as parameters)
+METRIC_COLUMNS = {
+    'Total Spending': 'Million_euro',
+    'Total Spending (PPS)': 'Million_purchasing_power_standards__PPS_',
+    'Spending per inhabitant': 'Euro_per_inhabitant',
+    'Spending per inhabitant (PPS)': 'Purchasing_power_standard__PPS__per_inhabitant',
+    'Percentage of GDP': 'Percentage_of_gross_domestic_product__GDP_'
+}
+
+BAD_HEALTH_LEVELS = ['Bad', 'Very bad']
+
+
+def in_list(column, name, values, parameters):
+    # expand list filter into named parameter markers - empty selection matches nothing
+    values = sorted(values)
+    if not values:
+        return 'FALSE'
+    markers = []
+    for i, value in enumerate(values):
+        parameters[f'{name}_{i}'] = value
+        markers.append(f':{name}_{i}')
+    return f"{column} IN ({', '.join(markers)})"
+
+
+def expenditure_conditions(filters, parameters):
+    parameters['year'] = filters['year']
+    return ' AND '.join([
+        'Year = :year',
+        in_list('Country_Code', 'country', filters['countries'], parameters),
+        in_list('Financing_type', 'type', filters['types'], parameters)
+    ])
+
+
+def assesement_conditions(filters, parameters):
+    parameters['year'] = filters['year']
+    return ' AND '.join([
+        'Year = :year',
+        in_list('Country_Code', 'country', filters['countries'], parameters),
+        in_list('Sex', 'sex', filters['sexes'], parameters),
+        in_list('Age_Group', 'age', filters['age_groups'], parameters)
+    ])
+
+
+def metric_column(metric):
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+    return METRIC_COLUMNS[metric]
+
+
+def build_filter_options_query():
+    # distinct values of all sidebar filters in a single round trip
+    query = f"""
+        SELECT 'Year' AS Dimension, Year AS Value FROM {EXPENDITURE_TABLE}
+        UNION SELECT 'Country_Code', Country_Code FROM {EXPENDITURE_TABLE}
+        UNION SELECT 'Financing_type', Financing_type FROM {EXPENDITURE_TABLE}
+        UNION SELECT 'Age_Group', Age_Group FROM {ASSESEMENT_TABLE}
+    """
+    return query, {}
+
+
+def build_bar_query(filters, metric):
+    parameters = {}
+    query = f"""
+        SELECT Country_Code, SUM({metric_column(metric)}) AS `{metric}`
+        FROM {EXPENDITURE_TABLE}
+        WHERE {expenditure_conditions(filters, parameters)}
+        GROUP BY Country_Code
+        ORDER BY `{metric}` DESC
+    """
+    return query, parameters
+
+
+def build_donut_query(filters, metric):
+    parameters = {}
+    query = f"""
+        SELECT Financing_type, SUM({metric_column(metric)}) AS `{metric}`
+        FROM {EXPENDITURE_TABLE}
+        WHERE {expenditure_conditions(filters, parameters)}
+        GROUP BY Financing_type
+        ORDER BY `{metric}` DESC
+    """
+    return query, parameters
+
+
+def build_histogram_query(filters):
+    parameters = {}
+    query = f"""
+        SELECT Age_Group, Health_Assesement, SUM(Number_of_People) AS Number_of_People
+        FROM {ASSESEMENT_TABLE}
+        WHERE {assesement_conditions(filters, parameters)}
+        GROUP BY Age_Group, Health_Assesement
+    """
+    return query, parameters
+
+
+def build_bad_health_by_age_query(filters):
+    parameters = {}
+    query = f"""
+        SELECT
+            Age_Group,
+            SUM(num_of_bad_health) AS num_of_bad_health,
+            SUM(num_of_total_health) AS num_of_total_health,
+            SUM(num_of_bad_health) * 100.0 / SUM(num_of_total_health) AS perc_of_bad_health
+        FROM {BAD_HEALTH_TABLE}
+        WHERE {assesement_conditions(filters, parameters)}
+        GROUP BY Age_Group
+        ORDER BY Age_Group
+    """
+    return query, parameters
+
+
+# Source queries of dashboard cubes - gold tables are already at the grain of dashboard filters,
+# so cubes are loaded without any aggregation in the warehouse
+
+def build_expenditure_cube_query():
+    measures = ',\n            '.join(f'{column} AS `{metric}`' for metric, column in METRIC_COLUMNS.items())
+    query = f"""
+        SELECT
+            Year, Country_Code, Financing_type,
+            {measures},
+            Row_count
+        FROM {EXPENDITURE_TABLE}
+    """
+    return query, {}
+
+
+def build_assesement_cube_query():
+    query = f"""
+        SELECT
+            Year, Country_Code, Sex, Age_Group, Health_Assesement,
+            Number_of_People,
+            Row_count
+        FROM {ASSESEMENT_TABLE}
+    """
+    return query, {}
@@ -1,2 +0,0 @@
-SELECT * EXCEPT(Percentage)
-FROM workspace.eurostat.own_health_assesement
\ No newline at end of file
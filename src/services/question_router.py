@@ -0,0 +1,236 @@
+import re
+
+from src.services.conversation_memory import is_follow_up
+from src.services.databricks_connection import execute_sql_query
+from src.services.queries.query_builder import (
+    build_bad_health_by_age_query, build_bar_query, build_donut_query, build_filter_options_query
+)
+
+# Fast path in front of the data agent. Questions matching what dashboard already shows are classified
+# by keyword grammar, answered by parameterized query templates and formatted without LLM.
+# Anything ambiguous, comparing several years or asking for explanation goes to the agent.
+
+MIN_CONFIDENCE = 0.75
+
+EU_COUNTRY_NAMES = {
+    'austria': 'AT', 'belgium': 'BE', 'bulgaria': 'BG', 'croatia': 'HR', 'cyprus': 'CY', 'czechia': 'CZ',
+    'czech republic': 'CZ', 'denmark': 'DK', 'estonia': 'EE', 'finland': 'FI', 'france': 'FR', 'germany': 'DE',
+    'greece': 'EL', 'hungary': 'HU', 'ireland': 'IE', 'italy': 'IT', 'latvia': 'LV', 'lithuania': 'LT',
+    'luxembourg': 'LU', 'malta': 'MT', 'netherlands': 'NL', 'poland': 'PL', 'portugal': 'PT', 'romania': 'RO',
+    'slovakia': 'SK', 'slovenia': 'SI', 'spain': 'ES', 'sweden': 'SE'
+}
+
+# every group of an intent has to match, score of an intent is share of its matched groups
+INTENTS = {
+    'spending_by_country': [
+        r'\bspend|\bspent\b|\bexpenditure|\bcosts?\b',
+        r'\bcountr|\bmember states?\b|\bwhich\b|\brank|\bhighest\b|\blowest\b|\btop\b|\bmost\b|\bleast\b|\beach\b'
+        + ''.join(rf'|\b{name}\b' for name in EU_COUNTRY_NAMES)
+    ],
+    'out_of_pocket_share': [
+        r'out[- ]of[- ]pocket|\bhouseholds?\b|\bfinanc|\bschemes?\b|\bvoluntary\b|\bgovernment\b',
+        r'\bshare\b|\bpercent|%|\bproportion|\bbreakdown\b|\bsplit\b|\bportion\b|\bhow much of\b'
+    ],
+    'bad_health_by_age': [
+        r'\b(?:very )?(?:bad|poor) health|\bhealth (?:status|assess?ement)|\bself[- ](?:perceived|reported|assessed)'
+        r'|\bunhealthy\b|\bfeel\w* (?:bad|unwell|sick)',
+        r'\bage\b|\bage groups?\b|\bold(?:er)?\b|\byoung(?:er)?\b|\bgenerations?\b'
+    ]
+}
+
+# intents narrowing down more generic ones - generic intent doesn't compete when specific one matched
+SPECIFIC_INTENTS = {
+    'out_of_pocket_share': ['spending_by_country']
+}
+
+# groupings template of an intent can't answer - e.g. share template gives one EU or country breakdown
+# by financing type, not a ranking of countries, and spending template ranks countries, not schemes
+GROUPING_CONFLICTS = {
+    'spending_by_country': r'\bschemes?\b|\bfinanc\w*|\bout[- ]of[- ]pocket|\bgovernment\b|\bvoluntary\b',
+    'out_of_pocket_share': r'\bwhich (?:eu )?(?:country|countries|member states?)\b|\bcountries\b|\bmember states\b'
+                           r'|\b(?:per|by|each|every) country\b|\brank',
+}
+
+# questions agent should answer even when some intent matches
+FALLBACK_PATTERNS = re.compile(
+    r'\bwhy\b|\bexplain|\btrend|\bover time\b|\bchang(?:e|ed|es)\b|\bgrow|\bcorrelat|\bpredict|\bforecast'
+    r'|\bcompar|\bversus\b|\bvs\.?\b|\bthan\b|\brelative to\b|\bagainst\b|\bdifference between\b'
+    r'|\bdim_countries\b|\bpopulation\b|\bcurrency\b|\bsex\b|\bmen\b|\bwomen\b|\bmale\b|\bfemale\b',
+    re.IGNORECASE
+)
+
+METRIC_PATTERNS = [
+    ('Spending per inhabitant (PPS)', r'(?:per (?:capita|inhabitant|person|head)).*\bpps\b|\bpps\b.*(?:per (?:capita|inhabitant|person|head))'),
+    ('Spending per inhabitant', r'per (?:capita|inhabitant|person|head)'),
+    ('Percentage of GDP', r'\bgdp\b'),
+    ('Total Spending (PPS)', r'\bpps\b|purchasing power')
+]
+
+# sex is not part of filter options query, values are documented in column comment
+SEXES = ['F', 'M']
+
+OUT_OF_POCKET_TYPE = 'Out-of-pocket payments'
+
+
+def classify(question):
+    # returns (intent, confidence) - intent is None when no intent matched at all
+    text = question.lower()
+    scores = {
+        intent: sum(bool(re.search(group, text)) for group in groups) / len(groups)
+        for intent, groups in INTENTS.items()
+    }
+    for intent, generic_intents in SPECIFIC_INTENTS.items():
+        if scores[intent] == 1:
+            for generic_intent in generic_intents:
+                scores[generic_intent] = 0
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (intent, best), (_, second) = ranked[0], ranked[1]
+    if best == 0:
+        return None, 0.0
+    # follow-ups refer to earlier turns, comparisons and explanations need the agent
+    if FALLBACK_PATTERNS.search(text) or is_follow_up(question):
+        return intent, 0.0
+    if intent in GROUPING_CONFLICTS and re.search(GROUPING_CONFLICTS[intent], text):
+        return intent, 0.0
+    return intent, best - second / 2
+
+
+def metric_for(question):
+    text = question.lower()
+    for metric, pattern in METRIC_PATTERNS:
+        if re.search(pattern, text):
+            return metric
+    return 'Total Spending'
+
+
+def mentioned_countries(question, country_codes):
+    text = question.lower()
+    codes = {code for name, code in EU_COUNTRY_NAMES.items() if re.search(rf'\b{name}\b', text)}
+    # upper case iso codes only, so words like "at" or "it" are not taken for countries
+    codes |= {code for code in re.findall(r'\b[A-Z]{2}\b', question) if code in country_codes}
+    return sorted(codes)
+
+
+def extract_filters(question, options):
+    # filters for query builders, None when question can't be answered with single year templates
+    years = sorted(set(re.findall(r'\b(?:19|20)\d{2}\b', question)))
+    if len(years) > 1 or (years and years[0] not in options['Year']):
+        return None
+    return {
+        'year': years[0] if years else max(options['Year']),
+        'countries': mentioned_countries(question, options['Country_Code']) or options['Country_Code'],
+        'types': options['Financing_type'],
+        'sexes': SEXES,
+        'age_groups': options['Age_Group']
+    }
+
+
+def filter_options(run_query=execute_sql_query):
+    df = run_query(*build_filter_options_query())
+    return {
+        dimension: sorted(str(value) for value in group['Value'])
+        for dimension, group in df.groupby('Dimension', observed=True)
+    }
+
+
+def render_sql(query, parameters):
+    # query with parameter values inlined, for sql logs shown to users
+    def literal(match):
+        value = parameters[match.group(1)]
+        return str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+    return re.sub(r':(\w+)\b', lambda m: literal(m) if m.group(1) in parameters else m.group(0), query)
+
+
+def format_number(value):
+    return f"{value:,.1f}"
+
+
+def markdown_table(rows, headers):
+    lines = ['| ' + ' | '.join(headers) + ' |', '|' + '---|' * len(headers)]
+    lines += ['| ' + ' | '.join(str(cell) for cell in row) + ' |' for row in rows]
+    return '\n'.join(lines)
+
+
+def scope(filters, options):
+    if filters['countries'] == options['Country_Code']:
+        return f"all EU countries in {filters['year']}"
+    return f"{', '.join(filters['countries'])} in {filters['year']}"
+
+
+def answer_spending_by_country(question, filters, options, run_query):
+    metric = metric_for(question)
+    query, parameters = build_bar_query(filters, metric)
+    df = run_query(query, parameters)
+    if df.empty:
+        return None, [render_sql(query, parameters)]
+
+    df = df.sort_values(metric, ascending=False)
+    top, bottom = df.iloc[0], df.iloc[-1]
+    text = f"**{metric}** by country for {scope(filters, options)} (all financing types)."
+    if len(df) > 1:
+        text += (f" Highest is {top['Country_Code']} ({format_number(top[metric])}),"
+                 f" lowest is {bottom['Country_Code']} ({format_number(bottom[metric])}).")
+    rows = [(country, format_number(value)) for country, value in zip(df['Country_Code'], df[metric])]
+    return text + '\n\n' + markdown_table(rows, ['Country', metric]), [render_sql(query, parameters)]
+
+
+def answer_out_of_pocket_share(question, filters, options, run_query):
+    query, parameters = build_donut_query(filters, 'Total Spending')
+    df = run_query(query, parameters)
+    total = df['Total Spending'].sum() if not df.empty else 0
+    if not total:
+        return None, [render_sql(query, parameters)]
+
+    df = df.assign(Share=df['Total Spending'] / total * 100).sort_values('Share', ascending=False)
+    out_of_pocket = df.loc[df['Financing_type'] == OUT_OF_POCKET_TYPE, 'Share'].sum()
+    text = (f"Out-of-pocket payments made up **{out_of_pocket:.1f}%** of total healthcare spending"
+            f" for {scope(filters, options)}.")
+    rows = [
+        (financing_type, format_number(value), f"{share:.1f}%")
+        for financing_type, value, share in zip(df['Financing_type'], df['Total Spending'], df['Share'])
+    ]
+    return text + '\n\n' + markdown_table(rows, ['Financing type', 'Million euro', 'Share']), \
+        [render_sql(query, parameters)]
+
+
+def answer_bad_health_by_age(question, filters, options, run_query):
+    query, parameters = build_bad_health_by_age_query(filters)
+    df = run_query(query, parameters)
+    if df.empty:
+        return None, [render_sql(query, parameters)]
+
+    by_age = df.set_index('Age_Group')['perc_of_bad_health'].astype(float)
+    worst = by_age.idxmax()
+    text = (f"Share of people assessing their health as bad or very bad by age group for {scope(filters, options)}."
+            f" Highest share is in group {worst} ({by_age[worst]:.1f}%).")
+    rows = [(age, f"{share:.1f}%") for age, share in by_age.items()]
+    return text + '\n\n' + markdown_table(rows, ['Age group', 'Bad or very bad health']), \
+        [render_sql(query, parameters)]
+
+
+ANSWER_BUILDERS = {
+    'spending_by_country': answer_spending_by_country,
+    'out_of_pocket_share': answer_out_of_pocket_share,
+    'bad_health_by_age': answer_bad_health_by_age
+}
+
+
+def route_question(question, run_query=execute_sql_query, min_confidence=MIN_CONFIDENCE):
+    # answer in the same shape as ask_agent, or None when question should go to the agent
+    intent, confidence = classify(question)
+    if intent is None or confidence < min_confidence:
+        return None
+
+    try:
+        options = filter_options(run_query)
+        filters = extract_filters(question, options)
+        if filters is None:
+            return None
+        text, logs = ANSWER_BUILDERS[intent](question, filters, options, run_query)
+    except Exception:
+        # agent can still try to answer when template query failed
+        return None
+
+    if text is None:
+        return None
+    return {"text": text, "logs": logs, "route": intent}
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from pathlib import Path
+
+# Schema context for the data agent - table and column definitions with unity catalog comments
+# (semantic layer created by ETL notebook) and a few sample rows, extracted once and persisted
+# as versioned json artifact. Agent's schema tool serves table info from it instead of reflecting
+# tables and sampling rows live during every run.
+
+SAMPLE_ROWS = 3
+MAX_STRING_LENGTH = 100
+
+
+def build_schema_context(run_query, catalog, schema, sample_rows=SAMPLE_ROWS):
+    # run_query(query) -> pyarrow.Table
+    tables = run_query(f"""
+        SELECT table_name, comment
+        FROM {catalog}.information_schema.tables
+        WHERE table_schema = '{schema}'
+        ORDER BY table_name
+    """).to_pylist()
+
+    columns = run_query(f"""
+        SELECT table_name, column_name, full_data_type, comment
+        FROM {catalog}.information_schema.columns
+        WHERE table_schema = '{schema}'
+        ORDER BY table_name, ordinal_position
+    """).to_pylist()
+
+    context = {'catalog': catalog, 'schema': schema, 'built_at': time.time(), 'tables': {}}
+    for table in tables:
+        name = table['table_name']
+        context['tables'][name] = {
+            'comment': table['comment'],
+            'columns': [
+                {'name': c['column_name'], 'type': c['full_data_type'], 'comment': c['comment']}
+                for c in columns if c['table_name'] == name
+            ],
+            'sample_rows': run_query(f"SELECT * FROM {catalog}.{schema}.{name} LIMIT {sample_rows}").to_pylist()
+        }
+    return context
+
+
+def save_schema_context(context, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix('.tmp')
+    temp_path.write_text(json.dumps(context, default=str))
+    os.replace(temp_path, path)
+
+
+def load_schema_context(path, data_version):
+    # stored artifact is valid only for the same versions of source tables
+    path = Path(path)
+    if not path.exists():
+        return None
+    context = json.loads(path.read_text())
+    if context.get('data_version') != data_version:
+        return None
+    return context
+
+
+def quote_comment(comment):
+    return "'" + str(comment).replace("'", "\\'") + "'"
+
+
+def format_table_info(context, table_names):
+    # same layout as SQLDatabase.get_table_info - DDL followed by sample rows
+    infos = []
+    for name in table_names:
+        table = context['tables'][name]
+
+        column_lines = []
+        for column in table['columns']:
+            line = f"\t`{column['name']}` {column['type']}"
+            if column['comment']:
+                line += f" COMMENT {quote_comment(column['comment'])}"
+            column_lines.append(line)
+
+        ddl = f"CREATE TABLE {name} (\n" + ",\n".join(column_lines) + "\n)"
+        if table['comment']:
+            ddl += f" COMMENT {quote_comment(table['comment'])}"
+
+        header = '\t'.join(column['name'] for column in table['columns'])
+        rows = [
+            '\t'.join(str(row.get(column['name']))[:MAX_STRING_LENGTH] for column in table['columns'])
+            for row in table['sample_rows']
+        ]
+        samples = f"/*\n{len(rows)} rows from {name} table:\n{header}\n" + "\n".join(rows) + "\n*/"
+
+        infos.append(f"{ddl}\n\n{samples}")
+
+    return "\n\n".join(infos)
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+
+# Local disk snapshots of query results stored as Arrow IPC files (read back memory-mapped).
+# Snapshot is keyed by query text with parameters and remembers Delta versions of its source tables.
+# Stored snapshot is served right away, while in background thread cheap version check
+# (DESCRIBE HISTORY ... LIMIT 1) decides whether query has to be re-run against the warehouse.
+# Snapshot is revalidated by one thread at a time and at most once per revalidate interval,
+# least recently used snapshots are deleted when directory grows above max_bytes.
+
+# schema qualified table names following FROM / JOIN (CTE names are not qualified so they are skipped)
+TABLE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(`?\w+`?(?:\.`?\w+`?)+)', re.IGNORECASE)
+
+
+def source_tables(query):
+    return sorted({name.replace('`', '') for name in TABLE_PATTERN.findall(query)})
+
+
+class SnapshotCache:
+
+    def __init__(self, directory, run_query, table_version, check_interval=300, on_refresh=None,
+                 revalidate_interval=None, max_bytes=None):
+        # run_query(query, parameters) -> pyarrow.Table, table_version(table_name) -> delta version
+        self.directory = Path(directory)
+        self.run_query = run_query
+        self.table_version = table_version
+        self.check_interval = check_interval
+        self.on_refresh = on_refresh
+        self.revalidate_interval = check_interval if revalidate_interval is None else revalidate_interval
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.versions = {}          # table name -> (version, time of check)
+        self.revalidating = set()
+        self.revalidated = {}       # snapshot path -> time of last revalidation start
+        self.counters = {'disk_hits': 0, 'misses': 0, 'refreshes': 0, 'version_checks': 0, 'evictions': 0}
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def snapshot_path(self, query, parameters):
+        key = json.dumps([query, parameters or {}], sort_keys=True, default=str)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.arrow"
+
+    def get(self, query, parameters=None):
+        path = self.snapshot_path(query, parameters)
+        try:
+            table = self.read(path)
+        except FileNotFoundError:
+            self.count('misses')
+            return self.refresh(query, parameters, path)
+
+        self.count('disk_hits')
+        self.touch(path)
+        self.revalidate_in_background(query, parameters, path)
+        return table
+
+    def revalidate(self, query, parameters=None):
+        # throttled background check of stored snapshot without reading it - for results kept in memory
+        # above this cache (data store, st.cache_data) which would never call get again
+        path = self.snapshot_path(query, parameters)
+        if path.exists():
+            self.revalidate_in_background(query, parameters, path)
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def current_versions(self, tables, max_age=None):
+        # table versions are shared by all snapshots and checked at most once per check interval
+        max_age = self.check_interval if max_age is None else max_age
+        versions = {}
+        for table in tables:
+            with self.lock:
+                version, checked = self.versions.get(table, (None, 0))
+            if time.monotonic() - checked > max_age:
+                self.count('version_checks')
+                version = self.table_version(table)
+                with self.lock:
+                    self.versions[table] = (version, time.monotonic())
+            versions[table] = version
+        return versions
+
+    def refresh(self, query, parameters, path):
+        versions = self.current_versions(source_tables(query), max_age=0)
+        table = self.run_query(query, parameters)
+        self.write(path, table, versions)
+        self.evict(keep=path)
+        return table
+
+    def revalidate_in_background(self, query, parameters, path):
+        with self.lock:
+            if path in self.revalidating:
+                return
+            if time.monotonic() - self.revalidated.get(path, float('-inf')) < self.revalidate_interval:
+                return
+            self.revalidating.add(path)
+            self.revalidated[path] = time.monotonic()
+
+        def revalidate():
+            try:
+                stored = self.stored_versions(path)
+                if self.current_versions(stored) != stored:
+                    self.refresh(query, parameters, path)
+                    self.count('refreshes')
+                    if self.on_refresh:
+                        self.on_refresh(query, parameters)
+            except Exception:
+                # stale snapshot is still better than no data - next request will try again
+                pass
+            finally:
+                with self.lock:
+                    self.revalidating.discard(path)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
+    def write(self, path, table, versions):
+        # atomic replace, so readers never see partially written file
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'snapshot_versions'] = json.dumps(versions).encode()
+        table = table.replace_schema_metadata(metadata)
+        temp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with pa.OSFile(str(temp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+
+    def touch(self, path):
+        # modification time orders snapshots for eviction, reading one marks it recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        # least recently used snapshots above size limit, snapshot just written always stays
+        if self.max_bytes is None:
+            return
+        snapshots = []
+        for path in self.directory.glob('*.arrow'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshots.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, path in sorted(snapshots, key=lambda snapshot: snapshot[0]):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.count('evictions')
+
+    def read(self, path):
+        with pa.memory_map(str(path), 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def stored_versions(self, path):
+        with pa.memory_map(str(path), 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        return json.loads(metadata.get(b'snapshot_versions', b'{}'))
+
+    def stats(self):
+        with self.lock:
+            return {
+                'snapshots': len(list(self.directory.glob('*.arrow'))),
+                'tables_checked': len(self.versions),
+                'revalidating': len(self.revalidating),
+                **self.counters
+            }
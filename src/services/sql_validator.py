@@ -0,0 +1,296 @@
+import difflib
+import re
+
+import sqlparse
+from sqlparse.tokens import Error, Keyword, Literal, Name, Punctuation
+from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import (
+    InfoSQLDatabaseTool, ListSQLDatabaseTool, QuerySQLDatabaseTool
+)
+
+# Local validation of agent SQL against table schemas - replaces LLM based sql_db_query_checker.
+# Queries are parsed with sqlparse and checked for unknown tables, columns and functions, identifiers
+# quoted the wrong way and dialect leftovers; errors go back to the agent as structured list,
+# so a broken query costs no LLM round trip of a checker and no warehouse round trip either.
+# Functions missing from the list below are only warnings - the list isn't complete, the query still runs
+# and warnings are added to the error of warehouse when it fails.
+
+# Built-in Databricks SQL functions agent queries are expected to use (lower case)
+DATABRICKS_FUNCTIONS = frozenset('''
+    abs acos add_months any any_value approx_count_distinct approx_percentile array array_agg array_contains
+    array_distinct array_join array_max array_min array_sort asin atan atan2 avg bigint bit_and bit_or bool_and
+    bool_or boolean cardinality case cast cbrt ceil ceiling char char_length character_length coalesce
+    collect_list collect_set concat concat_ws contains corr cos count count_if covar_pop covar_samp cume_dist
+    current_date current_timestamp date date_add date_diff date_format date_part date_sub date_trunc dateadd
+    datediff datepart day dayofmonth dayofweek dayofyear decimal degrees dense_rank div double element_at
+    endswith every exp explode extract first first_value float floor format_number format_string from_unixtime
+    get_json_object greatest grouping hash hour if iff ifnull ilike in initcap instr int isnan isnotnull isnull
+    kurtosis lag last last_day last_value lcase lead least left len length like ln locate log log10 log2 lower
+    lpad ltrim make_date max max_by mean median min min_by minute mod mode month months_between named_struct
+    nanvl negative now nth_value ntile nullif nvl nvl2 percent_rank percentile percentile_approx percentile_cont
+    percentile_disc pi pmod position pow power quarter radians rand rank regexp_extract regexp_like
+    regexp_replace repeat replace reverse right rlike round row_number rpad rtrim second sequence sign
+    signum sin size skewness slice smallint sort_array split split_part sqrt startswith std stddev stddev_pop
+    stddev_samp string struct substr substring substring_index sum tan timestamp timestampadd timestampdiff
+    tinyint to_char to_date to_number to_timestamp transform translate trim trunc try_add try_avg try_cast
+    try_divide try_multiply try_subtract try_sum typeof ucase unix_timestamp upper var_pop var_samp varchar
+    variance weekday weekofyear width_bucket year
+'''.split())
+
+# Functions of other dialects and their Databricks replacements
+DIALECT_HINTS = {
+    'getdate': 'current_timestamp()',
+    'strftime': 'date_format(date, pattern)',
+    'julianday': 'datediff(end, start)',
+    'charindex': 'instr(string, substring) or locate(substring, string)',
+    'convert': 'CAST(expr AS type)',
+    'group_concat': "concat_ws(',', collect_list(expr))",
+    'string_agg': "concat_ws(',', collect_list(expr))",
+    'iif': 'if(condition, then, else)',
+    'isnumeric': 'try_cast(expr AS DOUBLE) IS NOT NULL',
+}
+
+# Keywords followed by table names
+TABLE_KEYWORDS = ('FROM', 'JOIN')
+
+
+def bare_name(value):
+    return value.strip('`').lower()
+
+
+def validation_error(code, message, token=None, severity='error'):
+    return {'code': code, 'message': message, 'token': token, 'severity': severity}
+
+
+def format_lines(errors):
+    return "\n".join(f"- {error['code']}" + (f" ({error['token']})" if error['token'] else '') + f": {error['message']}"
+                     for error in errors)
+
+
+def format_errors(errors):
+    return "Error: SQL query was not run, it failed validation against table schemas:\n" + format_lines(errors)
+
+
+def format_warnings(warnings):
+    return "Validation warnings, possible causes:\n" + format_lines(warnings)
+
+
+class SQLValidator:
+    # schema_provider() -> {table: [column names]}, column_aliases {label: column} of names that aren't
+    # columns but agent is likely to take for them (dashboard metric labels)
+
+    def __init__(self, schema_provider, column_aliases=None):
+        self.schema_provider = schema_provider
+        self.column_aliases = column_aliases or {}
+
+    def validate(self, query):
+        # -> list of {'code', 'message', 'token', 'severity'}, empty for valid query, 'warning' ones don't block it
+        formatted = sqlparse.format(query, strip_comments=True).strip().rstrip(';').strip()
+        statements = [s for s in sqlparse.parse(formatted) if str(s).strip()] if formatted else []
+        if len(statements) != 1:
+            return [validation_error('statement', "Exactly one SQL statement is expected")]
+        if statements[0].get_type() != 'SELECT':
+            return [validation_error('statement', "Only SELECT queries can be run")]
+
+        errors = []
+        formatted = self.quote_labels(formatted, errors)
+        tokens = [t for t in sqlparse.parse(formatted)[0].flatten() if not t.is_whitespace]
+        errors += self.syntax_errors(tokens)
+        if any(error['code'] == 'syntax' for error in errors):
+            return errors
+
+        # lower case names for lookups, original names for messages
+        schema = {bare_name(table): {bare_name(c): c for c in columns} for table, columns in self.schema_provider().items()}
+        tables, names, consumed = self.references(tokens, errors)
+        errors += [self.unknown_table(table, schema) for table in tables if table not in schema and table not in names]
+
+        known = {column for table in tables if table in schema for column in schema[table]} | names
+        for i, token in enumerate(tokens):
+            if i in consumed:
+                continue
+            next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+            previous = tokens[i - 1] if i else None
+            if token.ttype in Literal.String.Symbol and bare_name(token.value[1:-1]) in known:
+                errors.append(validation_error(
+                    'double_quoted_identifier',
+                    f"{token.value} is a string literal in Databricks, quote identifiers in backticks: "
+                    f"`{token.value[1:-1]}`", token.value
+                ))
+            if token.ttype not in Name:
+                continue
+            if next_token is not None and next_token.match(Punctuation, '('):
+                if not self.is_filter_clause(tokens, i):
+                    errors += self.function_errors(token, previous)
+            elif next_token is not None and next_token.match(Punctuation, '.'):
+                continue
+            elif bare_name(token.value) not in known:
+                errors.append(self.unknown_column(token.value, tables, schema))
+        return self.unique(errors)
+
+    def quote_labels(self, query, errors):
+        # labels with spaces written without backticks are quoted, so they are reported once as labels
+        for label in sorted(self.column_aliases, key=len, reverse=True):
+            pattern = re.compile(rf'(?<![`\w]){re.escape(label)}(?![`\w])', re.IGNORECASE)
+            if ' ' in label and pattern.search(query):
+                errors.append(validation_error(
+                    'unquoted_identifier', "Names with spaces or brackets have to be quoted in backticks", label
+                ))
+                query = pattern.sub(f'`{label}`', query)
+        return query
+
+    def syntax_errors(self, tokens):
+        errors = []
+        depth = 0
+        for i, token in enumerate(tokens):
+            if token.ttype in Error:
+                errors.append(validation_error('syntax', "Unterminated quote or unexpected character", token.value))
+            elif token.match(Punctuation, '('):
+                depth += 1
+            elif token.match(Punctuation, ')'):
+                depth -= 1
+                if depth < 0:
+                    errors.append(validation_error('syntax', "Closing parenthesis without opening one", ')'))
+                    depth = 0
+            elif token.match(Punctuation, ',') and i + 1 < len(tokens) and tokens[i + 1].match(Keyword, TABLE_KEYWORDS):
+                errors.append(validation_error('syntax', f"Comma before {tokens[i + 1].value}", ','))
+            elif token.ttype in Name and token.value.upper() == 'TOP' and i and tokens[i - 1].normalized == 'SELECT':
+                errors.append(validation_error('dialect', "TOP is not supported by Databricks, use LIMIT n", 'TOP'))
+        if depth:
+            errors.append(validation_error('syntax', "Unbalanced parentheses", '('))
+        return errors
+
+    def references(self, tokens, errors):
+        # -> (tables read, names defined in query - aliases and CTEs, indices of tokens already resolved)
+        tables, names, consumed = [], set(), set()
+        # per open parenthesis whether it is arguments of function call, FROM inside them isn't table keyword -
+        # EXTRACT(YEAR FROM date), TRIM(BOTH ' ' FROM name)
+        calls = []
+        for i, token in enumerate(tokens):
+            next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+            if token.match(Punctuation, '('):
+                calls.append(bool(i) and tokens[i - 1].ttype in Name)
+            elif token.match(Punctuation, ')'):
+                calls = calls[:-1]
+            if token.ttype in Name and i and tokens[i - 1].match(Keyword, 'AS'):
+                # alias of column, table or CTE - followed by another name it has spaces and no backticks
+                names.add(bare_name(token.value))
+                consumed.add(i)
+                if next_token is not None and next_token.ttype in Name and not next_token.value.startswith('`'):
+                    consumed.add(i + 1)
+                    errors.append(validation_error(
+                        'unquoted_identifier', "Names with spaces have to be quoted in backticks",
+                        f'{token.value} {next_token.value}'
+                    ))
+            elif token.ttype in Name and next_token is not None and next_token.match(Keyword, 'AS') \
+                    and i + 2 < len(tokens) and tokens[i + 2].match(Punctuation, '('):
+                names.add(bare_name(token.value))
+                consumed.add(i)
+            elif token.ttype in Name and i and (tokens[i - 1].match(Punctuation, ')') or tokens[i - 1].ttype in Name
+                                                or tokens[i - 1].ttype in Literal or tokens[i - 1].match(Keyword, 'END')) \
+                    and (next_token is None or not next_token.match(Punctuation, ('(', '.'))):
+                # alias without AS after expression or table name
+                names.add(bare_name(token.value))
+                consumed.add(i)
+            elif token.ttype in Keyword and token.normalized.endswith(TABLE_KEYWORDS) and not (calls and calls[-1]):
+                j = i + 1
+                while j < len(tokens) and tokens[j].ttype in Name:
+                    # dotted catalog.schema.table name, its last part is table
+                    start = j
+                    while j + 2 < len(tokens) and tokens[j + 1].match(Punctuation, '.') and tokens[j + 2].ttype in Name:
+                        j += 2
+                    tables.append(bare_name(tokens[j].value))
+                    consumed.update(range(start, j + 1))
+                    j += 1
+                    if j < len(tokens) and token.normalized == 'FROM' and tokens[j].match(Punctuation, ','):
+                        j += 1
+        return tables, names, consumed
+
+    @staticmethod
+    def is_filter_clause(tokens, i):
+        # aggregate FILTER (WHERE ...) clause, not a function call
+        return bare_name(tokens[i].value) == 'filter' and i and tokens[i - 1].match(Punctuation, ')') \
+            and i + 2 < len(tokens) and tokens[i + 2].match(Keyword, 'WHERE')
+
+    def function_errors(self, token, previous):
+        name = bare_name(token.value)
+        if name in DATABRICKS_FUNCTIONS or (previous is not None and previous.match(Keyword, 'AS')):
+            return []
+        if name in DIALECT_HINTS:
+            return [validation_error('unknown_function', f"Not a Databricks function, use {DIALECT_HINTS[name]}",
+                                     token.value)]
+        close = difflib.get_close_matches(name, DATABRICKS_FUNCTIONS, n=1)
+        hint = f", did you mean {close[0]}?" if close else ""
+        return [validation_error('unknown_function', f"Not a known Databricks function{hint}", token.value,
+                                 severity='warning')]
+
+    def unknown_table(self, table, schema):
+        close = difflib.get_close_matches(table, schema, n=1)
+        hint = f" Did you mean {close[0]}?" if close else f" Tables: {', '.join(sorted(schema))}"
+        return validation_error('unknown_table', f"Table doesn't exist.{hint}", table)
+
+    def unknown_column(self, value, tables, schema):
+        name = bare_name(value)
+        aliases = {label.lower(): column for label, column in self.column_aliases.items()}
+        if name in aliases:
+            return validation_error('unknown_column', f"{value} is a dashboard label, not a column - use {aliases[name]}",
+                                    value)
+        holders = sorted(table for table, columns in schema.items() if name in columns)
+        if holders:
+            return validation_error('unknown_column', f"Column is not in {', '.join(tables) or 'queried tables'}, "
+                                    f"it is in {', '.join(holders)}", value)
+        candidates = {column: original for table in tables for column, original in schema.get(table, {}).items()}
+        close = difflib.get_close_matches(name, candidates, n=1)
+        hint = f", did you mean {candidates[close[0]]}?" if close else \
+            f", columns: {', '.join(candidates.values())}" if candidates else ""
+        return validation_error('unknown_column', f"Column doesn't exist{hint}", value)
+
+    @staticmethod
+    def unique(errors):
+        seen, result = set(), []
+        for error in errors:
+            key = (error['code'], error['token'])
+            if key not in seen:
+                seen.add(key)
+                result.append(error)
+        return result
+
+
+class ValidatedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    # sql_db_query running only queries passing local validation
+    validator: SQLValidator
+
+    def _run(self, query, run_manager=None):
+        issues = self.validator.validate(query)
+        if any(issue['severity'] == 'error' for issue in issues):
+            return format_errors(issues)
+        result = self.db.run_no_throw(query)
+        if issues and isinstance(result, str) and result.startswith('Error'):
+            result += "\n" + format_warnings(issues)
+        return result
+
+
+class ValidatingSQLToolkit(SQLDatabaseToolkit):
+    # SQLDatabaseToolkit without LLM query checker - queries are validated locally by sql_db_query itself
+    column_aliases: dict = {}
+
+    def get_tools(self):
+        list_tool = ListSQLDatabaseTool(db=self.db)
+        info_tool = InfoSQLDatabaseTool(
+            db=self.db,
+            description=(
+                "Input to this tool is a comma-separated list of tables, output is the schema and sample rows "
+                f"for those tables. Be sure that the tables actually exist by calling {list_tool.name} first! "
+                "Example Input: table1, table2, table3"
+            )
+        )
+        query_tool = ValidatedQuerySQLDatabaseTool(
+            db=self.db,
+            validator=SQLValidator(self.db.table_columns, self.column_aliases),
+            description=(
+                "Input to this tool is a detailed and correct Databricks SQL query, output is a result from the "
+                "database. Query is checked against table schemas before it runs - unknown tables or columns and "
+                "wrongly quoted names come back as a list of errors, fix them and run the query "
+                f"again. Quote names with spaces in backticks. Use {info_tool.name} to look up correct columns."
+            )
+        )
+        return [query_tool, info_tool, list_tool]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from src.services.queries.query_builder import BAD_HEALTH_LEVELS
+
+# Vectorized transformations shared by dashboard page and data visuals - no python callbacks per row,
+# except health sort ids of the few aggregated histogram rows
+
+# Health levels in reporting order, position in list + 1 is the sort id used by histogram
+HEALTH_LEVELS = ['Very bad', 'Bad', 'Fair', 'Good', 'Very good']
+SORT_IDS = {level: i + 1 for i, level in enumerate(HEALTH_LEVELS)}
+
+QUADRANT_COLORS = {
+    "Top Right": "red",
+    "Top Left": "orange",
+    "Bottom Left": "green",
+    "Bottom Right": "blue"
+}
+
+
+def line_breaks(text):
+    # every word longer than 2 characters (except first one) goes to new line
+    words = text.split(' ')
+    for i, word in enumerate(words):
+        if i != 0 and len(word) > 2:
+            words[i] = '<br>' + word
+    return ' '.join(words)
+
+
+def create_line_breaks(series):
+    # labels are computed once per distinct value and broadcast with category codes
+    codes, uniques = pd.factorize(series)
+    lookup = np.array([line_breaks(value) for value in uniques] + [np.nan], dtype=object)
+    return pd.Series(lookup[codes], index=series.index, name=series.name)
+
+
+def add_sort_id(series):
+    # mapped value by value like the former callback, unknown levels get missing sort id - histogram has
+    # ~30 aggregated rows, where this takes ~0.08 ms against ~1.2 ms of building ordered categorical
+    return series.map(SORT_IDS.get)
+
+
+def only_bad_health(df):
+    # number of people reported with bad or very bad health, missing for other levels
+    is_bad = df['Health_Assesement'].isin(BAD_HEALTH_LEVELS).to_numpy()
+    return pd.Series(np.where(is_bad, df['Number_of_People'].to_numpy(dtype=float), np.nan), index=df.index)
+
+
+def bad_health_by_country(df):
+    # number of people with bad health, all people and percentage of bad health for every country
+    result = df.assign(num_of_bad_health=only_bad_health(df)) \
+        .groupby('Country_Code', observed=True).agg(
+            num_of_bad_health=('num_of_bad_health', 'sum'),
+            num_of_total_health=('Number_of_People', 'sum')
+        ).reset_index()
+
+    result['perc_of_bad_health'] = result['num_of_bad_health']*100/result['num_of_total_health']
+    return result
+
+
+def assign_quadrant(x, y, x_avg, y_avg):
+    # points equal to average fall into "Bottom Right" as in original chart rules
+    x, y = np.asarray(x), np.asarray(y)
+    return np.select(
+        [
+            (x > x_avg) & (y > y_avg),
+            (x < x_avg) & (y > y_avg),
+            (x < x_avg) & (y < y_avg)
+        ],
+        ["Top Right", "Top Left", "Bottom Left"],
+        default="Bottom Right"
+    )
+
+
+def top_n_with_other(df, label_column, value_column, n, aggregate='sum', other_label='Other'):
+    # n largest rows are kept, remaining ones are folded into single "Other (count)" row
+    if len(df) <= n + 1:
+        return df[[label_column, value_column]]
+    ordered = df.sort_values(value_column, ascending=False)
+    top, rest = ordered.iloc[:n], ordered.iloc[n:]
+    other = pd.DataFrame({
+        label_column: [f"{other_label} ({len(rest)})"],
+        value_column: [rest[value_column].agg(aggregate)]
+    })
+    top = top[[label_column, value_column]].astype({label_column: object})
+    return pd.concat([top, other], ignore_index=True)
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.local_warehouse import agent_patches
+from src.services import langchain_agent
+
+
+@pytest.fixture
+def connect_agent(monkeypatch):
+    # data agent pointed at local warehouse and chat model for one test only - module attributes are
+    # restored and agent built with the test model is dropped afterwards
+    def connect(warehouse, llm):
+        db, answer_cache, patches = agent_patches(warehouse, llm)
+        for (module, attribute), value in patches.items():
+            monkeypatch.setattr(module, attribute, value)
+        langchain_agent.create_ai_agent.clear()
+        return db, answer_cache
+
+    yield connect
+    langchain_agent.create_ai_agent.clear()
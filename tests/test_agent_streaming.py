@@ -0,0 +1,48 @@
+from benchmarks.fake_llm import ScriptedChatModel
+from benchmarks.local_warehouse import SQLiteWarehouse
+from benchmarks.synthetic_data import scaled_tables
+from src.services import langchain_agent
+from src.services.conversation_memory import ConversationMemory
+
+QUESTION = "Which five countries spent most per inhabitant in 2022?"
+
+
+def test_final_answer_streams_token_by_token(connect_agent):
+    connect_agent(SQLiteWarehouse(scaled_tables('eu27')), ScriptedChatModel())
+    events = list(langchain_agent.stream_agent_answer(QUESTION, ConversationMemory()))
+    tokens = [event[1] for event in events if event[0] == 'token']
+    result = events[-1][1]
+
+    assert events[-1][0] == 'result'
+    assert len(tokens) > 1
+    assert ''.join(tokens) == result['text']
+    assert [event[1] for event in events if event[0] == 'step'][:3] == [
+        'sql_db_list_tables', 'sql_db_schema', 'sql_db_query'
+    ]
+
+
+def test_scripted_model_generate_fires_no_tokens():
+    llm = ScriptedChatModel()
+    tokens = []
+
+    class TokenHandler(langchain_agent.BaseCallbackHandler):
+        def on_llm_new_token(self, token, **kwargs):
+            tokens.append(token)
+
+    llm.invoke("Question: x", config={'callbacks': [TokenHandler()]})
+    assert tokens == []
+    list(llm.stream("Question: x", config={'callbacks': [TokenHandler()]}))
+    assert len(tokens) > 1
+
+
+def test_cached_answer_comes_as_one_token(connect_agent, monkeypatch):
+    llm = ScriptedChatModel()
+    connect_agent(SQLiteWarehouse(scaled_tables('eu27')), llm)
+    monkeypatch.setattr(langchain_agent, 'get_data_version', lambda: {'healthcare_expenditure': 1})
+    first = list(langchain_agent.stream_agent_answer(QUESTION, ConversationMemory()))
+    calls = llm.calls
+    second = list(langchain_agent.stream_agent_answer(QUESTION, ConversationMemory()))
+
+    assert llm.calls == calls
+    assert [event[0] for event in second] == ['token', 'result']
+    assert second[0][1] == first[-1][1]['text']
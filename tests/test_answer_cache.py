@@ -0,0 +1,55 @@
+from src.services.conversation_memory import ConversationMemory
+from src.services.langchain_agent import AnswerCache
+
+VERSION = {'workspace.eurostat.healthcare_expenditure': 3}
+
+
+def context_after(*turns):
+    memory = ConversationMemory()
+    for question, answer in turns:
+        memory.add_turn(question, answer)
+    return memory.render('')
+
+
+def test_first_question_of_conversation_is_shared():
+    cache = AnswerCache()
+    first = cache.key("Which countries spent most in 2022?", context_after(), VERSION)
+    assert cache.key("which countries spent  most in 2022", '', VERSION) == first
+    assert cache.key("Which countries spent most in 2022?", '', {**VERSION, 'x': 1}) != first
+
+
+def test_question_with_conversation_context_is_keyed_with_it():
+    cache = AnswerCache()
+    # implicit follow-up - nothing in the question itself says it depends on earlier turns
+    question = "Which one spent the most in 2019?"
+    nordics = context_after(("Show spending of Sweden, Finland and Denmark", "Sweden 10, Finland 8, Denmark 9"))
+    baltics = context_after(("Show spending of Estonia, Latvia and Lithuania", "Estonia 3, Latvia 2, Lithuania 4"))
+
+    assert cache.key(question, nordics, VERSION) != cache.key(question, baltics, VERSION)
+    assert cache.key(question, nordics, VERSION) != cache.key(question, '', VERSION)
+    assert cache.key(question, nordics, VERSION) == cache.key(question, nordics, VERSION)
+
+
+def test_expired_answer_is_dropped():
+    cache = AnswerCache(ttl=-1)
+    cache.put('key', 'answer', [])
+    assert cache.get('key') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put('a', 'A', [])
+    cache.put('b', 'B', [])
+    assert cache.get('a')['text'] == 'A'
+    cache.put('c', 'C', [])
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+
+
+def test_answers_survive_restart(tmp_path):
+    path = tmp_path / 'answers.sqlite'
+    AnswerCache(path=path).put('key', 'answer', ['SELECT 1'])
+    entry = AnswerCache(path=path).get('key')
+    assert (entry['text'], entry['logs']) == ('answer', ['SELECT 1'])
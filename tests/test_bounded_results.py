@@ -0,0 +1,89 @@
+import pyarrow as pa
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.services.bounded_results import ensure_limit, format_result, read_bounded, row_batches
+from src.services.cached_sql_database import CachingSQLDatabase
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT * FROM t", "SELECT * FROM t\nLIMIT 11"),
+    ("SELECT * FROM t;", "SELECT * FROM t\nLIMIT 11"),
+    ("SELECT * FROM t -- all rows\n;", "SELECT * FROM t\nLIMIT 11"),
+    ("SELECT * FROM t LIMIT 5;", "SELECT * FROM t LIMIT 5"),
+    ("SELECT * FROM t ORDER BY x limit 5", "SELECT * FROM t ORDER BY x limit 5"),
+    ("WITH top AS (SELECT * FROM t LIMIT 3) SELECT * FROM top",
+     "WITH top AS (SELECT * FROM t LIMIT 3) SELECT * FROM top\nLIMIT 11"),
+    ("SELECT * FROM (SELECT * FROM t LIMIT 3) s", "SELECT * FROM (SELECT * FROM t LIMIT 3) s\nLIMIT 11"),
+    ("SHOW TABLES", "SHOW TABLES"),
+    ("", ""),
+])
+def test_limit_is_added_to_selects_without_top_level_limit(query, expected):
+    assert ensure_limit(query, 11) == expected
+
+
+def batches(count, rows):
+    for i in range(count):
+        yield pa.table({'x': list(range(i * rows, (i + 1) * rows))})
+
+
+def test_read_stops_at_row_cap_without_fetching_further_batches():
+    fetched = []
+    table, truncated = read_bounded((fetched.append(b) or b for b in batches(10, 100)), max_rows=250)
+    assert (table.num_rows, truncated, len(fetched)) == (250, True, 3)
+
+
+def test_read_stops_at_byte_cap():
+    table, truncated = read_bounded(batches(10, 100), max_bytes=1000)
+    assert truncated
+    assert 0 < table.nbytes <= 1000
+    assert table.column('x').to_pylist() == list(range(table.num_rows))
+
+
+def test_exact_fit_is_not_truncated():
+    table, truncated = read_bounded(batches(2, 100), max_rows=200, max_bytes=10**6)
+    assert (table.num_rows, truncated) == (200, False)
+
+
+def test_small_complete_result_looks_like_sqldatabase_run():
+    table = pa.table({'Country_Code': ['PL', 'DE'], 'spending': [1.5, 2.5]})
+    assert format_result(table, False, preview_rows=50) == "[('PL', 1.5), ('DE', 2.5)]"
+    assert format_result(table.slice(0, 0), False, preview_rows=50) == ""
+
+
+def test_large_result_is_previewed_with_statistics():
+    table = pa.table({'Country_Code': ['PL', 'DE', 'FR'] * 10, 'spending': [float(i) for i in range(30)]})
+    formatted = format_result(table, True, preview_rows=2)
+    assert formatted.startswith("[('PL', 0.0), ('DE', 1.0)]\nShowing first 2 rows of more than 30")
+    assert "- Country_Code: 3 distinct values" in formatted
+    assert "- spending: min=0, max=29, mean=14.5, sum=435" in formatted
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warehouse.sqlite'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE spending (Country_Code TEXT, Year INTEGER, Million_euro REAL)"))
+        connection.execute(text("INSERT INTO spending VALUES " + ", ".join(
+            f"('C{i % 30}', {2000 + i // 30}, {i * 1.5})" for i in range(300)
+        )))
+        connection.execute(text("CREATE TABLE mixed (value)"))
+        connection.execute(text("INSERT INTO mixed VALUES (1), ('one'), (1.5)"))
+    return CachingSQLDatabase(engine, max_result_rows=100, preview_rows=5, fetch_batch_rows=40)
+
+
+def test_row_batches_of_empty_result_keep_columns(db):
+    with db._engine.connect() as connection:
+        result = connection.execute(text("SELECT Country_Code, Year FROM spending WHERE Year < 0"))
+        assert [batch.column_names for batch in row_batches(result, 10)] == [['Country_Code', 'Year']]
+
+
+def test_bounded_run_cuts_off_large_result(db):
+    result = db.run_no_throw("SELECT * FROM spending;")
+    assert "Showing first 5 rows of more than 100" in result
+    assert "Statistics of 100 fetched rows:" in result
+
+
+def test_mixed_types_in_column_give_error_string(db):
+    assert db.run_no_throw("SELECT value FROM mixed").startswith("Error: result could not be read - Arrow")
+    assert db.run_no_throw("SELECT missing FROM mixed").startswith("Error: (sqlite3.OperationalError)")
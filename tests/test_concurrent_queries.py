@@ -0,0 +1,48 @@
+import threading
+from types import SimpleNamespace
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from src.services.databricks_connection import execute_sql_queries
+
+
+def test_results_come_per_query_and_failed_query_gives_none():
+    def execute(query, parameters):
+        if query == 'broken':
+            raise RuntimeError("warehouse error")
+        return pd.DataFrame({'query': [query]})
+
+    results = execute_sql_queries({'ok': ('SELECT 1', None), 'failed': ('broken', None)}, execute=execute)
+
+    assert results['ok']['query'].tolist() == ['SELECT 1']
+    assert results['failed'] is None
+
+
+def test_timed_out_query_gives_none():
+    release = threading.Event()
+
+    def execute(query, parameters):
+        if query == 'slow':
+            release.wait(5)
+        return pd.DataFrame()
+
+    results = execute_sql_queries({'fast': ('fast', None), 'slow': ('slow', None)}, timeout=0.2, execute=execute)
+    release.set()
+
+    assert results['fast'] is not None
+    assert results['slow'] is None
+
+
+def test_worker_thread_is_detached_from_session_after_query(monkeypatch):
+    script_context = SimpleNamespace(pages_manager=SimpleNamespace(main_script_hash='page'))
+    monkeypatch.setattr(threading.current_thread(), SCRIPT_RUN_CONTEXT_ATTR_NAME, script_context, raising=False)
+
+    def execute(query, parameters):
+        return threading.current_thread(), get_script_run_ctx()
+
+    worker, context = execute_sql_queries({'query': ('SELECT 1', None)}, execute=execute)['query']
+    assert context is script_context
+    assert worker is not threading.current_thread()
+    assert getattr(worker, SCRIPT_RUN_CONTEXT_ATTR_NAME, None) is None
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from src.services import connection_pool
+from src.services.connection_pool import ConnectionPool, PoolTimeout
+
+
+class Connector:
+    # sqlite connections, first `failures` attempts fail like a starting warehouse
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        self.connections = []
+
+    def connect(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("warehouse is starting")
+        connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.connections.append(connection)
+        return connection
+
+
+def failing_ping(connection):
+    raise ConnectionError("connection was closed by warehouse")
+
+
+def test_returned_connection_is_reused():
+    connector = Connector()
+    pool = ConnectionPool(connector.connect, max_size=2)
+    first = pool.checkout()
+    first.close()
+    assert pool.checkout() is first
+    assert pool.stats()['created'] == 1
+
+
+def test_suspect_connection_is_pinged_and_replaced_when_dead():
+    connector = Connector()
+    pool = ConnectionPool(connector.connect, max_size=1, ping=failing_ping)
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("query failed")
+
+    replacement = pool.checkout()
+    assert replacement._connection is connector.connections[1]
+    assert pool.stats()['failed_pings'] == 1
+    assert pool.stats()['size'] == 1
+
+
+def test_expired_and_idle_connections_are_validated():
+    connector = Connector()
+    pings = []
+    pool = ConnectionPool(connector.connect, max_size=1, max_lifetime=60, idle_timeout=10,
+                          ping=pings.append)
+    connection = pool.checkout()
+    connection.close()
+
+    connection.last_used -= 20
+    assert pool.checkout() is connection
+    assert pings == [connection._connection]
+    connection.close()
+
+    connection.created_at -= 120
+    assert pool.checkout() is not connection
+    assert pool.stats()['expired'] == 1
+
+
+def test_connect_is_retried_with_exponential_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(connection_pool.time, 'sleep', sleeps.append)
+    connector = Connector(failures=2)
+    pool = ConnectionPool(connector.connect, max_retries=3, backoff=0.5)
+
+    assert pool.checkout() is not None
+    assert sleeps == [0.5, 1.0]
+    assert connector.attempts == 3
+
+
+def test_slot_is_released_when_all_attempts_failed(monkeypatch):
+    monkeypatch.setattr(connection_pool.time, 'sleep', lambda seconds: None)
+    pool = ConnectionPool(Connector(failures=3).connect, max_size=1, max_retries=3)
+
+    with pytest.raises(ConnectionError):
+        pool.checkout()
+    assert pool.stats()['size'] == 0
+    assert pool.checkout() is not None
+
+
+def test_checkout_times_out_when_pool_is_exhausted():
+    pool = ConnectionPool(Connector().connect, max_size=1)
+    pool.checkout()
+    with pytest.raises(PoolTimeout):
+        pool.checkout(timeout=0.05)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_concurrent_sessions_never_exceed_pool_size():
+    pool = ConnectionPool(Connector().connect, max_size=3)
+    in_use, shared, peak, lock = set(), [], [0], threading.Lock()
+
+    def session():
+        for _ in range(20):
+            with pool.connection() as connection:
+                with lock:
+                    if connection in in_use:
+                        shared.append(connection)
+                    in_use.add(connection)
+                    peak[0] = max(peak[0], len(in_use))
+                time.sleep(0.001)
+                with lock:
+                    in_use.remove(connection)
+
+    threads = [threading.Thread(target=session) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not shared
+    assert peak[0] <= 3
+    assert pool.stats()['size'] <= 3
+    assert pool.stats()['checkouts'] == 200
+
+
+def test_connection_invalidated_by_sqlalchemy_is_validated_before_reuse():
+    pool = ConnectionPool(Connector().connect, max_size=1)
+    engine = create_engine('sqlite://', creator=pool.sqlalchemy_creator(), poolclass=NullPool)
+    pool.watch_engine(engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert pool.idle[0].suspect is False
+
+    with engine.connect() as connection:
+        connection.invalidate()
+    assert pool.idle[0].suspect is True
@@ -0,0 +1,92 @@
+from langchain_core.language_models.fake import FakeListLLM
+
+from benchmarks.bench_memory import ANSWER, SQL
+from src.services.conversation_memory import ConversationMemory, estimate_tokens, truncate_to_tokens
+
+
+def ask(memory, turns):
+    for turn in range(1, turns + 1):
+        country, year = ['PL', 'DE', 'FR', 'SE'][turn % 4], ['2016', '2019', '2022'][turn % 3]
+        answer = ANSWER.format(country=country, value=1000 + turn * 7.5, year=year, cmp='above', share=10)
+        memory.add_turn(f"How much did {country} spend per inhabitant in {year}? ({turn})", answer,
+                        [SQL.format(year=year, country=country)])
+
+
+def test_context_stays_within_token_budget_over_long_conversation():
+    summaries = ["User compared healthcare spending across countries and years. " * 40] * 100
+    memory = ConversationMemory(llm=FakeListLLM(responses=summaries), token_budget=500)
+    question = "And in 2022?"
+    for turns in (1, 10, 100):
+        ask(memory, turns)
+        assert memory.context_tokens() <= memory.token_budget
+        assert estimate_tokens(memory.render(question)) <= memory.token_budget + estimate_tokens(question) + 20
+
+
+def test_older_turns_are_folded_into_rolling_summary_in_batches():
+    summaries = [f"summary after {n} folded batches" for n in range(1, 10)]
+    memory = ConversationMemory(llm=FakeListLLM(responses=summaries), recent_turns=3, fold_batch=3)
+    ask(memory, 5)
+    assert memory.summary_calls == 0
+    assert len(memory.turns) == 5
+
+    ask(memory, 1)
+    assert memory.summary_calls == 1
+    assert memory.summary == "summary after 1 folded batches"
+    assert [question for question, _ in memory.turns] == memory.questions[-3:]
+    assert len(memory.questions) == 6
+
+    prompt = memory.render("And in 2022?")
+    assert prompt.startswith("Summary of earlier conversation:\nsummary after 1 folded batches")
+    assert prompt.endswith("New question: And in 2022?")
+
+
+def test_summary_prompt_carries_previous_summary():
+    prompts = []
+
+    class RecordingLLM(FakeListLLM):
+        def invoke(self, prompt, *args, **kwargs):
+            prompts.append(prompt)
+            return super().invoke(prompt, *args, **kwargs)
+
+    memory = ConversationMemory(llm=RecordingLLM(responses=["first summary", "second summary"]), recent_turns=1,
+                                fold_batch=1)
+    ask(memory, 3)
+    assert "(empty)" in prompts[0]
+    assert "Current summary:\nfirst summary" in prompts[1]
+
+
+def test_summary_calls_stay_well_below_one_per_turn():
+    memory = ConversationMemory(llm=FakeListLLM(responses=["short summary"]), token_budget=1500)
+    ask(memory, 100)
+    assert memory.summary_calls <= 35
+
+
+def test_failed_summary_keeps_turns_verbatim():
+    class FailingLLM(FakeListLLM):
+        def invoke(self, prompt, *args, **kwargs):
+            raise TimeoutError("LLM did not answer")
+
+    memory = ConversationMemory(llm=FailingLLM(responses=[]), recent_turns=1, fold_batch=1)
+    ask(memory, 3)
+    assert (memory.summary, memory.summary_failures) == ("", 2)
+    assert len(memory.turns) == 3
+
+    memory.llm = FakeListLLM(responses=["summary of three turns"])
+    ask(memory, 1)
+    assert memory.summary == "summary of three turns"
+    assert len(memory.turns) == 1
+
+
+def test_executed_sql_is_deduplicated_and_capped():
+    memory = ConversationMemory(max_sql=2)
+    memory.add_turn("q1", "a1", ["SELECT 1", "SELECT  2"])
+    memory.add_turn("q2", "a2", ["SELECT 1", "SELECT 3"])
+    assert memory.executed_sql == ["SELECT 1", "SELECT 3"]
+
+
+def test_truncate_to_tokens():
+    text = "word " * 200
+    assert truncate_to_tokens("short text", 100) == "short text"
+    truncated = truncate_to_tokens(text, 50)
+    assert truncated.endswith(' ...')
+    assert estimate_tokens(truncated) <= 50
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip('pyspark')
+pytest.importorskip('delta')
+
+from databricks_etl.gold_tables import GOLD_TABLES, refresh_gold_tables
+from databricks_etl.incremental_load import local_spark, table_version
+
+CATALOG = 'spark_catalog'
+
+EXPENDITURE_COLUMNS = [
+    'Country_Code', 'Year', 'SHA_11', 'Financing_type', 'Financing_schema', 'Million_euro',
+    'Million_purchasing_power_standards__PPS_', 'Euro_per_inhabitant',
+    'Purchasing_power_standard__PPS__per_inhabitant', 'Percentage_of_gross_domestic_product__GDP_'
+]
+ASSESEMENT_COLUMNS = ['Age_Group', 'Country_Code', 'Sex', 'Health_Assesement', 'Year', 'Number_of_People']
+
+
+@pytest.fixture(scope='module')
+def spark(tmp_path_factory):
+    spark = local_spark(str(tmp_path_factory.mktemp('warehouse')))
+    for table in GOLD_TABLES:
+        spark.sql(f'DROP TABLE IF EXISTS {CATALOG}.{table}')
+    # shaped like healthcare_expenditure transformation output - top level schemes HF1-HF4 only
+    spark.createDataFrame([
+        ('AT', '2022', 'HF1', 'Government and compulsory schemes', 'Government schemes and compulsory contributory '
+         'health care financing schemes', 10.0, 1.0, 1.0, 1.0, 1.0),
+        ('AT', '2022', 'HF2', 'Voluntary schemes', 'Voluntary health care payment schemes', 3.0, 1.0, 1.0, 1.0, 1.0),
+        ('AT', '2022', 'HF3', 'Out-of-pocket payments', 'Household out-of-pocket payment', 5.0, 1.0, 1.0, 1.0, 1.0),
+        ('AT', '2022', 'HF4', 'Rest of world', 'Rest of the world financing schemes (non-resident)',
+         0.5, 1.0, 1.0, 1.0, 1.0),
+        ('AT', '2019', 'HF1', 'Government and compulsory schemes', 'Government schemes and compulsory contributory '
+         'health care financing schemes', 8.0, 1.0, 1.0, 1.0, 1.0),
+        ('DE', '2022', 'HF1', 'Government and compulsory schemes', 'Government schemes and compulsory contributory '
+         'health care financing schemes', 90.0, 1.0, 1.0, 1.0, 1.0),
+    ], EXPENDITURE_COLUMNS).write.mode('overwrite').saveAsTable(f'{CATALOG}.eurostat.healthcare_expenditure')
+    spark.createDataFrame([('Y16-24', 'AT', 'F', 'Bad', '2022', 100)], ASSESEMENT_COLUMNS) \
+        .write.mode('overwrite').saveAsTable(f'{CATALOG}.eurostat.own_health_assesement')
+    yield spark
+    spark.stop()
+
+
+def test_gold_expenditure_sums_per_year_country_and_financing_type(spark):
+    refresh_gold_tables(spark, CATALOG)
+    rows = spark.read.table(f'{CATALOG}.eurostat.gold_expenditure').collect()
+    totals = {(row['Year'], row['Country_Code'], row['Financing_type']): (row['Million_euro'], row['Row_count'])
+              for row in rows}
+    assert totals == {
+        ('2022', 'AT', 'Government and compulsory schemes'): (10.0, 1),
+        ('2022', 'AT', 'Voluntary schemes'): (3.0, 1),
+        ('2022', 'AT', 'Out-of-pocket payments'): (5.0, 1),
+        ('2022', 'AT', 'Rest of world'): (0.5, 1),
+        ('2019', 'AT', 'Government and compulsory schemes'): (8.0, 1),
+        ('2022', 'DE', 'Government and compulsory schemes'): (90.0, 1),
+    }
+
+
+def test_unchanged_sources_create_no_new_gold_versions(spark):
+    refresh_gold_tables(spark, CATALOG)
+    versions = {table: table_version(spark, f'{CATALOG}.{table}') for table in GOLD_TABLES}
+
+    assert refresh_gold_tables(spark, CATALOG) == []
+    assert {table: table_version(spark, f'{CATALOG}.{table}') for table in GOLD_TABLES} == versions
@@ -0,0 +1,100 @@
+import pytest
+
+pytest.importorskip('pyspark')
+pytest.importorskip('delta')
+
+from benchmarks.synthetic_data import eurostat_data, eurostat_dic
+from databricks_etl.eurostat_source import RecordedEurostat, record_fixtures
+from databricks_etl.eurostat_tables import TABLES
+from databricks_etl.incremental_load import IncrementalLoader, local_spark, merge_changes, table_version
+
+CATALOG = 'spark_catalog'
+
+
+class SyntheticEurostat:
+
+    def __init__(self, seeds=None):
+        self.seeds = seeds or {}
+
+    def get_data(self, code):
+        return eurostat_data(code, seed=self.seeds.get(code, 0))
+
+    def get_dic(self, code, param):
+        return eurostat_dic(code, param)
+
+
+@pytest.fixture(scope='module')
+def spark(tmp_path_factory):
+    spark = local_spark(str(tmp_path_factory.mktemp('warehouse')))
+    yield spark
+    spark.stop()
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    # recorded payloads, second directory has new expenditure numbers
+    record_fixtures(SyntheticEurostat(), tmp_path / 'v1')
+    record_fixtures(SyntheticEurostat({'hlth_sha11_hf': 1}), tmp_path / 'v2')
+    return tmp_path
+
+
+@pytest.fixture
+def clean_catalog(spark):
+    for table in list(TABLES) + ['general.load_manifest']:
+        spark.sql(f'DROP TABLE IF EXISTS {CATALOG}.{table}')
+
+
+def load(spark, directory, mode='incremental'):
+    loader = IncrementalLoader(spark, RecordedEurostat(directory), catalog=CATALOG, mode=mode)
+    entries = {entry['table_name']: entry for entry in loader.load_all()}
+    loader.write_manifest()
+    return entries
+
+
+def test_unchanged_payloads_are_skipped_without_new_versions(spark, fixtures, clean_catalog):
+    first = load(spark, fixtures / 'v1')
+    assert {entry['status'] for entry in first.values()} == {'created'}
+
+    second = load(spark, fixtures / 'v1')
+    assert {entry['status'] for entry in second.values()} == {'skipped'}
+    for table, entry in second.items():
+        assert entry['table_version'] == first[table]['table_version']
+
+
+def test_changed_payload_is_merged_and_other_tables_skipped(spark, fixtures, clean_catalog):
+    first = load(spark, fixtures / 'v1')
+    second = load(spark, fixtures / 'v2')
+
+    assert second['eurostat.healthcare_expenditure']['status'] == 'merged'
+    assert second['eurostat.healthcare_expenditure']['table_version'] == \
+        first['eurostat.healthcare_expenditure']['table_version'] + 1
+    assert second['eurostat.own_health_assesement']['status'] == 'skipped'
+
+    # merged table matches a full load of the same payload
+    merged = spark.read.table(f'{CATALOG}.eurostat.healthcare_expenditure')
+    load(spark, fixtures / 'v2', mode='full')
+    full = spark.read.table(f'{CATALOG}.eurostat.healthcare_expenditure')
+    assert merged.exceptAll(full).count() == 0 and full.exceptAll(merged).count() == 0
+
+
+def test_schema_change_overwrites_table_schema(spark, fixtures, clean_catalog):
+    load(spark, fixtures / 'v1')
+    table_name = f'{CATALOG}.eurostat.healthcare_expenditure'
+    spark.read.table(table_name).selectExpr('*', "'x' AS Obsolete") \
+        .write.option('overwriteSchema', 'true').mode('overwrite').saveAsTable(table_name)
+
+    entry = load(spark, fixtures / 'v2')['eurostat.healthcare_expenditure']
+    assert entry['status'] == 'overwritten'
+    assert 'Obsolete' not in spark.read.table(table_name).columns
+
+
+def test_duplicate_source_keys_are_rejected_before_merge(spark, clean_catalog):
+    table_name = f'{CATALOG}.general.merge_target'
+    spark.sql(f'DROP TABLE IF EXISTS {table_name}')
+    spark.createDataFrame([('AT', '2022', 1.0)], ['Country_Code', 'Year', 'value']).write.saveAsTable(table_name)
+    version = table_version(spark, table_name)
+    source = spark.createDataFrame([('AT', '2022', 2.0), ('AT', '2022', 3.0)], ['Country_Code', 'Year', 'value'])
+
+    with pytest.raises(ValueError, match='Duplicate keys'):
+        merge_changes(spark, source, table_name, ['Country_Code', 'Year'])
+    assert table_version(spark, table_name) == version
@@ -0,0 +1,126 @@
+import warnings
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from benchmarks.fake_llm import ScriptedChatModel
+from src.services.llm_cache import PersistentLLMCache, StreamingCacheMixin
+
+PROMPT = "Question: Which countries spent most in 2022?"
+
+
+class CountingCache(PersistentLLMCache):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lookups = 0
+        self.updates = 0
+
+    def lookup(self, prompt, llm_string):
+        self.lookups += 1
+        return super().lookup(prompt, llm_string)
+
+    def update(self, prompt, llm_string, return_val):
+        self.updates += 1
+        super().update(prompt, llm_string, return_val)
+
+
+class CachedModel(StreamingCacheMixin, ScriptedChatModel):
+    pass
+
+
+class CachedStreamingModel(StreamingCacheMixin, ScriptedChatModel):
+    # like Gemini built with streaming=True, `invoke` generates through `_stream`
+    streaming: bool = True
+
+
+def test_streamed_call_looks_up_and_stores_once(tmp_path):
+    cache = CountingCache(tmp_path / 'llm.sqlite')
+    llm = CachedModel(cache=cache)
+
+    first = ''.join(chunk.content for chunk in llm.stream(PROMPT))
+    assert (cache.lookups, cache.updates, llm.calls) == (1, 1, 1)
+
+    second = ''.join(chunk.content for chunk in llm.stream(PROMPT))
+    assert (cache.lookups, cache.updates, llm.calls) == (2, 1, 1)
+    assert second == first
+
+
+def test_invoke_of_streaming_model_looks_up_and_stores_once(tmp_path):
+    cache = CountingCache(tmp_path / 'llm.sqlite')
+    llm = CachedStreamingModel(cache=cache)
+
+    first = llm.invoke(PROMPT).content
+    assert (cache.lookups, cache.updates, llm.calls) == (1, 1, 1)
+
+    assert llm.invoke(PROMPT).content == first
+    assert ''.join(chunk.content for chunk in llm.stream(PROMPT)) == first
+    assert (cache.lookups, cache.updates, llm.calls) == (3, 1, 1)
+
+
+def test_responses_survive_restart(tmp_path):
+    llm = CachedModel(cache=PersistentLLMCache(tmp_path / 'llm.sqlite'))
+    answer = llm.invoke(PROMPT).content
+
+    restarted = CachedModel(cache=PersistentLLMCache(tmp_path / 'llm.sqlite'))
+    assert restarted.invoke(PROMPT).content == answer
+    assert restarted.calls == 0
+
+
+def test_namespaces_are_isolated_and_old_ones_purged_on_change(tmp_path):
+    namespace = {'version': 'v1'}
+    cache = PersistentLLMCache(tmp_path / 'llm.sqlite', namespace_provider=lambda: namespace['version'])
+    llm = CachedModel(cache=cache)
+    llm.invoke(PROMPT)
+    llm.invoke(PROMPT + ' And in 2021?')
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['evictions'] == 0
+
+    namespace['version'] = 'v2'
+    llm.invoke(PROMPT)
+    assert llm.calls == 3
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['evictions'] == 2
+
+
+def test_nothing_is_cached_without_namespace(tmp_path):
+    cache = PersistentLLMCache(tmp_path / 'llm.sqlite', namespace_provider=lambda: None)
+    llm = CachedModel(cache=cache)
+    llm.invoke(PROMPT)
+    llm.invoke(PROMPT)
+    assert llm.calls == 2
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted_above_size_limit(tmp_path):
+    cache = PersistentLLMCache(tmp_path / 'llm.sqlite')
+    llm = CachedModel(cache=cache)
+    prompts = [f"{PROMPT} ({i})" for i in range(3)]
+    for prompt in prompts:
+        llm.invoke(prompt)
+    entry_size = cache.stats()['bytes'] // 3
+
+    # first prompt was used last, so second one goes first
+    llm.invoke(prompts[0])
+    cache.max_bytes = entry_size * 2 + entry_size // 2
+    llm.invoke(PROMPT + ' (3)')
+    calls = llm.calls
+    llm.invoke(prompts[0])
+    assert llm.calls == calls
+    llm.invoke(prompts[1])
+    assert llm.calls == calls + 1
+    assert cache.stats()['bytes'] <= cache.max_bytes + entry_size
+
+
+def test_hit_returns_original_message_type_without_warnings(tmp_path):
+    cache = PersistentLLMCache(tmp_path / 'llm.sqlite')
+    message = AIMessage(content="Austria spent most.", response_metadata={'finish_reason': 'STOP'},
+                        usage_metadata={'input_tokens': 10, 'output_tokens': 4, 'total_tokens': 14})
+    cache.update(PROMPT, 'model', [ChatGeneration(message=message, generation_info={'finish_reason': 'STOP'})])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        cached = cache.lookup(PROMPT, 'model')
+    assert type(cached[0].message) is AIMessage
+    assert cached[0].message == message
+    assert cached[0].generation_info == {'finish_reason': 'STOP'}
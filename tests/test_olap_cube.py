@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from benchmarks.synthetic_data import assesement_table, expenditure_table
+from src.services.data_store import compact_table
+from src.services.olap_cube import Cube
+from src.services.queries.query_builder import METRIC_COLUMNS
+
+EXPENDITURE_DIMENSIONS = ['Year', 'Country_Code', 'Financing_type']
+ASSESEMENT_DIMENSIONS = ['Year', 'Country_Code', 'Sex', 'Age_Group', 'Health_Assesement']
+
+
+def as_frame(table):
+    # plain pandas frame of source rows - dictionary columns as strings, so groupby sorts them alphabetically
+    df = table.to_pandas()
+    for column in df.select_dtypes('category'):
+        df[column] = df[column].astype(object)
+    return df
+
+
+def grouped(df, by, measures):
+    # reference - pandas groupby of source rows, sorted like cube labels
+    return df.groupby(by, observed=True, sort=True)[measures].sum().reset_index()
+
+
+def assert_same(result, expected, by, measures):
+    assert len(result) == len(expected)
+    for dim in by:
+        assert list(result[dim]) == list(expected[dim])
+    for measure in measures:
+        assert np.allclose(result[measure].to_numpy(dtype=float), expected[measure].to_numpy(dtype=float))
+
+
+@pytest.fixture(scope='module')
+def expenditure():
+    # compact arrow table like the data store holds - dictionary dimensions and int16 years
+    return compact_table(expenditure_table(5000))
+
+
+@pytest.fixture(scope='module')
+def assesement():
+    return compact_table(assesement_table(5000))
+
+
+@pytest.mark.parametrize('by', [['Country_Code'], ['Financing_type'], ['Year', 'Country_Code'],
+                                ['Financing_type', 'Year']])
+def test_arrow_cube_aggregate_matches_groupby(expenditure, by):
+    measures = list(METRIC_COLUMNS)
+    cube = Cube.from_arrow(expenditure, EXPENDITURE_DIMENSIONS, measures)
+    assert_same(cube.aggregate(by, measures), grouped(as_frame(expenditure), by, measures), by, measures)
+
+
+def test_sliced_cube_matches_filtered_groupby(assesement):
+    df = as_frame(assesement)
+    cube = Cube.from_arrow(assesement, ASSESEMENT_DIMENSIONS, ['Number_of_People'])
+    year = int(cube.labels['Year'][-1])
+    countries, ages = ['DE', 'FR', 'PL'], ['Y25-34', 'Y65+']
+
+    sliced = cube.slice(Year=year, Country_Code=countries + ['XX'], Age_Group=ages, Sex=['M', 'F'])
+    mask = (df['Year'] == year) & df['Country_Code'].isin(countries) & df['Age_Group'].isin(ages)
+    by = ['Age_Group', 'Health_Assesement']
+    assert_same(sliced.aggregate(by, ['Number_of_People']), grouped(df[mask], by, ['Number_of_People']),
+                by, ['Number_of_People'])
+    assert list(sliced.labels['Country_Code']) == countries
+
+
+def test_frame_and_arrow_cubes_are_equal(expenditure):
+    measures = list(METRIC_COLUMNS)
+    from_arrow = Cube.from_arrow(expenditure, EXPENDITURE_DIMENSIONS, measures)
+    from_frame = Cube.from_frame(as_frame(expenditure), EXPENDITURE_DIMENSIONS, measures)
+    assert np.allclose(from_arrow.values, from_frame.values)
+    assert np.array_equal(from_arrow.counts, from_frame.counts)
+    for dim in EXPENDITURE_DIMENSIONS:
+        assert list(from_arrow.labels[dim]) == list(from_frame.labels[dim])
+
+
+def test_aggregated_rows_keep_row_counts_and_skip_missing_members():
+    table = compact_table(pa.table({
+        'Year': ['2021', '2022', '2022', '2022'],
+        'Country_Code': ['PL', 'PL', None, 'DE'],
+        'Number_of_People': [10, 20, 5, None],
+        'Row_count': [2, 3, 1, 4],
+    }))
+    cube = Cube.from_arrow(table, ['Year', 'Country_Code'], ['Number_of_People'], count_column='Row_count')
+
+    assert list(cube.labels['Country_Code']) == ['DE', 'PL']
+    assert cube.counts.sum() == 9
+    result = cube.aggregate(['Country_Code'], ['Number_of_People'])
+    assert result.to_dict('list') == {'Country_Code': ['DE', 'PL'], 'Number_of_People': [0.0, 30.0]}
+
+    # empty cells are dropped like in groupby unless asked for
+    assert len(cube.aggregate(['Year', 'Country_Code'], ['Number_of_People'])) == 3
+    assert len(cube.aggregate(['Year', 'Country_Code'], ['Number_of_People'], keep_empty=True)) == 4
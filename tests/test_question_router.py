@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.bench_router import QUESTIONS
+from src.services.question_router import MIN_CONFIDENCE, classify
+
+
+def routed(question):
+    intent, confidence = classify(question)
+    return intent if confidence >= MIN_CONFIDENCE else None
+
+
+@pytest.mark.parametrize('question, expected', QUESTIONS)
+def test_labelled_questions(question, expected):
+    assert routed(question) == expected
+
+
+@pytest.mark.parametrize('question', [
+    # ranking of countries by share - share template gives one breakdown by financing type
+    "Which country has the highest share of out-of-pocket payments?",
+    "Rank countries by share of government schemes in 2022",
+    # grouping by financing scheme - spending template ranks countries
+    "Which financing scheme costs the most?",
+    "How much did households spend out of pocket in 2019?",
+    # follow-ups depend on earlier turns
+    "Which of them has the highest spending?",
+    "And what about their spending per inhabitant?",
+    # comparisons
+    "How does spending of Poland compared with Germany look in 2022?",
+    "Is spending per capita in Spain higher than in Italy?",
+    "Show spending of France relative to Germany",
+])
+def test_questions_templates_cant_answer_go_to_agent(question):
+    assert routed(question) is None
+
+
+def test_unrelated_question_matches_no_intent():
+    assert classify("Hello, what can you do?") == (None, 0.0)
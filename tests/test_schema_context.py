@@ -0,0 +1,28 @@
+import os
+
+from src.services import langchain_agent
+from src.services.schema_context import save_schema_context
+
+VERSION = {'workspace.eurostat.healthcare_expenditure': 3}
+
+
+def test_schema_context_is_parsed_once_per_file_and_version(tmp_path, monkeypatch):
+    path = tmp_path / 'schema_context.json'
+    loads = []
+    load = langchain_agent.load_schema_context
+    monkeypatch.setattr(langchain_agent, 'SCHEMA_CONTEXT_PATH', str(path))
+    monkeypatch.setattr(langchain_agent, 'get_data_version', lambda: VERSION)
+    monkeypatch.setattr(langchain_agent, 'load_schema_context',
+                        lambda path, version: loads.append(path) or load(path, version))
+    langchain_agent.read_schema_context.clear()
+
+    save_schema_context({'data_version': VERSION, 'tables': {}}, path)
+    for _ in range(3):
+        assert langchain_agent.get_schema_context()['tables'] == {}
+    assert len(loads) == 1
+
+    # rewritten artifact is read again
+    save_schema_context({'data_version': VERSION, 'tables': {'gold_expenditure': {}}}, path)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    assert 'gold_expenditure' in langchain_agent.get_schema_context()['tables']
+    assert len(loads) == 2
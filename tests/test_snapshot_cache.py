@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pyarrow as pa
+
+from src.services import databricks_connection
+from src.services.data_store import DataStore
+from src.services.snapshot_cache import SnapshotCache
+
+QUERY = "SELECT * FROM eurostat.healthcare_expenditure"
+
+
+class Warehouse:
+
+    def __init__(self, rows=10):
+        self.rows = rows
+        self.version = 0
+        self.queries = 0
+        self.version_checks = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def run_query(self, query, parameters):
+        self.queries += 1
+        return pa.table({'Year': list(range(self.rows)), 'version': [self.version] * self.rows})
+
+    def table_version(self, table_name):
+        self.version_checks += 1
+        self.release.wait()
+        return self.version
+
+
+def wait_for_revalidation(cache):
+    while cache.stats()['revalidating']:
+        time.sleep(0.01)
+
+
+def test_snapshot_is_served_from_disk_and_refreshed_after_table_change(tmp_path):
+    warehouse, refreshed = Warehouse(), []
+    SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version).get(QUERY)
+
+    warehouse.version = 1
+    cache = SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version, check_interval=0,
+                          on_refresh=lambda query, parameters: refreshed.append(query))
+    assert cache.get(QUERY).column('version')[0].as_py() == 0
+    wait_for_revalidation(cache)
+
+    assert refreshed == [QUERY]
+    assert cache.get(QUERY).column('version')[0].as_py() == 1
+    assert cache.stats()['refreshes'] == 1
+
+
+def test_one_revalidation_in_flight_per_snapshot(tmp_path):
+    warehouse = Warehouse()
+    cache = SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version, check_interval=0)
+    cache.get(QUERY)
+    checks = warehouse.version_checks
+
+    warehouse.release.clear()
+    for _ in range(20):
+        cache.get(QUERY)
+    assert cache.stats()['revalidating'] == 1
+    warehouse.release.set()
+    wait_for_revalidation(cache)
+    assert warehouse.version_checks == checks + 1
+
+
+def test_revalidation_is_rate_limited(tmp_path):
+    warehouse = Warehouse()
+    cache = SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version, check_interval=0,
+                          revalidate_interval=60)
+    cache.get(QUERY)
+    checks = warehouse.version_checks
+    for _ in range(5):
+        cache.get(QUERY)
+        wait_for_revalidation(cache)
+    assert warehouse.version_checks == checks + 1
+
+
+def test_least_recently_used_snapshots_are_evicted_above_size_limit(tmp_path):
+    warehouse = Warehouse(rows=1000)
+    cache = SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version)
+    queries = [f"{QUERY} WHERE Year > {year}" for year in range(3)]
+    cache.get(queries[0])
+    size = cache.snapshot_path(queries[0], None).stat().st_size
+
+    cache.max_bytes = size * 2 + size // 2
+    cache.get(queries[1])
+    time.sleep(0.01)
+    cache.get(queries[0])
+    time.sleep(0.01)
+    cache.get(queries[2])
+
+    assert cache.snapshot_path(queries[0], None).exists()
+    assert not cache.snapshot_path(queries[1], None).exists()
+    assert cache.snapshot_path(queries[2], None).exists()
+    assert cache.stats()['evictions'] == 1
+
+
+def test_clearing_data_store_bumps_generation():
+    store = DataStore()
+    store.get('table', lambda: pa.table({'Year': [2022]}))
+    generation = store.generation
+    store.clear()
+    assert store.generation == generation + 1
+    assert store.stats()['tables'] == 0
+
+
+def test_page_load_picks_up_new_version_of_table_held_in_memory(tmp_path, monkeypatch):
+    warehouse, store = Warehouse(), DataStore()
+    cache = SnapshotCache(tmp_path, warehouse.run_query, warehouse.table_version, check_interval=0,
+                          revalidate_interval=0, on_refresh=lambda query, parameters: store.clear())
+    monkeypatch.setattr(databricks_connection, 'get_snapshot_cache', lambda: cache)
+    monkeypatch.setattr(databricks_connection, 'get_data_store', lambda: store)
+    queries = {'expenditure': (QUERY, None)}
+
+    databricks_connection.revalidate_snapshots(queries)
+    assert databricks_connection.fetch_shared_table(QUERY).column('version')[0].as_py() == 0
+    generation = store.generation
+
+    # long-lived server - data store keeps answering without reaching snapshot cache
+    warehouse.version = 1
+    assert databricks_connection.fetch_shared_table(QUERY).column('version')[0].as_py() == 0
+
+    databricks_connection.revalidate_snapshots(queries)
+    wait_for_revalidation(cache)
+    assert store.generation == generation + 1
+    assert databricks_connection.fetch_shared_table(QUERY).column('version')[0].as_py() == 1
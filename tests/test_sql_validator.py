@@ -0,0 +1,94 @@
+import pytest
+from langchain_community.utilities import SQLDatabase
+
+from src.services.queries.query_builder import METRIC_COLUMNS
+from src.services.sql_validator import SQLValidator, ValidatedQuerySQLDatabaseTool, format_errors
+
+SCHEMA = {
+    'healthcare_expenditure': [
+        'Year', 'Country_Code', 'Financing_type', 'Million_euro', 'Euro_per_inhabitant'
+    ],
+    'own_health_assesement': ['Year', 'Country_Code', 'Age_Group', 'Health_Assesement', 'Number_of_People'],
+}
+
+
+@pytest.fixture
+def validator():
+    return SQLValidator(lambda: SCHEMA, METRIC_COLUMNS)
+
+
+def codes(issues, severity='error'):
+    return [(issue['code'], issue['token']) for issue in issues if issue['severity'] == severity]
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT EXTRACT(YEAR FROM current_date())",
+    "SELECT Country_Code, SUM(Million_euro) AS spending FROM eurostat.healthcare_expenditure "
+    "WHERE Year = '2022' GROUP BY Country_Code ORDER BY spending DESC LIMIT 5;",
+    "SELECT MAX(Million_euro) FILTER (WHERE Year = '2022') AS latest FROM eurostat.healthcare_expenditure",
+    "SELECT TRIM(BOTH ' ' FROM Country_Code) FROM eurostat.healthcare_expenditure",
+    "SELECT Country_Code FROM eurostat.healthcare_expenditure WHERE Year = EXTRACT(YEAR FROM current_date()) - 3",
+    "WITH totals AS (SELECT Country_Code, SUM(Million_euro) AS total FROM eurostat.healthcare_expenditure "
+    "GROUP BY Country_Code) SELECT t.Country_Code, total FROM totals t ORDER BY total DESC",
+    "SELECT e.Country_Code, h.Number_of_People FROM eurostat.healthcare_expenditure e "
+    "JOIN eurostat.own_health_assesement h ON e.Country_Code = h.Country_Code AND e.Year = h.Year",
+    "SELECT `Country_Code` FROM eurostat.healthcare_expenditure "
+    "WHERE Country_Code IN (SELECT Country_Code FROM eurostat.own_health_assesement)",
+    "-- top spenders\nSELECT Country_Code FROM eurostat.healthcare_expenditure",
+])
+def test_valid_queries_pass(validator, query):
+    assert validator.validate(query) == []
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT Year FROM eurostat.expenditure", ('unknown_table', 'expenditure')),
+    ("SELECT Number_of_People FROM eurostat.healthcare_expenditure", ('unknown_column', 'Number_of_People')),
+    ("SELECT Million_euro FROM eurostat.healthcare_expenditure WHERE \"Financing_type\" = 'Government schemes'",
+     ('double_quoted_identifier', '"Financing_type"')),
+    ("SELECT TOP 5 Country_Code FROM eurostat.healthcare_expenditure", ('dialect', 'TOP')),
+    ("SELECT SUM(Million_euro FROM eurostat.healthcare_expenditure", ('syntax', '(')),
+    ("SELECT Country_Code, FROM eurostat.healthcare_expenditure", ('syntax', ',')),
+    ("SELECT group_concat(Country_Code) FROM eurostat.healthcare_expenditure", ('unknown_function', 'group_concat')),
+    ("SELECT `Total Spending` FROM eurostat.healthcare_expenditure", ('unknown_column', '`Total Spending`')),
+    ("DELETE FROM eurostat.healthcare_expenditure", ('statement', None)),
+    ("SELECT 1; SELECT 2", ('statement', None)),
+])
+def test_broken_queries_fail(validator, query, expected):
+    assert expected in codes(validator.validate(query))
+
+
+def test_dashboard_label_points_to_column(validator):
+    issues = validator.validate("SELECT `Spending per inhabitant` FROM eurostat.healthcare_expenditure")
+    assert 'use Euro_per_inhabitant' in issues[0]['message']
+
+
+def test_unknown_function_is_warning_only(validator):
+    issues = validator.validate("SELECT array_position(Country_Code, 'PL') FROM eurostat.healthcare_expenditure")
+    assert codes(issues) == []
+    assert codes(issues, 'warning') == [('unknown_function', 'array_position')]
+
+
+def test_quote_labels_quotes_labels_with_spaces(validator):
+    errors = []
+    quoted = validator.quote_labels(
+        "SELECT total spending (pps), `Total Spending` FROM eurostat.healthcare_expenditure", errors
+    )
+    assert quoted == "SELECT `Total Spending (PPS)`, `Total Spending` FROM eurostat.healthcare_expenditure"
+    assert codes(errors) == [('unquoted_identifier', 'Total Spending (PPS)')]
+
+
+def test_unquoted_label_is_reported_once(validator):
+    issues = validator.validate("SELECT Percentage of GDP FROM eurostat.healthcare_expenditure")
+    assert codes(issues) == [('unquoted_identifier', 'Percentage of GDP'),
+                             ('unknown_column', '`Percentage of GDP`')]
+    assert format_errors(issues).startswith("Error: SQL query was not run")
+
+
+def test_query_tool_runs_queries_with_warnings_only(validator):
+    db = SQLDatabase.from_uri('sqlite://')
+    tool = ValidatedQuerySQLDatabaseTool(db=db, validator=validator)
+
+    assert tool.run("SELECT Year FROM eurostat.expenditure").startswith("Error: SQL query was not run")
+    failed = tool.run("SELECT array_position(Country_Code, 'PL') FROM healthcare_expenditure")
+    assert failed.startswith("Error: (sqlite3.OperationalError)")
+    assert "- unknown_function (array_position)" in failed
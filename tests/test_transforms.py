@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_transforms import (
+    add_sort_id_rowwise, assign_quadrant_rowwise, create_line_breaks_rowwise, only_bad_health_rowwise
+)
+from benchmarks.synthetic_data import FINANCING_TYPES, assesement_table
+from src.services import transforms
+
+
+@pytest.fixture
+def assesement():
+    df = assesement_table(2000).to_pandas()
+    # unknown values were handled implicitly by row-wise callbacks
+    df.loc[df.index[:3], 'Health_Assesement'] = 'Unknown'
+    return df
+
+
+@pytest.fixture
+def scatter():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'perc_of_gdp': rng.uniform(0, 10, 2000), 'perc_of_bad_health': rng.uniform(0, 20, 2000)})
+    # point exactly on the average falls into the last branch of former callback
+    df.loc[0, 'perc_of_gdp'] = df['perc_of_gdp'].mean()
+    return df
+
+
+def test_create_line_breaks_matches_rowwise():
+    financing = pd.Series(np.resize(FINANCING_TYPES, 100))
+    assert transforms.create_line_breaks(financing).equals(financing.map(create_line_breaks_rowwise))
+
+
+def test_add_sort_id_matches_rowwise(assesement):
+    expected = assesement['Health_Assesement'].map(add_sort_id_rowwise).to_numpy(dtype=float)
+    result = transforms.add_sort_id(assesement['Health_Assesement']).to_numpy(dtype=float)
+    assert np.array_equal(result, expected, equal_nan=True)
+
+
+def test_only_bad_health_matches_rowwise(assesement):
+    expected = assesement.apply(only_bad_health_rowwise, axis=1).to_numpy(dtype=float)
+    assert np.array_equal(transforms.only_bad_health(assesement).to_numpy(), expected, equal_nan=True)
+
+
+def test_assign_quadrant_matches_rowwise(scatter):
+    x_avg, y_avg = scatter['perc_of_gdp'].mean(), scatter['perc_of_bad_health'].mean()
+    expected = assign_quadrant_rowwise(scatter, x_avg, y_avg).to_numpy()
+    result = transforms.assign_quadrant(scatter['perc_of_gdp'], scatter['perc_of_bad_health'], x_avg, y_avg)
+    assert (result == expected).all()